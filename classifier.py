@@ -1,28 +1,157 @@
-from transformers import BertTokenizer, BertForSequenceClassification, Trainer, TrainingArguments
-from datasets import load_dataset
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+"""Fine-tune BERT on data.csv to tell Fact (0) from News (1) claims; writes ./trained_model.
+
+The tokenized corpus is cached under ``.cache/tokenized/<key>/`` as
+memory-mapped NumPy arrays. ``key`` hashes data.csv, the tokenizer and the max
+length, so later runs skip tokenization until one of them changes. Examples
+are stored unpadded. Each batch is padded only to its own longest example,
+and ``group_by_length`` batches examples of similar length together. Large
+corpora are tokenized across processes.
+
+``--legacy`` runs the previous pipeline: the whole corpus padded to its longest
+example, re-tokenized every run, with a new tensor per item. Both modes record
+time per epoch, peak memory and the share of padding in ``--report``, so the
+two can be compared.
+
+    python classifier.py                      # train, cache the tokenized data
+    python classifier.py --legacy --epochs 1  # the old pipeline, for comparison
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 import torch
+from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+from sklearn.model_selection import train_test_split
+from transformers import (BertForSequenceClassification, BertTokenizerFast, DataCollatorWithPadding, Trainer,
+                          TrainerCallback, TrainingArguments, default_data_collator)
+
+MODEL_NAME = 'bert-base-uncased'
+CACHE_DIR = Path('.cache/tokenized')
+# Below this many texts one process is faster than starting tokenizer workers.
+PARALLEL_MIN_TEXTS = 20000
+
+
+def load_data(path):
+    data = pd.read_csv(path)  # text,label
+    data = data.reset_index(drop=True)  # Reset the index to be continuous
+    data.columns = ['text', 'label']  # Ensure the correct column names
+    data['label'] = data['label'].astype(int)  # Ensure the labels are integers (0 or 1)
+    return data['text'].astype(str).tolist(), data['label'].tolist()
+
+
+def cache_key(data_path, tokenizer, max_length):
+    """Hash of the data file's bytes and everything about the tokenizer that changes its output."""
+    digest = hashlib.sha256()
+    with open(data_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    digest.update(json.dumps({
+        'tokenizer': type(tokenizer).__name__,
+        'lowercase': getattr(tokenizer, 'do_lower_case', None),
+        'max_length': max_length,
+        'vocab': sorted(tokenizer.get_vocab().items()),
+    }).encode())
+    return digest.hexdigest()[:20]
+
+
+_worker_tokenizer = None
+
+
+def _init_worker(name):
+    global _worker_tokenizer
+    _worker_tokenizer = BertTokenizerFast.from_pretrained(name)
 
-# Load the dataset
-data = pd.read_csv('data.csv')  # Assuming your dataset is in a CSV file
-data = data.reset_index(drop=True)  # Reset the index to be continuous
-data.columns = ['text', 'label']  # Ensure the correct column names
-data['label'] = data['label'].astype(int)  # Ensure the labels are integers (0 or 1)
 
-# Split into train and test
-train_texts, test_texts, train_labels, test_labels = train_test_split(data['text'], data['label'], test_size=0.2)
+def _tokenize_chunk(job):
+    texts, max_length = job
+    return _worker_tokenizer(texts, truncation=True, max_length=max_length)['input_ids']
 
-# Load pre-trained BERT tokenizer
-tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
 
-# Tokenize the data
-train_encodings = tokenizer(list(train_texts), truncation=True, padding=True)
-test_encodings = tokenizer(list(test_texts), truncation=True, padding=True)
+def tokenize(texts, tokenizer, max_length=512, workers=1):
+    """Unpadded input ids for ``texts``; split across ``workers`` processes for large corpora."""
+    if workers <= 1 or len(texts) < PARALLEL_MIN_TEXTS:
+        return tokenizer(texts, truncation=True, max_length=max_length)['input_ids']
+    size = -(-len(texts) // (workers * 4))  # a few chunks per worker evens out slow ones
+    jobs = [(texts[i:i + size], max_length) for i in range(0, len(texts), size)]
+    # spawn: forking after the parent used the Rust tokenizer can deadlock it
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(tokenizer.name_or_path,)) as pool:
+        return list(chain.from_iterable(pool.map(_tokenize_chunk, jobs)))
+
+
+class TokenizedCorpus:
+    """A cached, tokenized data.csv: all token ids in one flat memory-mapped array plus offsets."""
+
+    def __init__(self, directory):
+        directory = Path(directory)
+        self.input_ids = np.load(directory / 'input_ids.npy', mmap_mode='r')
+        self.offsets = np.load(directory / 'offsets.npy')
+        self.labels = np.load(directory / 'labels.npy')
+        self.lengths = np.diff(self.offsets)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def ids(self, index):
+        return self.input_ids[self.offsets[index]:self.offsets[index + 1]]
+
+    @classmethod
+    def build(cls, data_path, tokenizer, max_length=512, workers=1, cache_dir=CACHE_DIR):
+        """Load the corpus from the cache, tokenizing and caching it first if needed.
+
+        Returns ``(corpus, cache_hit)``.
+        """
+        directory = Path(cache_dir) / cache_key(data_path, tokenizer, max_length)
+        if (directory / 'labels.npy').exists():
+            return cls(directory), True
+        texts, labels = load_data(data_path)
+        ids = tokenize(texts, tokenizer, max_length, workers)
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in ids], out=offsets[1:])
+        flat = np.fromiter(chain.from_iterable(ids), dtype=np.int32, count=int(offsets[-1]))
+        # Write next to the final place and rename, so an interrupted run leaves no half cache.
+        partial = directory.with_name(f'{directory.name}.{os.getpid()}.partial')
+        partial.mkdir(parents=True, exist_ok=True)
+        np.save(partial / 'input_ids.npy', flat)
+        np.save(partial / 'offsets.npy', offsets)
+        np.save(partial / 'labels.npy', np.asarray(labels, dtype=np.int64))
+        with open(partial / 'meta.json', 'w') as f:
+            json.dump({'data': str(data_path), 'tokenizer': tokenizer.name_or_path, 'max_length': max_length,
+                       'examples': len(ids), 'tokens': int(offsets[-1])}, f, indent=2)
+        try:
+            os.replace(partial, directory)
+        except OSError:
+            pass  # another run cached it first; theirs is identical
+        return cls(directory), False
+
 
-# Convert to torch datasets
 class NewsFactDataset(torch.utils.data.Dataset):
+    """``indices`` of a TokenizedCorpus, unpadded; the data collator pads each batch."""
+
+    def __init__(self, corpus, indices):
+        self.corpus = corpus
+        self.indices = np.asarray(indices)
+
+    def __getitem__(self, idx):
+        index = self.indices[idx]
+        return {'input_ids': self.corpus.ids(index).tolist(), 'labels': int(self.corpus.labels[index])}
+
+    def __len__(self):
+        return len(self.indices)
+
+
+class LegacyNewsFactDataset(torch.utils.data.Dataset):
+    """The previous pipeline's dataset: pre-padded encodings, a new tensor per item."""
+
     def __init__(self, encodings, labels):
         self.encodings = encodings
         self.labels = labels
@@ -34,29 +163,13 @@ class NewsFactDataset(torch.utils.data.Dataset):
 
     def __len__(self):
         return len(self.labels)
-    
-train_labels = train_labels.reset_index(drop=True)
-test_labels = test_labels.reset_index(drop=True)
-
-train_dataset = NewsFactDataset(train_encodings, train_labels)
-test_dataset = NewsFactDataset(test_encodings, test_labels)
-
-# Load pre-trained BERT model for sequence classification
-model = BertForSequenceClassification.from_pretrained('bert-base-uncased', num_labels=2)
-
-# Define training arguments
-training_args = TrainingArguments(
-    output_dir='./results',          # output directory
-    num_train_epochs=3,              # number of training epochs
-    per_device_train_batch_size=8,   # batch size for training
-    per_device_eval_batch_size=8,    # batch size for evaluation
-    warmup_steps=500,                # number of warmup steps for learning rate scheduler
-    weight_decay=0.01,               # strength of weight decay
-    logging_dir='./logs',            # directory for storing logs
-    logging_steps=10,
-)
-
-# Define the trainer
+
+
+def split(count, seed=42):
+    """Train/test indices (80/20), the same for every run with the same ``seed``."""
+    return train_test_split(np.arange(count), test_size=0.2, random_state=seed)
+
+
 def compute_metrics(pred):
     labels = pred.label_ids
     preds = pred.predictions.argmax(-1)
@@ -69,29 +182,164 @@ def compute_metrics(pred):
         'f1': f1
     }
 
-trainer = Trainer(
-    model=model,              
-    args=training_args,                  
-    train_dataset=train_dataset,         
-    eval_dataset=test_dataset,           
-    compute_metrics=compute_metrics      
-)
-
-# Train the model
-trainer.train()
-
-# Save the trained model and tokenizer for later use
-model.save_pretrained('./trained_model')
-tokenizer.save_pretrained('./trained_model')
-
-# Evaluate the model
-trainer.evaluate()
-
-# Example prediction
-inputs = tokenizer("Vijay is leader of DMK party", return_tensors="pt", padding=True, truncation=True)
-outputs = model(**inputs)
-prediction = torch.argmax(outputs.logits)
-print(f'Prediction: {prediction.item()}')  # 0 or 1
+
+class PaddingCounter:
+    """Wraps a data collator and counts real vs. padded tokens in the batches it builds."""
+
+    def __init__(self, collator):
+        self.collator = collator
+        self.real = 0
+        self.total = 0
+
+    def __call__(self, features):
+        batch = self.collator(features)
+        mask = batch.get('attention_mask')
+        if mask is not None:
+            self.real += int(mask.sum())
+            self.total += mask.numel()
+        return batch
+
+    @property
+    def padding_share(self):
+        return 1 - self.real / self.total if self.total else 0.0
+
+
+class EpochReport(TrainerCallback):
+    """Wall time of every training epoch."""
+
+    def __init__(self):
+        self.epochs = []
+        self._started = None
+
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self._started = time.perf_counter()
+
+    def on_epoch_end(self, args, state, control, **kwargs):
+        self.epochs.append(time.perf_counter() - self._started)
+
+
+def peak_memory_mb():
+    """Peak RSS of this process (and peak CUDA allocation, if any) in MiB."""
+    peak = {'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}  # KiB on Linux
+    if torch.cuda.is_available():
+        peak['cuda'] = torch.cuda.max_memory_allocated() / 2 ** 20
+    return peak
+
+
+def build_datasets(args, tokenizer):
+    """Train/test datasets and a data collator for ``args.legacy`` or the cached pipeline."""
+    started = time.perf_counter()
+    if args.legacy:
+        texts, labels = load_data(args.data)
+        train_idx, test_idx = split(len(texts), args.seed)
+        # Tokenize the data, padding everything to the longest example in the corpus
+        train_encodings = tokenizer([texts[i] for i in train_idx], truncation=True, padding=True)
+        test_encodings = tokenizer([texts[i] for i in test_idx], truncation=True, padding=True)
+        train_dataset = LegacyNewsFactDataset(train_encodings, [labels[i] for i in train_idx])
+        test_dataset = LegacyNewsFactDataset(test_encodings, [labels[i] for i in test_idx])
+        collator, cache = default_data_collator, 'off'
+    else:
+        corpus, hit = TokenizedCorpus.build(args.data, tokenizer, args.max_length, args.workers)
+        train_idx, test_idx = split(len(corpus), args.seed)
+        train_dataset = NewsFactDataset(corpus, train_idx)
+        test_dataset = NewsFactDataset(corpus, test_idx)
+        collator, cache = DataCollatorWithPadding(tokenizer, pad_to_multiple_of=8), 'hit' if hit else 'miss'
+    return train_dataset, test_dataset, collator, {'prepare_s': time.perf_counter() - started, 'cache': cache}
+
+
+def write_report(path, mode, entry):
+    """Store ``entry`` under ``mode`` in the JSON report and print it next to the other mode."""
+    report = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            report = json.load(f)
+    report[mode] = entry
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{'mode':<8} {'prepare s':>10} {'cache':>6} {'s/epoch':>9} {'padding':>8} {'peak RSS':>10}")
+    for name, r in report.items():
+        print(f"{name:<8} {r['prepare_s']:>10.2f} {r['cache']:>6} {r['epoch_s_mean']:>9.1f} "
+              f"{r['padding_share']:>8.1%} {r['peak_memory_mb']['rss']:>7.0f} MiB")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--data', default='data.csv')
+    parser.add_argument('--output-dir', default='./trained_model')
+    parser.add_argument('--epochs', type=float, default=3)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--max-length', type=int, default=512)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help=f"Tokenizer processes (used from {PARALLEL_MIN_TEXTS} texts up).")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--legacy', action='store_true', help="Run the old padded/re-tokenizing pipeline.")
+    parser.add_argument('--report', default='results/train_report.json')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tokenizer = BertTokenizerFast.from_pretrained(MODEL_NAME)
+    train_dataset, test_dataset, collator, prepared = build_datasets(args, tokenizer)
+    collator = PaddingCounter(collator)
+    epochs = EpochReport()
+
+    # Load pre-trained BERT model for sequence classification
+    model = BertForSequenceClassification.from_pretrained(MODEL_NAME, num_labels=2)
+
+    training_args = TrainingArguments(
+        output_dir='./results',          # output directory
+        num_train_epochs=args.epochs,    # number of training epochs
+        per_device_train_batch_size=args.batch_size,   # batch size for training
+        per_device_eval_batch_size=args.batch_size,    # batch size for evaluation
+        warmup_steps=500,                # number of warmup steps for learning rate scheduler
+        weight_decay=0.01,               # strength of weight decay
+        logging_dir='./logs',            # directory for storing logs
+        logging_steps=10,
+        group_by_length=not args.legacy,  # batches of similar length need little padding
+        seed=args.seed,
+    )
+
+    trainer = Trainer(
+        model=model,
+        args=training_args,
+        train_dataset=train_dataset,
+        eval_dataset=test_dataset,
+        data_collator=collator,
+        compute_metrics=compute_metrics,
+        callbacks=[epochs],
+    )
+
+    # Train the model
+    trainer.train()
+
+    # Save the trained model and tokenizer for later use
+    model.save_pretrained(args.output_dir)
+    tokenizer.save_pretrained(args.output_dir)
+
+    # Evaluate the model
+    metrics = trainer.evaluate()
+
+    write_report(args.report, 'legacy' if args.legacy else 'cached', dict(
+        prepared,
+        epoch_s=epochs.epochs,
+        epoch_s_mean=float(np.mean(epochs.epochs)) if epochs.epochs else 0.0,
+        padding_share=collator.padding_share,
+        peak_memory_mb=peak_memory_mb(),
+        eval_accuracy=metrics.get('eval_accuracy'),
+        eval_f1=metrics.get('eval_f1'),
+    ))
+
+    # Example prediction
+    inputs = tokenizer("Vijay is leader of DMK party", return_tensors="pt", padding=True, truncation=True)
+    outputs = model(**inputs.to(model.device))
+    prediction = torch.argmax(outputs.logits)
+    print(f'Prediction: {prediction.item()}')  # 0 or 1
+
+
+if __name__ == '__main__':
+    main()
 
 # from transformers import BertTokenizer, BertForSequenceClassification
 # import torch
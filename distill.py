@@ -0,0 +1,217 @@
+"""Distill the fine-tuned BERT in ./trained_model into a compact student; writes ./trained_student.
+
+The student starts from a small pre-trained BERT with the same uncased
+vocabulary as the teacher (default: 4 layers, hidden size 256, ~11M
+parameters). It is fine-tuned on the data.csv training split to match the
+teacher's temperature-softened logits as well as the gold labels. The teacher
+is run once over the corpus rather than at every step. Data loading is the
+cached, per-batch padded pipeline from classifier.py, with the same seeded
+split.
+
+Afterwards teacher and student are scored on the test split: accuracy and F1
+against size, weight memory and single-claim latency. The results are printed
+and written to ``--report``. To serve the student, point the app at it:
+``CLASSIFIER_MODEL_DIR=trained_student``.
+
+    python distill.py [--student google/bert_uncased_L-4_H-256_A-4] [--epochs 5]
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from transformers import (BertForSequenceClassification, BertTokenizerFast, DataCollatorWithPadding, EvalPrediction,
+                          Trainer, TrainingArguments)
+
+from classifier import NewsFactDataset, TokenizedCorpus, compute_metrics, split
+
+
+class DistillDataset(NewsFactDataset):
+    """Training examples carrying the teacher's logits for the distillation loss."""
+
+    def __init__(self, corpus, indices, teacher_logits):
+        super().__init__(corpus, indices)
+        self.teacher_logits = teacher_logits
+
+    def __getitem__(self, idx):
+        item = super().__getitem__(idx)
+        item['teacher_logits'] = self.teacher_logits[self.indices[idx]].tolist()
+        return item
+
+
+class DistillationTrainer(Trainer):
+    """Trainer whose loss mixes KL divergence to the teacher's softened logits with cross-entropy."""
+
+    def __init__(self, *args, temperature=2.0, alpha=0.5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.temperature = temperature
+        self.alpha = alpha
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        teacher_logits = inputs.pop('teacher_logits', None)
+        if teacher_logits is None and model.training:
+            raise ValueError("training batch has no 'teacher_logits'; train on a DistillDataset "
+                             "with remove_unused_columns=False")
+        outputs = model(**inputs)
+        loss = outputs.loss  # cross-entropy against the gold labels
+        if teacher_logits is not None:
+            t = self.temperature
+            soft = F.kl_div(F.log_softmax(outputs.logits / t, dim=-1), F.softmax(teacher_logits / t, dim=-1),
+                            reduction='batchmean') * t * t  # t^2 keeps the gradient scale independent of t
+            loss = self.alpha * soft + (1 - self.alpha) * loss
+        return (loss, outputs) if return_outputs else loss
+
+
+def predict_logits(model, corpus, collator, batch_size=64):
+    """Logits of ``model`` for every example in ``corpus`` (batched shortest-first, in corpus order)."""
+    order = np.argsort(corpus.lengths, kind='stable')
+    logits = np.zeros((len(corpus), model.config.num_labels), dtype=np.float32)
+    model.eval()
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            chunk = order[start:start + batch_size]
+            batch = collator([{'input_ids': corpus.ids(i).tolist()} for i in chunk])
+            logits[chunk] = model(**batch.to(model.device)).logits.float().cpu().numpy()
+    return logits
+
+
+def score(logits, labels):
+    return compute_metrics(EvalPrediction(predictions=logits, label_ids=labels))
+
+
+def latency_ms(model, tokenizer, texts):
+    """Per-claim latency (batch size 1, as a single /classify-text/ request) in ms."""
+    model.eval()
+    timings = []
+    with torch.inference_mode():
+        model(**tokenizer(texts[0], return_tensors='pt', truncation=True))  # warm-up
+        for text in texts:
+            inputs = tokenizer(text, return_tensors='pt', truncation=True)
+            started = time.perf_counter()
+            model(**inputs)
+            timings.append((time.perf_counter() - started) * 1000)
+    return {'mean': float(np.mean(timings)), 'p50': float(np.percentile(timings, 50)),
+            'p95': float(np.percentile(timings, 95))}
+
+
+def describe(model, model_dir, logits, labels, tokenizer, texts):
+    """Report row for one model: quality on the test split against size and speed."""
+    parameters = sum(p.numel() for p in model.parameters())
+    weights = sum(t.numel() * t.element_size() for t in model.state_dict().values())
+    disk = sum(f.stat().st_size for f in Path(model_dir).glob('*') if f.is_file())
+    return dict(
+        score(logits, labels),
+        layers=model.config.num_hidden_layers,
+        hidden_size=model.config.hidden_size,
+        parameters_m=parameters / 1e6,
+        weights_mb=weights / 2 ** 20,
+        disk_mb=disk / 2 ** 20,
+        latency_ms=latency_ms(model, tokenizer, texts),
+    )
+
+
+def build_trainer(args, student, corpus, train_idx, test_idx, teacher_logits, collator):
+    """DistillationTrainer for ``student`` on the train split, with the teacher's logits as soft targets."""
+    training_args = TrainingArguments(
+        output_dir='./results/distill',
+        num_train_epochs=args.epochs,
+        per_device_train_batch_size=args.batch_size,
+        per_device_eval_batch_size=args.batch_size,
+        learning_rate=args.learning_rate,
+        warmup_ratio=0.1,
+        weight_decay=0.01,
+        logging_dir='./logs',
+        logging_steps=10,
+        group_by_length=True,
+        seed=args.seed,
+        remove_unused_columns=False,  # 'teacher_logits' is not a forward() argument; keep it for the loss
+    )
+    return DistillationTrainer(
+        model=student,
+        args=training_args,
+        train_dataset=DistillDataset(corpus, train_idx, teacher_logits),
+        eval_dataset=NewsFactDataset(corpus, test_idx),
+        data_collator=collator,
+        compute_metrics=compute_metrics,
+        temperature=args.temperature,
+        alpha=args.alpha,
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--data', default='data.csv')
+    parser.add_argument('--teacher', default='./trained_model')
+    parser.add_argument('--student', default='google/bert_uncased_L-4_H-256_A-4',
+                        help="Pre-trained compact BERT (uncased vocabulary) the student starts from.")
+    parser.add_argument('--output-dir', default='./trained_student')
+    parser.add_argument('--epochs', type=float, default=5)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--learning-rate', type=float, default=1e-4)
+    parser.add_argument('--temperature', type=float, default=2.0)
+    parser.add_argument('--alpha', type=float, default=0.5,
+                        help="Weight of the teacher (soft) loss; the rest goes to the gold labels.")
+    parser.add_argument('--max-length', type=int, default=512)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency-claims', type=int, default=200,
+                        help="Test claims timed one by one for the latency columns.")
+    parser.add_argument('--report', default='results/distill_report.json')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tokenizer = BertTokenizerFast.from_pretrained(args.teacher)
+    corpus, _ = TokenizedCorpus.build(args.data, tokenizer, args.max_length, args.workers)
+    train_idx, test_idx = split(len(corpus), args.seed)
+    collator = DataCollatorWithPadding(tokenizer, pad_to_multiple_of=8)
+
+    teacher = BertForSequenceClassification.from_pretrained(args.teacher)
+    teacher_logits = predict_logits(teacher, corpus, collator)
+
+    student = BertForSequenceClassification.from_pretrained(args.student, num_labels=2)
+    if student.config.vocab_size != teacher.config.vocab_size:
+        raise SystemExit(f"{args.student} has a different vocabulary than {args.teacher}; "
+                         f"the student must share the teacher's tokenizer")
+
+    trainer = build_trainer(args, student, corpus, train_idx, test_idx, teacher_logits, collator)
+    trainer.train()
+
+    # The student reuses the teacher's tokenizer, so the directory is a drop-in CLASSIFIER_MODEL_DIR
+    student.save_pretrained(args.output_dir)
+    tokenizer.save_pretrained(args.output_dir)
+
+    student = student.cpu()
+    labels = corpus.labels[test_idx]
+    texts = [tokenizer.decode(corpus.ids(i), skip_special_tokens=True)
+             for i in test_idx[:args.latency_claims]]
+    report = {
+        'teacher': describe(teacher, args.teacher, teacher_logits[test_idx], labels, tokenizer, texts),
+        'student': describe(student, args.output_dir, predict_logits(student, corpus, collator)[test_idx],
+                            labels, tokenizer, texts),
+        'config': {key: getattr(args, key) for key in (
+            'student', 'epochs', 'batch_size', 'learning_rate', 'temperature', 'alpha', 'seed')},
+        'test_examples': len(test_idx),
+        'torch_threads': torch.get_num_threads(),
+    }
+    os.makedirs(os.path.dirname(args.report) or '.', exist_ok=True)
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'model':<8} {'layers':>6} {'hidden':>6} {'params':>8} {'weights':>9} {'accuracy':>9} {'f1':>6} "
+          f"{'p50 ms':>7} {'p95 ms':>7}")
+    for name in ('teacher', 'student'):
+        r = report[name]
+        print(f"{name:<8} {r['layers']:>6} {r['hidden_size']:>6} {r['parameters_m']:>7.1f}M "
+              f"{r['weights_mb']:>5.0f} MiB {r['accuracy']:>9.2%} {r['f1']:>6.3f} "
+              f"{r['latency_ms']['p50']:>7.2f} {r['latency_ms']['p95']:>7.2f}")
+    print(f"Wrote {args.report}; serve the student with CLASSIFIER_MODEL_DIR={args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
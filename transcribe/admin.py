@@ -1,8 +1,15 @@
 from django.contrib import admin
-from .models import Register
+from .models import AudioJob, Register
 
 @admin.register(Register)
 class RegisterAdmin(admin.ModelAdmin):
     list_display = ('username', 'created_at', 'password')
     search_fields = ('username', 'password', )
     ordering = ('-created_at',)
+
+
+@admin.register(AudioJob)
+class AudioJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'file_name', 'status', 'stage', 'progress', 'attempts', 'created_at')
+    list_filter = ('status',)
+    ordering = ('-created_at',)
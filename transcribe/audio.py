@@ -0,0 +1,115 @@
+"""Audio decoding and log-mel reuse for Whisper.
+
+``decode_file`` runs a single ffmpeg decode of a stored upload (see
+``uploads.py``, which keeps uploads under MEDIA_ROOT by content hash) straight
+into a 16 kHz mono float32 NumPy buffer. ``log_mel`` computes the spectrogram
+once, and ``detect_language`` and ``transcribe_mel`` both reuse it instead of
+each recomputing it from the file.
+"""
+import importlib
+import logging
+import subprocess
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+
+class AudioDecodeError(RuntimeError):
+    """ffmpeg could not decode the input."""
+
+
+def ffmpeg_command(source, sample_rate):
+    """ffmpeg argv decoding ``source`` to mono s16le PCM on stdout."""
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-threads", "0",
+        "-i", source,
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+
+
+def _run_ffmpeg(source, sample_rate=SAMPLE_RATE, timeout=None):
+    try:
+        result = subprocess.run(
+            ffmpeg_command(source, sample_rate),
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise TimeoutError(f"ffmpeg did not finish decoding within {timeout:g}s") from None
+    if result.returncode != 0:
+        raise AudioDecodeError(result.stderr.decode(errors='ignore').strip() or "ffmpeg failed")
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def decode_file(path, sample_rate=SAMPLE_RATE, timeout=None):
+    """Decode an audio/video file on disk; ffmpeg reads it in place (and is killed after ``timeout`` s)."""
+    return _run_ffmpeg(path, sample_rate=sample_rate, timeout=timeout)
+
+
+def log_mel(samples, n_mels=80):
+    """Log-mel spectrogram of the whole clip, padded the way ``whisper.transcribe`` pads it."""
+    import whisper
+    from whisper.audio import N_SAMPLES
+    return whisper.log_mel_spectrogram(samples, n_mels, padding=N_SAMPLES)
+
+
+def detect_language(model, mel):
+    """Most likely language code for the first 30 s of a precomputed mel."""
+    import whisper
+    from whisper.audio import N_FRAMES
+    segment = whisper.pad_or_trim(mel, N_FRAMES).to(model.device)
+    _, probs = model.detect_language(segment)
+    return max(probs, key=probs.get)
+
+
+_reuse = threading.local()
+_hook_lock = threading.Lock()
+_hook_installed = False
+
+
+def _install_mel_hook():
+    """Let ``whisper.transcribe`` pick up a mel we already computed.
+
+    ``transcribe()`` always calls ``log_mel_spectrogram`` on its input. The
+    wrapper returns the precomputed mel when it is asked for the exact buffer
+    registered by ``transcribe_mel`` on the same thread, and defers to the
+    original function otherwise.
+    """
+    global _hook_installed
+    with _hook_lock:
+        if _hook_installed:
+            return
+        module = importlib.import_module('whisper.transcribe')
+        original = module.log_mel_spectrogram
+
+        def log_mel_spectrogram(audio, *args, **kwargs):
+            entry = getattr(_reuse, 'entry', None)
+            if entry is not None and entry[0] is audio:
+                return entry[1]
+            return original(audio, *args, **kwargs)
+
+        module.log_mel_spectrogram = log_mel_spectrogram
+        _hook_installed = True
+
+
+@contextmanager
+def _reusing(samples, mel):
+    _install_mel_hook()
+    _reuse.entry = (samples, mel)
+    try:
+        yield
+    finally:
+        _reuse.entry = None
+
+
+def transcribe_mel(model, samples, mel, **options):
+    """``model.transcribe(samples)`` without recomputing the log-mel."""
+    with _reusing(samples, mel):
+        return model.transcribe(samples, **options)
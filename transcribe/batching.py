@@ -0,0 +1,146 @@
+"""Dynamic micro-batching for model inference.
+
+Concurrent callers hand their input to a shared ``MicroBatcher``. A single
+worker thread gathers whatever arrives inside the wait window (up to
+``max_batch`` items), runs one forward pass over the whole batch and hands
+every caller back its own result.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class BatchStats:
+    """Thread-safe counters describing the batches a MicroBatcher achieves."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_batch_seen = 0
+        self.batch_sizes = {}
+        self.queue_wait_total = 0.0
+        self.forward_total = 0.0
+
+    def record(self, size, queue_wait, forward_time, failed=False):
+        with self._lock:
+            self.requests += size
+            self.batches += 1
+            if failed:
+                self.errors += 1
+            self.max_batch_seen = max(self.max_batch_seen, size)
+            self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+            self.queue_wait_total += queue_wait
+            self.forward_total += forward_time
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            batches = self.batches or 1
+            requests = self.requests or 1
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "errors": self.errors,
+                "mean_batch_size": round(self.requests / batches, 2),
+                "max_batch_size": self.max_batch_seen,
+                "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+                "mean_queue_wait_ms": round(1000 * self.queue_wait_total / requests, 3),
+                "mean_forward_ms": round(1000 * self.forward_total / batches, 3),
+                "throughput_per_s": round(self.requests / elapsed, 2),
+            }
+
+
+class MicroBatcher:
+    """Collect concurrent inputs into batches for ``predict_fn``.
+
+    ``predict_fn`` receives a list of inputs and must return a list of results
+    in the same order. Each call to ``submit`` returns a Future for that
+    caller's result.
+    """
+
+    def __init__(self, predict_fn, max_batch=32, wait_ms=5.0, name="batcher"):
+        self.predict_fn = predict_fn
+        self.max_batch = max(1, int(max_batch))
+        self.wait = max(0.0, float(wait_ms)) / 1000.0
+        self.name = name
+        self.stats = BatchStats()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"microbatch-{name}", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, item):
+        """Queue one input and return a Future resolving to its result."""
+        if self._closed:
+            raise RuntimeError(f"MicroBatcher '{self.name}' is closed")
+        future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def predict(self, item, timeout=None):
+        """Blocking convenience wrapper around ``submit``."""
+        return self.submit(item).result(timeout=timeout)
+
+    def predict_many(self, items, timeout=None):
+        """Submit several inputs at once and wait for all of them, in order."""
+        futures = [self.submit(item) for item in items]
+        return [f.result(timeout=timeout) for f in futures]
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # Drop callers that gave up (cancelled) before we got to them.
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [entry[0] for entry in batch]
+            started = time.monotonic()
+            queue_wait = sum(started - entry[2] for entry in batch)
+            try:
+                results = self.predict_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"predict_fn returned {len(results)} results for {len(items)} inputs"
+                    )
+            except Exception as e:
+                logger.exception("[MicroBatcher:%s] batch of %d failed: %s", self.name, len(items), e)
+                self.stats.record(len(items), queue_wait, time.monotonic() - started, failed=True)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            self.stats.record(len(items), queue_wait, time.monotonic() - started)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
@@ -1,104 +1,314 @@
+import asyncio
 import json
-import whisper
 import speech_recognition as sr
 import io
 import sys
-import tempfile
 import subprocess
+import time
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeoutError
+from urllib.parse import parse_qs
+import numpy as np
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
-import os
+from django.conf import settings
 import logging 
+from .audio import SAMPLE_RATE, AudioDecodeError, ffmpeg_command
+from .executor import ExecutorSaturated, JobCancelled, get_executor
+from .metrics import WEBSOCKET_MESSAGES, WEBSOCKETS, record, stage
+from .streaming import EnergyVAD, StreamingDecoder
+from .whisper_service import WhisperQueueFull, get_whisper_service, transcribe_audio
 
 # Setup logger
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 
-whisper_model = whisper.load_model("base")
 recognizer = sr.Recognizer()
 
+
+def decode_recording(job, data):
+    """Decode a buffered webm/opus recording to float32 PCM; ffmpeg is killed on cancel."""
+    proc = subprocess.Popen(
+        ffmpeg_command("pipe:0", SAMPLE_RATE),
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    job.on_cancel(proc.kill)
+    with stage('ws_decode'):
+        out, err = proc.communicate(data)
+    job.check()
+    if proc.returncode != 0:
+        raise AudioDecodeError(err.decode(errors="ignore").strip() or "ffmpeg failed")
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+def transcribe_pcm(job, samples):
+    """Transcribe one float32 utterance: Google first, Whisper as the fallback."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+    try:
+        with stage('google_stt'):
+            return recognizer.recognize_google(sr.AudioData(pcm, SAMPLE_RATE, 2))
+    except (sr.UnknownValueError, sr.RequestError):
+        job.check()
+        whisper_service = get_whisper_service()
+        if whisper_service is None:
+            return ""
+        future = whisper_service.submit(transcribe_audio, samples)
+        job.on_cancel(future.cancel)
+        try:
+            with stage('whisper'):
+                return future.result(timeout=settings.WHISPER_TIMEOUT_S)["text"].strip()
+        except CancelledError:
+            raise JobCancelled() from None
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+
+class LiveStream:
+    """Decoder, VAD and ordered utterance queue for one streamed recording."""
+
+    def __init__(self, consumer):
+        self.consumer = consumer
+        self.vad = EnergyVAD(
+            silence_ms=settings.LIVE_VAD_SILENCE_MS,
+            max_segment_s=settings.LIVE_VAD_MAX_SEGMENT_S,
+        )
+        self.decoder = StreamingDecoder(self._on_samples)
+        self.segments = asyncio.Queue()
+        self.segment_count = 0
+        self.transcript = []
+        self.worker = asyncio.create_task(self._transcribe_segments())
+
+    @property
+    def empty(self):
+        return not self.decoder.started and not self.segment_count
+
+    async def write(self, data):
+        await self.decoder.write(data)
+
+    async def _on_samples(self, samples):
+        for segment in self.vad.feed(samples):
+            self._enqueue_segment(segment)
+
+    def _enqueue_segment(self, segment):
+        self.segment_count += 1
+        logger.debug("Utterance %d ready (%.2fs)", self.segment_count, len(segment) / SAMPLE_RATE)
+        self.segments.put_nowait((self.segment_count, segment))
+
+    async def _transcribe_segments(self):
+        """Transcribe finished utterances one at a time, in order."""
+        while True:
+            item = await self.segments.get()
+            if item is None:
+                return
+            index, samples = item
+            try:
+                text = await self.consumer.run_job(transcribe_pcm, samples)
+            except JobCancelled:
+                return
+            except Exception as e:
+                logger.error(f"Error transcribing segment {index}: {e}")
+                await self.consumer.send(text_data=json.dumps({
+                    "type": "partial", "segment": index, "error": "Error transcribing audio",
+                }))
+                continue
+            if text:
+                self.transcript.append(text)
+            await self.consumer.send(text_data=json.dumps({
+                "type": "partial",
+                "segment": index,
+                "text": text,
+                "transcript": " ".join(self.transcript),
+            }))
+
+    async def finish(self):
+        """Flush the decoder and the last utterance; return the full transcript."""
+        await self.decoder.finish()
+        last = self.vad.flush()
+        if last is not None:
+            self._enqueue_segment(last)
+        self.segments.put_nowait(None)
+        await self.worker
+        return " ".join(self.transcript)
+
+    def abort(self):
+        self.decoder.kill()
+        self.worker.cancel()
+
+
 class TranscriptionConsumer(AsyncWebsocketConsumer):
+    """Live transcription over ``ws/live-transcribe/``.
+
+    Clients send binary webm/opus chunks and ``{"type": "stop"}`` when done.
+    In streaming mode (the default; ``?streaming=0`` opts out) audio is
+    decoded as it arrives and cut into utterances on pauses; each utterance is
+    transcribed while the user keeps talking and pushed back as
+    ``{"type": "partial", "segment": n, "text": ..., "transcript": ...}``.
+    ``stop`` then only has the last utterance left to process before the
+    final ``{"type": "transcription", "text": ...}`` message.
+
+    Blocking work (ffmpeg, speech recognition, Whisper) runs on the shared
+    InferenceExecutor, never on the event loop. When it is saturated the
+    client gets ``{"type": "busy", ...}`` and the job is retried with
+    backoff. Closing the socket cancels its queued and in-flight jobs.
+    """
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.audio_chunks = []
+        self.streaming = False
+        self.stream = None
+        self.tasks = set()
 
     async def connect(self):
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        default = "1" if settings.LIVE_TRANSCRIBE_STREAMING else "0"
+        self.streaming = query.get("streaming", [default])[0].lower() not in ("0", "false", "no")
         await self.accept()
+        WEBSOCKETS.inc('live-transcribe')
+        if self.streaming:
+            self.stream = LiveStream(self)
 
     async def disconnect(self, close_code):
+        WEBSOCKETS.dec('live-transcribe')
         self.audio_chunks = []  # Clear audio buffer on disconnect
+        if self.stream is not None:
+            self.stream.abort()
+        for task in list(self.tasks):
+            task.cancel()
+        get_executor().cancel_owner(self)
 
     async def receive(self, text_data=None, bytes_data=None):
         if text_data:
             data = json.loads(text_data)
+            WEBSOCKET_MESSAGES.inc('live-transcribe', data.get("type") or 'unknown')
             if data.get("type") == "text":
                 user_msg = data.get("message", "")
                 logger.info(f"User text: {user_msg}")
                 await self.send(json.dumps({"transcription": f"Echo: {user_msg}"}))
 
             elif data.get("type") == "stop":
-                await self.process_audio()
-                self.audio_chunks = []  # Clear buffer after transcription
+                # Processing runs in the background so this socket can still
+                # receive (and notice a disconnect) while it is transcribed.
+                if self.streaming:
+                    stream, self.stream = self.stream, LiveStream(self)
+                    self._background(self._timed_stop(self.finish_stream(stream)))
+                else:
+                    chunks, self.audio_chunks = self.audio_chunks, []
+                    self._background(self._timed_stop(self.process_audio(chunks)))
         elif bytes_data:
-            self.audio_chunks.append(bytes_data)
+            WEBSOCKET_MESSAGES.inc('live-transcribe', 'audio')
+            if self.streaming:
+                await self.stream.write(bytes_data)
+            else:
+                self.audio_chunks.append(bytes_data)
+
+    async def _timed_stop(self, coro):
+        """Run the stop handling and record how long the client waited for its transcript."""
+        started = time.perf_counter()
+        await coro
+        record('ws_stop_to_transcript', time.perf_counter() - started)
 
-    async def process_audio(self):
-        if not self.audio_chunks:
+    def _background(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run_job(self, fn, *args):
+        """Run ``fn(job, *args)`` on the shared executor, telling the client when it must wait."""
+        executor = get_executor()
+        delay = 0.25
+        notified = False
+        while True:
+            try:
+                return await executor.run(self, fn, *args)
+            except (ExecutorSaturated, WhisperQueueFull) as e:
+                logger.warning(f"Inference saturated, backing off {delay:.2f}s: {e}")
+                if not notified:
+                    await self.send(text_data=json.dumps({
+                        "type": "busy",
+                        "message": "Server is busy; your audio is queued.",
+                        "retry_in_ms": int(delay * 1000),
+                    }))
+                    notified = True
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 4.0)
+
+    async def finish_stream(self, stream):
+        """Flush a finished recording's last utterance, then send the final transcript."""
+        if stream.empty:
+            stream.abort()
             logger.warning("No audio chunks to process.")
             return
+        try:
+            transcription = await stream.finish()
+            logger.info(f"Transcription: {transcription}")
+            await self.send_transcription(transcription)
+        except Exception as e:
+            logger.error(f"Error processing audio: {e}")
+            await self.send_transcription("Error transcribing audio")
 
-        temp_webm_path = None
-        temp_wav_path = None
+    async def process_audio(self, chunks):
+        if not chunks:
+            logger.warning("No audio chunks to process.")
+            return
 
         try:
-            all_audio = b"".join(self.audio_chunks)
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".webm") as webm_file:
-                webm_file.write(all_audio)
-                temp_webm_path = webm_file.name
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as wav_file:
-                temp_wav_path = wav_file.name
-
-            command = [
-                "ffmpeg", "-y", "-i", temp_webm_path,
-                "-ac", "1", "-ar", "16000", "-sample_fmt", "s16",
-                temp_wav_path
-            ]
-            result = subprocess.run(command, capture_output=True)
-
-            # If ffmpeg fails, raise error
-            if result.returncode != 0 or not os.path.exists(temp_wav_path):
-                logger.error("FFmpeg failed: " + result.stderr.decode())
-                await self.send_transcription("Error converting audio")
-                return
-
-            # Transcribe the WAV
-            with sr.AudioFile(temp_wav_path) as source:
-                audio_data = recognizer.record(source)
-                try:
-                    transcription = recognizer.recognize_google(audio_data)
-                except sr.UnknownValueError:
-                    result = whisper_model.transcribe(temp_wav_path)
-                    transcription = result["text"]
-                except sr.RequestError:
-                    transcription = "Google API unavailable"
-                
-                logger.info(f"Transcription: {transcription}")
-                await self.send_transcription(transcription)
+            samples = await self.run_job(decode_recording, b"".join(chunks))
+        except JobCancelled:
+            return
+        except Exception as e:
+            logger.error(f"FFmpeg failed: {e}")
+            await self.send_transcription("Error converting audio")
+            return
 
+        try:
+            transcription = await self.run_job(transcribe_pcm, samples)
+            logger.info(f"Transcription: {transcription}")
+            await self.send_transcription(transcription)
+        except JobCancelled:
+            return
         except Exception as e:
             logger.error(f"Error processing audio: {e}")
             await self.send_transcription("Error transcribing audio")
 
-        finally:
-            if temp_webm_path and os.path.exists(temp_webm_path):
-                os.remove(temp_webm_path)
-            if temp_wav_path and os.path.exists(temp_wav_path):
-                os.remove(temp_wav_path)
-            self.audio_chunks = []  # Ensure it's cleared
-
     async def send_transcription(self, text):
         await self.send(text_data=json.dumps({
             "type": "transcription",
             "text": text
         }))
+
+
+class JobConsumer(AsyncWebsocketConsumer):
+    """Pushes a /detect/ job's status to the client whenever it changes.
+
+    Workers may live in other processes, so the row is polled every
+    ``JOBS_POLL_S`` rather than relying on an in-process channel layer. The
+    socket closes after the final status.
+    """
+
+    async def connect(self):
+        self.job_id = self.scope["url_route"]["kwargs"]["job_id"]
+        await self.accept()
+        WEBSOCKETS.inc('jobs')
+        self.watcher = asyncio.create_task(self.watch())
+
+    async def disconnect(self, close_code):
+        WEBSOCKETS.dec('jobs')
+        self.watcher.cancel()
+
+    async def watch(self):
+        from .models import AudioJob
+        last = None
+        while True:
+            job = await database_sync_to_async(AudioJob.objects.filter(pk=self.job_id).first)()
+            if job is None:
+                await self.send(text_data=json.dumps({"type": "job", "error": "Unknown job"}))
+                await self.close()
+                return
+            if job.updated_at != last:
+                last = job.updated_at
+                await self.send(text_data=json.dumps({"type": "job", **job.as_dict()}))
+            if job.status in AudioJob.FINISHED:
+                await self.close()
+                return
+            await asyncio.sleep(settings.JOBS_POLL_S)
@@ -0,0 +1,58 @@
+"""Request-level time budget shared by every verify_claim stage.
+
+A ``Deadline`` is created once per claim, from ``REQUEST_DEADLINE_S`` or the
+client's ``X-Request-Deadline-Ms`` header (capped at
+``REQUEST_DEADLINE_MAX_S``), and passed down explicitly. Each stage asks it
+how long it may take (``budget``) and sizes its own timeouts accordingly.
+Retrieval stages keep ``DEADLINE_LLM_RESERVE_S`` (at most half of a short
+deadline) back for the Groq call.
+A stage that gets too little time degrades instead of failing: it is
+skipped or shortened and recorded with ``cut_short``. ``report()`` ends up in
+the response, so clients can see which stages were cut short.
+"""
+import time
+
+from django.conf import settings
+
+HEADER = 'X-Request-Deadline-Ms'
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.expires = self.started + seconds
+        self.cut = []
+
+    @classmethod
+    def from_request(cls, request=None):
+        """Default deadline, or the client's header value if it is valid."""
+        seconds = settings.REQUEST_DEADLINE_S
+        if request is not None:
+            try:
+                seconds = int(request.headers[HEADER]) / 1000
+            except (KeyError, ValueError):
+                pass
+        return cls(min(max(seconds, 0.1), settings.REQUEST_DEADLINE_MAX_S))
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def budget(self, cap=None, reserve=0.0):
+        """Seconds a stage may spend: what is left minus ``reserve``, at most ``cap``."""
+        left = self.remaining() - reserve
+        return max(0.0, left if cap is None else min(cap, left))
+
+    def retrieval_budget(self, cap=None):
+        """Budget for a stage that runs before the LLM call."""
+        return self.budget(cap, reserve=min(settings.DEADLINE_LLM_RESERVE_S, self.seconds / 2))
+
+    def cut_short(self, stage, reason):
+        self.cut.append({'stage': stage, 'reason': reason})
+
+    def report(self):
+        return {
+            'budget_s': round(self.seconds, 3),
+            'elapsed_s': round(time.monotonic() - self.started, 3),
+            'cut_short': list(self.cut),
+        }
@@ -0,0 +1,152 @@
+"""Bounded executor for blocking inference work started from async consumers.
+
+Websocket consumers run on the ASGI event loop, so ffmpeg, speech
+recognition and Whisper calls must not run inline. ``InferenceExecutor``
+runs them on a dedicated thread pool (the heavy lifting happens in ffmpeg
+subprocesses, network calls and the Whisper service's own threads, all of
+which release the GIL). At most ``max_workers + max_pending`` jobs are
+accepted at once; beyond that ``run`` raises ``ExecutorSaturated`` so the
+consumer can tell its client to back off.
+
+Jobs are tracked per owner (one websocket). ``cancel_owner`` drops the
+owner's queued jobs and signals in-flight ones through their ``Job``
+handle, which kills registered subprocesses and cancels queued Whisper work.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when the executor already holds its maximum number of jobs."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job whose owner went away."""
+
+
+class Job:
+    """Cancellation handle passed as the first argument to every job."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Stop between stages if the owner has gone away."""
+        if self._event.is_set():
+            raise JobCancelled()
+
+    def on_cancel(self, callback):
+        """Run ``callback()`` on cancellation (immediately if already cancelled)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug("[InferenceExecutor] cancel callback failed: %s", e)
+
+
+class InferenceExecutor:
+    def __init__(self, max_workers=4, max_pending=16, name="inference"):
+        self.max_workers = max(1, int(max_workers))
+        self.capacity = self.max_workers + max(0, int(max_pending))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._jobs = {}
+
+    @property
+    def active(self):
+        """Jobs currently queued or running."""
+        return self._active
+
+    @property
+    def saturated(self):
+        return self._active >= self.capacity
+
+    async def run(self, owner, fn, *args):
+        """Run ``fn(job, *args)`` on the pool and await its result.
+
+        Raises ExecutorSaturated when full and JobCancelled if ``owner`` is
+        cancelled before the job finishes.
+        """
+        job = Job()
+        with self._lock:
+            if self._active >= self.capacity:
+                raise ExecutorSaturated(f"{self._active} inference jobs in progress")
+            self._active += 1
+            future = self._pool.submit(self._call, job, fn, args)
+            self._jobs.setdefault(owner, {})[future] = job
+        # Outside the lock: runs immediately (and takes the lock) if already done.
+        future.add_done_callback(lambda f: self._release(owner, f))
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            task = asyncio.current_task()
+            if future.cancelled() and not (task and task.cancelling()):
+                # cancel_owner() dropped the job before it started.
+                raise JobCancelled() from None
+            # The awaiting task itself was cancelled (e.g. socket closed): stop the job too.
+            future.cancel()
+            job.cancel()
+            raise
+
+    def cancel_owner(self, owner):
+        """Cancel every queued or in-flight job belonging to ``owner``."""
+        with self._lock:
+            jobs = self._jobs.pop(owner, {})
+        for future, job in jobs.items():
+            future.cancel()
+            job.cancel()
+        if jobs:
+            logger.info("[InferenceExecutor] cancelled %d job(s) for a closed socket", len(jobs))
+
+    @staticmethod
+    def _call(job, fn, args):
+        job.check()
+        return fn(job, *args)
+
+    def _release(self, owner, future):
+        with self._lock:
+            self._active -= 1
+            jobs = self._jobs.get(owner)
+            if jobs is not None:
+                jobs.pop(future, None)
+                if not jobs:
+                    del self._jobs[owner]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide executor for websocket inference, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from django.conf import settings
+            _executor = InferenceExecutor(
+                max_workers=settings.LIVE_EXECUTOR_WORKERS,
+                max_pending=settings.LIVE_EXECUTOR_QUEUE,
+                name="live-transcribe",
+            )
+    return _executor
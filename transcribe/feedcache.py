@@ -0,0 +1,208 @@
+"""HTTP cache for RSS feeds.
+
+``FeedCache`` sits between the news retrieval code and the network:
+
+* one pooled ``requests.Session`` (keep-alive, ``NEWS_FETCH_WORKERS``
+  connections per host) and an explicit timeout on every call; no global
+  socket state is touched;
+* an in-memory LRU of parsed feeds keyed by the normalized URL, fresh for
+  ``FEED_CACHE_TTL_S``; a feed with no entries is never fresh, so retry
+  rounds for an empty query still reach the network;
+* stale entries are revalidated with ``If-None-Match`` / ``If-Modified-Since``;
+  a ``304`` refreshes the entry without downloading the body again;
+* an optional on-disk tier (``FEED_CACHE_DIR``) so a restart does not start
+  cold, and a stale copy is served if revalidation fails.
+
+``stats()`` reports hits, misses, revalidations and bytes saved.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+def normalize_url(url):
+    """Cache key for ``url``: lower-case scheme/host, sorted query, collapsed whitespace, no fragment."""
+    parts = urlsplit(url.strip())
+    query = sorted((key, ' '.join(value.split())) for key, value in parse_qsl(parts.query, keep_blank_values=True))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', urlencode(query), ''))
+
+
+class _Entry:
+    __slots__ = ('body', 'etag', 'last_modified', 'fetched_at', '_feed')
+
+    def __init__(self, body, etag=None, last_modified=None, fetched_at=None):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        self._feed = None
+
+    @property
+    def feed(self):
+        if self._feed is None:
+            self._feed = feedparser.parse(self.body)
+        return self._feed
+
+
+class FeedCache:
+    def __init__(self, max_entries=256, ttl=300.0, disk_dir=None, pool_size=8):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self.disk_dir = disk_dir or None
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = USER_AGENT
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0, 'disk_hits': 0, 'misses': 0, 'revalidated': 0, 'stale_served': 0,
+            'bytes_fetched': 0, 'bytes_saved': 0,
+        }
+
+    def fetch(self, url, timeout):
+        """Return the parsed feed for ``url``, from cache when fresh.
+
+        Raises the underlying ``requests`` exception only when there is no
+        cached copy to fall back on.
+        """
+        key = normalize_url(url)
+        entry = self._lookup(key)
+        if entry is not None and entry.feed.entries and time.time() - entry.fetched_at < self.ttl:
+            self._count('hits', bytes_saved=len(entry.body))
+            return entry.feed
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        try:
+            response = self.session.get(url, headers=headers, timeout=timeout)
+            if response.status_code == 304 and entry is not None:
+                entry.fetched_at = time.time()
+                self._store(key, entry)
+                self._count('revalidated', bytes_saved=len(entry.body))
+                return entry.feed
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if entry is None:
+                raise
+            logger.warning("[FeedCache] revalidation of %s failed (%s); serving stale copy", key, e)
+            self._count('stale_served', bytes_saved=len(entry.body))
+            return entry.feed
+
+        entry = _Entry(response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        self._store(key, entry)
+        self._count('misses', bytes_fetched=len(entry.body))
+        return entry.feed
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['entries'] = len(self._entries)
+        lookups = snapshot['hits'] + snapshot['revalidated'] + snapshot['misses'] + snapshot['stale_served']
+        snapshot['hit_rate'] = (snapshot['hits'] + snapshot['revalidated']) / lookups if lookups else 0.0
+        return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _count(self, outcome, bytes_fetched=0, bytes_saved=0):
+        with self._lock:
+            self._stats[outcome] += 1
+            self._stats['bytes_fetched'] += bytes_fetched
+            self._stats['bytes_saved'] += bytes_saved
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        entry = self._read_disk(key)
+        if entry is not None:
+            with self._lock:
+                self._stats['disk_hits'] += 1
+                self._remember(key, entry)
+        return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, hashlib.sha256(key.encode()).hexdigest())
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path + '.json') as f:
+                meta = json.load(f)
+            with open(path + '.xml', 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return _Entry(body, meta.get('etag'), meta.get('last_modified'), meta.get('fetched_at', 0))
+
+    def _write_disk(self, key, entry):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        meta = {'url': key, 'etag': entry.etag, 'last_modified': entry.last_modified, 'fetched_at': entry.fetched_at}
+        try:
+            # Body first, metadata last: a reader never sees metadata without its body.
+            for suffix, data in (('.xml', entry.body), ('.json', json.dumps(meta).encode())):
+                fd, tmp = tempfile.mkstemp(dir=self.disk_dir)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, path + suffix)
+        except OSError as e:
+            logger.warning("[FeedCache] could not write %s to disk: %s", key, e)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_feed_cache():
+    """Process-wide feed cache configured from settings."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FeedCache(
+                max_entries=settings.FEED_CACHE_SIZE,
+                ttl=settings.FEED_CACHE_TTL_S,
+                disk_dir=settings.FEED_CACHE_DIR,
+                pool_size=settings.NEWS_FETCH_WORKERS,
+            )
+    return _cache
@@ -0,0 +1,158 @@
+"""Inference backends for the BERT Fact/News classifier.
+
+Every backend loads the Rust-backed fast tokenizer that ships in the model
+directory and exposes ``predict(texts)``, returning one
+``{'label', 'logits'}`` dict per input. Backends:
+
+- ``eager``: plain FP32 PyTorch.
+- ``quantized``: dynamic int8 quantization of the Linear layers.
+- ``traced``: TorchScript graphs traced per fixed sequence-length bucket.
+"""
+import bisect
+import logging
+import threading
+
+import torch
+from transformers import BertForSequenceClassification, BertTokenizerFast
+
+from .metrics import stage
+
+logger = logging.getLogger(__name__)
+
+LABELS = ("Fact", "News")
+DEFAULT_BUCKETS = (16, 32, 64, 128, 256, 512)
+
+
+def load_tokenizer(model_dir):
+    """Load the fast tokenizer from the model directory (no hub access)."""
+    return BertTokenizerFast.from_pretrained(model_dir, local_files_only=True)
+
+
+def _to_results(logits):
+    predictions = torch.argmax(logits, dim=-1).tolist()
+    return [
+        {'label': LABELS[p], 'logits': row}
+        for p, row in zip(predictions, logits.tolist())
+    ]
+
+
+class EagerBackend:
+    """FP32 PyTorch, padded to the longest claim in each batch."""
+
+    name = "eager"
+
+    def __init__(self, model_dir, tokenizer=None):
+        self.model_dir = str(model_dir)
+        self.tokenizer = tokenizer or load_tokenizer(self.model_dir)
+        self.model = self._load_model()
+        self.model.eval()
+
+    def _load_model(self):
+        return BertForSequenceClassification.from_pretrained(self.model_dir, local_files_only=True)
+
+    def _encode(self, texts):
+        return self.tokenizer(list(texts), return_tensors="pt", padding=True, truncation=True)
+
+    def _forward(self, inputs):
+        return self.model(**inputs).logits
+
+    def predict(self, texts):
+        with stage('tokenize'):
+            inputs = self._encode(texts)
+        with stage('bert_forward'), torch.inference_mode():
+            logits = self._forward(inputs)
+        return _to_results(logits)
+
+    def warmup(self):
+        """Run one throwaway prediction so the first real request is not the slow one."""
+        self.predict(["warmup"])
+
+
+class QuantizedBackend(EagerBackend):
+    """Dynamic int8 quantization of every ``nn.Linear`` (weights int8, activations FP32)."""
+
+    name = "quantized"
+
+    def _load_model(self):
+        model = super()._load_model()
+        model.eval()
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class TracedBackend(EagerBackend):
+    """TorchScript graphs, one per fixed sequence-length bucket.
+
+    Each batch is padded up to the smallest bucket that fits its longest
+    claim, so only a handful of shapes ever reach the graph. Graphs are
+    traced and frozen lazily the first time a bucket is used.
+    """
+
+    name = "traced"
+
+    def __init__(self, model_dir, tokenizer=None, buckets=DEFAULT_BUCKETS):
+        self.buckets = sorted(int(b) for b in buckets)
+        self._graphs = {}
+        self._lock = threading.Lock()
+        super().__init__(model_dir, tokenizer=tokenizer)
+
+    def _load_model(self):
+        return BertForSequenceClassification.from_pretrained(
+            self.model_dir, local_files_only=True, torchscript=True
+        )
+
+    def _bucket_for(self, length):
+        index = bisect.bisect_left(self.buckets, length)
+        return self.buckets[min(index, len(self.buckets) - 1)]
+
+    def _encode(self, texts):
+        texts = list(texts)
+        lengths = self.tokenizer(texts, truncation=True, max_length=self.buckets[-1])['input_ids']
+        bucket = self._bucket_for(max(len(ids) for ids in lengths))
+        return self.tokenizer(
+            texts, return_tensors="pt", padding="max_length", truncation=True, max_length=bucket
+        )
+
+    def _graph(self, inputs):
+        bucket = inputs['input_ids'].shape[1]
+        graph = self._graphs.get(bucket)
+        if graph is None:
+            with self._lock:
+                graph = self._graphs.get(bucket)
+                if graph is None:
+                    logger.info("[TracedBackend] tracing bucket seq_len=%d", bucket)
+                    example = (inputs['input_ids'], inputs['attention_mask'], inputs['token_type_ids'])
+                    graph = torch.jit.freeze(torch.jit.trace(self.model, example))
+                    self._graphs[bucket] = graph
+        return graph
+
+    def _forward(self, inputs):
+        graph = self._graph(inputs)
+        return graph(inputs['input_ids'], inputs['attention_mask'], inputs['token_type_ids'])[0]
+
+    def warmup(self):
+        """Trace every bucket up front instead of on first use."""
+        for bucket in self.buckets:
+            inputs = self.tokenizer(
+                ["warmup"], return_tensors="pt", padding="max_length", truncation=True, max_length=bucket
+            )
+            with torch.inference_mode():
+                self._forward(inputs)
+
+
+BACKENDS = {
+    'eager': EagerBackend,
+    'quantized': QuantizedBackend,
+    'traced': TracedBackend,
+}
+
+
+def load_backend(name, model_dir, buckets=DEFAULT_BUCKETS, tokenizer=None):
+    """Instantiate the named backend for the model in ``model_dir``."""
+    try:
+        backend_cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown classifier backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    logger.info("[inference] loading %s backend from %s", name, model_dir)
+    if backend_cls is TracedBackend:
+        return backend_cls(model_dir, tokenizer=tokenizer, buckets=buckets)
+    return backend_cls(model_dir, tokenizer=tokenizer)
@@ -0,0 +1,349 @@
+"""Background transcription jobs for /detect/ uploads.
+
+Converting and transcribing a long video used to happen inside the request,
+holding a gunicorn worker for minutes and running into its 120 s timeout.
+Now the upload goes into the content-addressed store (``uploads.py``), an
+``AudioJob`` row is queued in the database and the client gets the job id
+back at once. It can poll ``/jobs/<id>/`` or subscribe on ``ws/jobs/<id>/``.
+Content transcribed before is answered from the transcript cache: such a job
+is created already done.
+
+Workers are threads (``JOBS_WORKERS`` per process, started on first use, or
+a dedicated ``manage.py run_jobs``) that claim queued rows with a
+compare-and-set update, so any number of processes can share one SQLite
+queue. At most ``JOBS_MAX_RUNNING`` jobs run at a time across all of them.
+A running job holds a lease that its worker renews every ``JOBS_LEASE_S``/3
+through every stage (decode, language detection, transcription), each run off
+the worker thread. If the worker dies, the job is requeued once the lease
+runs out. Decoding and language detection are bounded by
+``JOBS_STAGE_TIMEOUT_S``.
+Failed attempts are retried with exponential backoff up to
+``JOBS_MAX_ATTEMPTS``; undecodable input fails at once. Finished jobs are
+deleted after ``JOBS_RETENTION_S``; the uploads themselves belong to the
+store and are collected under its quota.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .audio import SAMPLE_RATE, AudioDecodeError, decode_file, detect_language, log_mel, transcribe_mel
+from .executor import JobCancelled
+from .metrics import record, stage
+from .models import AudioJob
+from .uploads import cached_transcript, get_upload_store, store_transcript
+from .whisper_service import get_whisper_service
+
+logger = logging.getLogger(__name__)
+
+# Progress is reported per stage; transcription fills the range between these.
+TRANSCRIBE_START, TRANSCRIBE_END = 0.3, 0.95
+
+
+class LeaseLost(JobCancelled):
+    """The job was requeued or deleted while this worker still held it."""
+
+
+def enqueue(uploaded_file):
+    """Store ``uploaded_file`` and queue it; returns the ``AudioJob``.
+
+    If the same content was transcribed before, the job is returned already done.
+    """
+    store = get_upload_store()
+    digest, path = store.put(uploaded_file)
+    fields = {'file_path': path, 'file_name': (uploaded_file.name or '')[:255], 'content_hash': digest,
+              'max_attempts': settings.JOBS_MAX_ATTEMPTS}
+    try:
+        cached = cached_transcript(digest)
+        if cached is not None:
+            language, text = cached
+            logger.info("[jobs] %s already transcribed; answering from the transcript cache", digest[:12])
+            return AudioJob.objects.create(status=AudioJob.DONE, progress=1.0, language=language,
+                                           transcription=text, finished_at=timezone.now(), **fields)
+        job = AudioJob.objects.create(**fields)
+    finally:
+        store.release(digest)  # from here on the queued job's row pins the object
+    ensure_workers()
+    return job
+
+
+def cancel(job_id):
+    """Cancel a job: queued ones at once, running ones at their next progress report.
+
+    Returns the updated job, or None if it does not exist.
+    """
+    now = timezone.now()
+    if AudioJob.objects.filter(pk=job_id, status=AudioJob.QUEUED).update(
+            status=AudioJob.CANCELLED, stage='', finished_at=now, updated_at=now):
+        return AudioJob.objects.filter(pk=job_id).first()
+    AudioJob.objects.filter(pk=job_id, status=AudioJob.RUNNING).update(cancel_requested=True, updated_at=now)
+    return AudioJob.objects.filter(pk=job_id).first()
+
+
+def claim(worker_id):
+    """Atomically move the oldest due job to running for ``worker_id``, or return None.
+
+    The running-count check and the claim happen in one transaction; SQLite
+    lets only one writer commit, and a competing worker that loses the race
+    gets "database is locked" and simply tries again on its next poll.
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            if AudioJob.objects.filter(status=AudioJob.RUNNING).count() >= settings.JOBS_MAX_RUNNING:
+                return None
+            pk = (AudioJob.objects.filter(status=AudioJob.QUEUED, available_at__lte=now)
+                  .order_by('available_at', 'created_at').values_list('pk', flat=True).first())
+            if pk is None:
+                return None
+            claimed = AudioJob.objects.filter(pk=pk, status=AudioJob.QUEUED).update(
+                status=AudioJob.RUNNING, worker=worker_id, attempts=F('attempts') + 1,
+                stage='starting', progress=0.0, error='',
+                lease_expires=now + timedelta(seconds=settings.JOBS_LEASE_S), updated_at=now,
+            )
+    except OperationalError as e:
+        logger.debug("[jobs] claim contended: %s", e)
+        return None
+    return AudioJob.objects.get(pk=pk) if claimed else None
+
+
+def housekeeping():
+    """Requeue stuck jobs, delete old finished ones and collect the upload store."""
+    now = timezone.now()
+    for job in AudioJob.objects.filter(status=AudioJob.RUNNING, lease_expires__lt=now):
+        _retry_or_fail(job, job.worker, "worker stopped responding")
+    cutoff = now - timedelta(seconds=settings.JOBS_RETENTION_S)
+    deleted, _ = AudioJob.objects.filter(status__in=AudioJob.FINISHED, finished_at__lt=cutoff).delete()
+    if deleted:
+        logger.info("[jobs] deleted %d finished jobs older than %ss", deleted, settings.JOBS_RETENTION_S)
+    get_upload_store().collect()
+
+
+class Progress:
+    """Reports stage/progress for a running job and renews its lease.
+
+    Calling it raises ``JobCancelled`` once a cancel was requested and
+    ``LeaseLost`` if the job no longer belongs to this worker.
+    """
+
+    def __init__(self, job, worker_id):
+        self.job = job
+        self.worker_id = worker_id
+
+    def __call__(self, stage, progress):
+        now = timezone.now()
+        updated = AudioJob.objects.filter(
+            pk=self.job.pk, status=AudioJob.RUNNING, worker=self.worker_id, cancel_requested=False,
+        ).update(stage=stage, progress=progress, updated_at=now,
+                 lease_expires=now + timedelta(seconds=settings.JOBS_LEASE_S))
+        if not updated:
+            if AudioJob.objects.filter(pk=self.job.pk, worker=self.worker_id, cancel_requested=True).exists():
+                raise JobCancelled()
+            raise LeaseLost()
+
+
+class _Speed:
+    """Running estimate of Whisper seconds per second of audio, for progress."""
+
+    def __init__(self, initial):
+        self.factor = initial
+        self._lock = threading.Lock()
+
+    def fraction(self, elapsed, duration):
+        expected = max(1.0, duration * self.factor)
+        return min(0.95, elapsed / expected)
+
+    def observe(self, elapsed, duration):
+        if duration > 0:
+            with self._lock:
+                self.factor = 0.8 * self.factor + 0.2 * (elapsed / duration)
+
+
+_speed = _Speed(0.5)
+
+_decode_pool = None
+_decode_pool_lock = threading.Lock()
+
+
+def _get_decode_pool():
+    global _decode_pool
+    with _decode_pool_lock:
+        if _decode_pool is None:
+            _decode_pool = ThreadPoolExecutor(max_workers=max(1, settings.JOBS_MAX_RUNNING),
+                                              thread_name_prefix="jobs-decode")
+    return _decode_pool
+
+
+def _await(future, progress, stage_name, fraction, timeout=None):
+    """Wait for ``future`` while renewing the lease every ``JOBS_LEASE_S``/3.
+
+    Each renewal reports ``fraction(elapsed)`` as progress. Raises
+    ``TimeoutError`` once ``timeout`` seconds have passed, and cancels the
+    future (which only helps while it is still queued) when the wait is abandoned.
+    """
+    started = time.monotonic()
+    while True:
+        wait = settings.JOBS_LEASE_S / 3
+        if timeout is not None:
+            left = timeout - (time.monotonic() - started)
+            if left <= 0:
+                future.cancel()
+                raise TimeoutError(f"{stage_name} took longer than {timeout:g}s")
+            wait = min(wait, left)
+        try:
+            return future.result(timeout=wait)
+        except FutureTimeout:
+            if future.done():
+                raise  # the job itself raised a TimeoutError
+        try:
+            progress(stage_name, fraction(time.monotonic() - started))
+        except JobCancelled:
+            future.cancel()
+            raise
+
+
+def transcribe_file(path, progress):
+    """Decode ``path`` and transcribe it with Whisper; returns ``(language, text)``."""
+    timeout = settings.JOBS_STAGE_TIMEOUT_S
+    progress('decoding', 0.05)
+    with stage('decode'):
+        future = _get_decode_pool().submit(decode_file, path, timeout=timeout)
+        samples = _await(future, progress, 'decoding', lambda elapsed: 0.05, timeout=timeout + 5)
+    duration = len(samples) / SAMPLE_RATE
+    service = get_whisper_service()
+    if service is None:
+        raise RuntimeError("Whisper model is unavailable on this platform.")
+    with stage('log_mel'):
+        mel = log_mel(samples, service.n_mels)
+    progress('detecting_language', 0.2)
+    with stage('language'):
+        # Bounded: it may queue behind other Whisper work.
+        language = _await(service.submit(detect_language, mel), progress, 'detecting_language',
+                          lambda elapsed: 0.2, timeout=timeout)
+    progress('transcribing', TRANSCRIBE_START)
+    future = service.submit(transcribe_mel, samples, mel, language=None if language == 'unknown' else language)
+    started = time.monotonic()
+    result = _await(future, progress, 'transcribing', lambda elapsed: (
+        TRANSCRIBE_START + (TRANSCRIBE_END - TRANSCRIBE_START) * _speed.fraction(elapsed, duration)))
+    elapsed = time.monotonic() - started
+    record('whisper', elapsed)
+    _speed.observe(elapsed, duration)
+    return language, result.get('text', '').strip()
+
+
+def run(job, worker_id):
+    """Process one claimed job to a final (or requeued) state."""
+    logger.info("[jobs] %s: attempt %d/%d of %s", job.pk, job.attempts, job.max_attempts, job.file_name)
+    # An identical upload queued earlier may have finished while this one waited.
+    cached = cached_transcript(job.content_hash) if job.content_hash else None
+    if cached is not None:
+        _finish(job, worker_id, AudioJob.DONE, language=cached[0], transcription=cached[1])
+        return
+    try:
+        language, text = transcribe_file(job.file_path, Progress(job, worker_id))
+    except LeaseLost:
+        logger.warning("[jobs] %s: lease lost, leaving the job to its new owner", job.pk)
+    except JobCancelled:
+        _finish(job, worker_id, AudioJob.CANCELLED)
+    except AudioDecodeError as e:
+        # The input itself is bad; another attempt would fail the same way.
+        _finish(job, worker_id, AudioJob.FAILED, error=f"Conversion failed: {e}")
+    except Exception as e:
+        logger.exception("[jobs] %s: attempt %d failed", job.pk, job.attempts)
+        _retry_or_fail(job, worker_id, f"Transcription failed: {e}")
+    else:
+        if job.content_hash:
+            store_transcript(job.content_hash, language, text)
+        _finish(job, worker_id, AudioJob.DONE, language=language, transcription=text)
+
+
+def _finish(job, worker_id, status, **fields):
+    now = timezone.now()
+    updated = AudioJob.objects.filter(pk=job.pk, status=AudioJob.RUNNING, worker=worker_id).update(
+        status=status, stage='', progress=1.0 if status == AudioJob.DONE else F('progress'),
+        finished_at=now, updated_at=now, lease_expires=None, **fields,
+    )
+    if updated:
+        logger.info("[jobs] %s: %s", job.pk, status)
+
+
+def _retry_or_fail(job, worker_id, error):
+    now = timezone.now()
+    if job.attempts >= job.max_attempts:
+        _finish(job, worker_id, AudioJob.FAILED, error=error)
+        return
+    delay = settings.JOBS_RETRY_BACKOFF_S * 2 ** (job.attempts - 1)
+    AudioJob.objects.filter(pk=job.pk, status=AudioJob.RUNNING, worker=worker_id).update(
+        status=AudioJob.QUEUED, stage='retrying', error=error, worker='', lease_expires=None,
+        available_at=now + timedelta(seconds=delay), updated_at=now,
+    )
+    logger.info("[jobs] %s: retrying in %.0fs (%s)", job.pk, delay, error)
+
+
+class JobWorkerPool:
+    """``workers`` threads claiming and running jobs until ``stop()``."""
+
+    def __init__(self, workers, poll_interval=1.0, name='jobs'):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.name = name
+        self._stop = threading.Event()
+        self._threads = []
+        self._housekeeping_lock = threading.Lock()
+        self._next_housekeeping = 0.0
+
+    def start(self):
+        for index in range(self.workers):
+            worker_id = f"{os.getpid()}-{self.name}-{index}"
+            thread = threading.Thread(target=self._loop, args=(worker_id,), name=worker_id, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _loop(self, worker_id):
+        while not self._stop.is_set():
+            try:
+                self._maybe_housekeep()
+                job = claim(worker_id)
+                if job is not None:
+                    run(job, worker_id)
+                    continue
+            except Exception as e:
+                logger.exception("[jobs] worker %s: %s", worker_id, e)
+            finally:
+                close_old_connections()
+            self._stop.wait(self.poll_interval)
+
+    def _maybe_housekeep(self):
+        with self._housekeeping_lock:
+            if time.monotonic() < self._next_housekeeping:
+                return
+            self._next_housekeeping = time.monotonic() + settings.JOBS_CLEANUP_INTERVAL_S
+        housekeeping()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def ensure_workers():
+    """Start this process's ``JOBS_WORKERS`` threads if they are not running yet."""
+    global _pool
+    if settings.JOBS_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = JobWorkerPool(settings.JOBS_WORKERS, settings.JOBS_POLL_S).start()
+    return _pool
@@ -0,0 +1,243 @@
+"""Process-wide Groq client with timeouts, hedging and a circuit breaker.
+
+One ``Groq`` SDK client (and its keep-alive ``httpx`` connection pool) is
+shared by every request instead of being built per claim. Around it:
+
+* every call has a timeout (``GROQ_TIMEOUT_S`` unless the caller passes a
+  tighter one);
+* with ``GROQ_HEDGE`` on, a second identical request is sent when the first
+  has been running longer than the observed p95 latency, and whichever
+  answers first wins;
+* after ``GROQ_BREAKER_FAILURES`` consecutive failures (errors, or timeouts
+  of the full ``GROQ_TIMEOUT_S``; not a caller's shorter budget) the breaker opens and
+  calls fail fast with ``LLMUnavailable`` for ``GROQ_BREAKER_COOLDOWN_S``;
+  then a single trial call decides whether it closes again;
+* latencies are kept in per-outcome histograms (``stats()``).
+
+``GROQ_BASE_URL`` points the SDK elsewhere, e.g. at ``manage.py stub_llm``.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+OUTCOMES = ('ok', 'hedged_ok', 'timeout', 'error', 'rejected')
+
+
+class LLMUnavailable(RuntimeError):
+    """The circuit breaker is open; the upstream is considered unhealthy."""
+
+
+class LLMTimeout(TimeoutError):
+    """No answer (primary or hedge) within the call's timeout."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one trial) -> closed."""
+
+    def __init__(self, failures=5, cooldown=30.0):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._consecutive = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'half-open' if time.monotonic() - self._opened_at >= self.cooldown else 'open'
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial:
+                return False
+            self._trial = True  # half-open: exactly one call goes through
+            return True
+
+    def record(self, success):
+        """Record a call's outcome; ``None`` means inconclusive (only ends a half-open trial)."""
+        with self._lock:
+            if success is None:
+                pass
+            elif success:
+                self._consecutive = 0
+                self._opened_at = None
+            else:
+                self._consecutive += 1
+                if self._trial or self._consecutive >= self.failures:
+                    if self._opened_at is None or self._trial:
+                        logger.warning("[LLMClient] circuit opened after %d failures", self._consecutive)
+                    self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def snapshot(self):
+        labels = [f"le_{b:g}" for b in self.buckets] + ['le_inf']
+        cumulative, running = {}, 0
+        for label, count in zip(labels, self.counts):
+            running += count
+            cumulative[label] = running
+        return {'count': self.count, 'sum_s': round(self.total, 4), 'buckets': cumulative}
+
+
+def _groq_client():
+    from groq import Groq
+    import httpx
+    limits = httpx.Limits(max_connections=settings.GROQ_MAX_CONNECTIONS,
+                          max_keepalive_connections=settings.GROQ_MAX_CONNECTIONS)
+    return Groq(
+        api_key=os.getenv('GROQ_API_KEY'),
+        base_url=settings.GROQ_BASE_URL or None,
+        timeout=settings.GROQ_TIMEOUT_S,
+        max_retries=settings.GROQ_MAX_RETRIES,
+        http_client=httpx.Client(limits=limits, timeout=settings.GROQ_TIMEOUT_S),
+    )
+
+
+class LLMClient:
+    def __init__(self, client, timeout=30.0, hedge=False, hedge_min_s=0.5, hedge_min_samples=20,
+                 breaker=None, max_workers=16):
+        self.client = client
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_min_s = hedge_min_s
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=500)
+        self._histograms = {outcome: LatencyHistogram() for outcome in OUTCOMES}
+        self._hedges = 0
+
+    def hedge_delay(self):
+        """Current p95 of successful calls, or None while there are too few samples."""
+        with self._lock:
+            if len(self._recent) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._recent)
+        return max(self.hedge_min_s, ordered[int(0.95 * (len(ordered) - 1))])
+
+    def _create(self, timeout, kwargs):
+        response = self.client.chat.completions.create(timeout=timeout, **kwargs)
+        return response.choices[0].message.content
+
+    def chat(self, messages, model, temperature=0.2, timeout=None):
+        """Return the assistant message content for ``messages``.
+
+        Raises ``LLMUnavailable`` when the breaker is open, ``LLMTimeout`` when
+        nothing answered in time, or the SDK's own error.
+        """
+        if not self.breaker.allow():
+            self._observe('rejected', 0.0)
+            raise LLMUnavailable("Groq circuit breaker is open")
+        timeout = min(timeout or self.timeout, self.timeout)
+        kwargs = {'model': model, 'messages': messages, 'temperature': temperature}
+        started = time.monotonic()
+        deadline = started + timeout
+        futures = [self._pool.submit(self._create, timeout, kwargs)]
+        delay = self.hedge_delay() if self.hedge else None
+        hedged = False
+        error = None
+        try:
+            if delay is not None and delay < timeout:
+                done, _ = wait(futures, timeout=delay)
+                if not done:
+                    hedged = True
+                    with self._lock:
+                        self._hedges += 1
+                    logger.info("[LLMClient] no answer after p95 %.2fs; sending hedge request", delay)
+                    futures.append(self._pool.submit(self._create, max(0.1, deadline - time.monotonic()), kwargs))
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    if future.exception() is None:
+                        content = future.result()
+                        elapsed = time.monotonic() - started
+                        self.breaker.record(True)
+                        self._observe('hedged_ok' if hedged else 'ok', elapsed, success=True)
+                        return content
+                    error = future.exception()
+        finally:
+            for future in futures:
+                future.cancel()
+
+        elapsed = time.monotonic() - started
+        timed_out = error is None or _is_timeout(error)
+        # A timeout under a budget the caller cut short says nothing about Groq's health;
+        # only running out of the full GROQ_TIMEOUT_S counts against the breaker.
+        self.breaker.record(None if timed_out and timeout < self.timeout else False)
+        if timed_out:
+            self._observe('timeout', elapsed)
+            raise LLMTimeout(f"Groq did not answer within {timeout:.1f}s") from error
+        self._observe('error', elapsed)
+        raise error
+
+    def _observe(self, outcome, seconds, success=False):
+        with self._lock:
+            self._histograms[outcome].observe(seconds)
+            if success:
+                self._recent.append(seconds)
+
+    def stats(self):
+        with self._lock:
+            histograms = {outcome: h.snapshot() for outcome, h in self._histograms.items()}
+            hedges = self._hedges
+        return {
+            'circuit': self.breaker.state,
+            'hedges_sent': hedges,
+            'hedge_delay_s': self.hedge_delay(),
+            'latency': histograms,
+        }
+
+
+def _is_timeout(error):
+    return isinstance(error, TimeoutError) or 'timeout' in type(error).__name__.lower()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Process-wide LLM client configured from settings (built on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient(
+                _groq_client(),
+                timeout=settings.GROQ_TIMEOUT_S,
+                hedge=settings.GROQ_HEDGE,
+                hedge_min_s=settings.GROQ_HEDGE_MIN_S,
+                breaker=CircuitBreaker(settings.GROQ_BREAKER_FAILURES, settings.GROQ_BREAKER_COOLDOWN_S),
+                max_workers=2 * settings.GROQ_MAX_CONNECTIONS,
+            )
+    return _client
@@ -0,0 +1,236 @@
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from transcribe.management.commands.compare_backends import _percentile, load_claims
+from transcribe.registry import memory_usage_mb
+from transcribe.stubs import llm_server, rss_server, wiki_server
+
+PATHS = {'fact': 'Fact', 'news': 'News'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Offline latency/throughput benchmark for classify_text. Groq, Google News RSS and "
+        "Wikipedia are replaced by local stand-ins with configurable latency; the Fact and "
+        "News paths are driven at fixed concurrency levels and p50/p95/p99 latency, "
+        "requests/sec and peak RSS are written to a JSON file for comparison between runs."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data', default=str(settings.BASE_DIR / 'data.csv'))
+        parser.add_argument('--limit', type=int, default=None, help="Only draw requests from the first N claims.")
+        parser.add_argument('--paths', default='fact,news', help="Comma-separated: fact, news.")
+        parser.add_argument('--concurrency', default='1,4,16',
+                            help="Comma-separated numbers of requests kept in flight.")
+        parser.add_argument('--requests', type=int, default=100, help="Requests per path and concurrency level.")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests before each path.")
+        parser.add_argument('--llm-latency', type=float, default=0.4, help="Seconds added to every Groq answer.")
+        parser.add_argument('--rss-latency', type=float, default=0.2, help="Seconds added to every RSS answer.")
+        parser.add_argument('--wiki-latency', type=float, default=0.1,
+                            help="Seconds added to every Wikipedia answer.")
+        parser.add_argument('--jitter', type=float, default=0.0, help="+/- seconds of random stub latency.")
+        parser.add_argument('--fail-rate', type=float, default=0.0,
+                            help="Fraction of stub requests answered with 503.")
+        parser.add_argument('--no-bert', action='store_true',
+                            help="Skip the BERT forward pass (the path is forced either way).")
+        parser.add_argument('--verdict-cache', action='store_true',
+                            help="Leave the semantic verdict cache on (off by default, it hides the pipeline).")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', default='bench_classify.json', help="Where to write the JSON results.")
+        parser.add_argument('--baseline', help="Earlier --output file to print the change against.")
+
+    def handle(self, *args, **options):
+        paths = [p.strip() for p in options['paths'].split(',') if p.strip()]
+        unknown = [p for p in paths if p not in PATHS]
+        if unknown:
+            raise CommandError(f"Unknown path(s): {', '.join(unknown)}")
+        try:
+            levels = [max(1, int(c)) for c in options['concurrency'].split(',') if c.strip()]
+        except ValueError:
+            raise CommandError("--concurrency takes comma-separated integers")
+        claims = [text for text, _ in load_claims(options['data'], options['limit'])]
+        if not claims:
+            raise CommandError(f"No claims found in {options['data']}")
+        baseline = self._load_baseline(options['baseline']) if options['baseline'] else None
+
+        random.seed(options['seed'])
+        stubs = self._start_stubs(options)
+        workdir = tempfile.mkdtemp(prefix='bench-classify-')
+        try:
+            with self._stub_settings(stubs, workdir, options):
+                from transcribe import views
+                use_bert = not options['no_bert']
+                if use_bert:
+                    views._get_bert_batcher().predict(claims[0])  # load the classifier outside the timings
+
+                rows = []
+                for path in paths:
+                    label = PATHS[path]
+                    for text in claims[-options['warmup']:] if options['warmup'] else []:
+                        self._request(views, text, label, use_bert)
+                    # Each level gets claims the feed and Wikipedia caches have not seen yet
+                    # (until the data runs out), so levels are not measured against warm caches.
+                    offset = 0
+                    for concurrency in levels:
+                        texts = [claims[(offset + i) % len(claims)] for i in range(options['requests'])]
+                        offset += options['requests']
+                        row = self._run_level(views, texts, label, use_bert, concurrency, stubs)
+                        row.update(path=path, concurrency=concurrency)
+                        rows.append(row)
+                        self.stdout.write(self._format(row, baseline))
+        finally:
+            for server in stubs.values():
+                server.shutdown()
+                server.server_close()
+
+        report = {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'config': {key: options[key] for key in (
+                'limit', 'requests', 'warmup', 'llm_latency', 'rss_latency', 'wiki_latency', 'jitter',
+                'fail_rate', 'no_bert', 'verdict_cache', 'seed')},
+            'deadline_s': settings.REQUEST_DEADLINE_S,
+            'classifier_backend': settings.CLASSIFIER_BACKEND,
+            'results': rows,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Wrote {options['output']}")
+
+    def _start_stubs(self, options):
+        common = {'jitter': options['jitter'], 'fail_rate': options['fail_rate']}
+        return {
+            'llm': llm_server(latency=options['llm_latency'], **common).start(),
+            'rss': rss_server(latency=options['rss_latency'], **common).start(),
+            'wiki': wiki_server(latency=options['wiki_latency'], **common).start(),
+        }
+
+    @staticmethod
+    def _stub_settings(stubs, workdir, options):
+        # Every client below is built lazily from settings, so this is entered before any of them exist.
+        os.environ.setdefault('GROQ_API_KEY', 'bench')
+        return override_settings(
+            GROQ_BASE_URL=stubs['llm'].url,
+            NEWS_RSS_URL=stubs['rss'].url + '/rss/search?q={query}',
+            WIKI_API_URL=stubs['wiki'].url + '/w/api.php',
+            WIKI_CACHE_PATH=os.path.join(workdir, 'wiki_cache.sqlite3'),
+            FEED_CACHE_DIR='',
+            VERDICT_CACHE_ENABLED=options['verdict_cache'],
+        )
+
+    @staticmethod
+    def _request(views, text, label, use_bert):
+        """One classify_text request with its path forced to ``label``; returns ``(seconds, status, cut_short)``."""
+        from transcribe.deadline import Deadline
+        started = time.perf_counter()
+        deadline = Deadline.from_request()
+        if use_bert:
+            views._get_bert_batcher().predict(text, timeout=deadline.budget())
+        result, status = views.verify_claim(text, label=label, deadline=deadline)
+        return time.perf_counter() - started, status, bool(result.get('deadline', {}).get('cut_short'))
+
+    def _run_level(self, views, texts, label, use_bert, concurrency, stubs):
+        before = {name: server.requests for name, server in stubs.items()}
+        sampler = _RSSSampler().start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bench') as pool:
+            outcomes = list(pool.map(lambda text: self._request(views, text, label, use_bert), texts))
+        wall = time.perf_counter() - started
+        peak = sampler.stop()
+        latencies = [seconds for seconds, _, _ in outcomes]
+        requests = len(texts)
+        return {
+            'requests': requests,
+            'errors': sum(status != 200 for _, status, _ in outcomes),
+            'cut_short': sum(cut for _, _, cut in outcomes),
+            'wall_s': round(wall, 3),
+            'rps': round(requests / wall, 2),
+            'mean_ms': round(statistics.mean(latencies) * 1000, 1),
+            'p50_ms': round(_percentile(latencies, 50) * 1000, 1),
+            'p95_ms': round(_percentile(latencies, 95) * 1000, 1),
+            'p99_ms': round(_percentile(latencies, 99) * 1000, 1),
+            'peak_rss_mb': round(peak, 1) if peak is not None else None,
+            'stub_calls': {name: server.requests - before[name] for name, server in stubs.items()},
+        }
+
+    @staticmethod
+    def _load_baseline(path):
+        try:
+            with open(path) as f:
+                report = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read baseline {path}: {e}")
+        return {(row['path'], row['concurrency']): row for row in report.get('results', [])}
+
+    @staticmethod
+    def _format(row, baseline=None):
+        line = (
+            f"{row['path']:<5} c={row['concurrency']:<3} {row['rps']:>7.2f} req/s  p50 {row['p50_ms']:>8.1f} ms  "
+            f"p95 {row['p95_ms']:>8.1f} ms  p99 {row['p99_ms']:>8.1f} ms  errors {row['errors']}  "
+            f"cut {row['cut_short']}  peak RSS {row['peak_rss_mb']} MiB"
+        )
+        before = (baseline or {}).get((row['path'], row['concurrency']))
+        if before:
+            changes = [f"{key} {_change(before[key], row[key])}" for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms')]
+            line += "\n      vs baseline: " + ", ".join(changes)
+        return line
+
+
+class _RSSSampler:
+    """Polls this process's RSS in the background and remembers the highest value."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='rss-sampler', daemon=True)
+
+    def start(self):
+        self._sample()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return self.peak
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss = memory_usage_mb()['rss']
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+
+def _change(before, after):
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before:+.1%}"
+
+
+def _git_commit():
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
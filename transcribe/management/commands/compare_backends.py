@@ -0,0 +1,97 @@
+import csv
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def load_claims(path, limit=None):
+    """Read (text, label) pairs from a data.csv-style file."""
+    claims = []
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        for row in reader:
+            if len(row) < 2 or not row[0].strip():
+                continue
+            try:
+                label = int(row[-1].strip())
+            except ValueError:
+                continue
+            claims.append((row[0].strip(), label))
+            if limit and len(claims) >= limit:
+                break
+    return claims
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Equivalence harness for classifier backends: runs every backend over data.csv "
+        "and reports agreement with eager predictions and per-claim latency."
+    )
+    # System checks import the URLconf, which would load the serving models.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        # torch is imported here, not at module level: other commands reuse load_claims.
+        from transcribe.inference import BACKENDS
+        parser.add_argument('--data', default=str(settings.BASE_DIR / 'data.csv'))
+        parser.add_argument('--model-dir', default=settings.CLASSIFIER_MODEL_DIR)
+        parser.add_argument('--backends', default=','.join(BACKENDS),
+                            help="Comma-separated backends to compare (eager is always included).")
+        parser.add_argument('--batch-size', type=int, default=1,
+                            help="Claims per forward pass (1 measures single-request latency).")
+        parser.add_argument('--limit', type=int, default=None, help="Only use the first N claims.")
+
+    def handle(self, *args, **options):
+        from transcribe.inference import BACKENDS, LABELS, load_backend, load_tokenizer
+        names = [n.strip() for n in options['backends'].split(',') if n.strip()]
+        unknown = [n for n in names if n not in BACKENDS]
+        if unknown:
+            raise CommandError(f"Unknown backend(s): {', '.join(unknown)}")
+        if 'eager' in names:
+            names.remove('eager')
+        names.insert(0, 'eager')
+
+        claims = load_claims(options['data'], options['limit'])
+        if not claims:
+            raise CommandError(f"No claims found in {options['data']}")
+        texts = [text for text, _ in claims]
+        batch_size = max(1, options['batch_size'])
+        tokenizer = load_tokenizer(options['model_dir'])
+        self.stdout.write(f"{len(claims)} claims from {options['data']}, batch size {batch_size}")
+
+        reference = None
+        rows = []
+        for name in names:
+            backend = load_backend(name, options['model_dir'], buckets=settings.CLASSIFIER_SEQ_BUCKETS,
+                                   tokenizer=tokenizer)
+            backend.warmup()  # traced: compile every bucket before timing
+            labels, latencies = [], []
+            for start in range(0, len(texts), batch_size):
+                chunk = texts[start:start + batch_size]
+                began = time.perf_counter()
+                results = backend.predict(chunk)
+                per_claim = (time.perf_counter() - began) / len(chunk)
+                latencies.extend([per_claim] * len(chunk))
+                labels.extend(r['label'] for r in results)
+            if reference is None:
+                reference = labels
+            agree = sum(a == b for a, b in zip(labels, reference)) / len(labels)
+            accuracy = sum(LABELS[gold] == pred for (_, gold), pred in zip(claims, labels)) / len(labels)
+            rows.append((name, agree, accuracy, statistics.mean(latencies),
+                         _percentile(latencies, 50), _percentile(latencies, 95)))
+            del backend
+
+        self.stdout.write(f"{'backend':<10} {'agree':>8} {'accuracy':>9} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, agree, accuracy, mean, p50, p95 in rows:
+            self.stdout.write(
+                f"{name:<10} {agree:>8.2%} {accuracy:>9.2%} {mean * 1000:>9.2f} {p50 * 1000:>8.2f} {p95 * 1000:>8.2f}"
+            )
@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from transcribe.management.commands.compare_backends import _percentile, load_claims
+from transcribe.ner import NERService, doc_entities, load_pipeline
+
+
+class Command(BaseCommand):
+    help = (
+        "Per-claim NER latency before (full spaCy pipeline, one text at a time) and after "
+        "(NER-only pipeline, nlp.pipe batches, entity cache), and entity agreement between them."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data', default=str(settings.BASE_DIR / 'data.csv'))
+        parser.add_argument('--model', default=settings.SPACY_MODEL)
+        parser.add_argument('--batch-size', type=int, default=32, help="Texts per nlp.pipe call.")
+        parser.add_argument('--limit', type=int, default=500, help="Only use the first N claims.")
+
+    def handle(self, *args, **options):
+        claims = load_claims(options['data'], options['limit'])
+        if not claims:
+            raise CommandError(f"No claims found in {options['data']}")
+        texts = [text for text, _ in claims]
+        batch_size = max(1, options['batch_size'])
+
+        full = load_pipeline(options['model'], trimmed=False)
+        trimmed = load_pipeline(options['model'], trimmed=True)
+        self.stdout.write(f"{len(texts)} claims; full pipeline: {full.pipe_names}; NER only: {trimmed.pipe_names}")
+
+        rows = []
+        reference, latencies = self._one_by_one(full, texts)
+        rows.append(('full, one at a time', latencies, 1.0))
+        entities, latencies = self._one_by_one(trimmed, texts)
+        rows.append(('ner-only, one at a time', latencies, _agreement(entities, reference)))
+
+        entities, latencies = [], []
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            began = time.perf_counter()
+            entities.extend(doc_entities(doc) for doc in trimmed.pipe(chunk, batch_size=batch_size))
+            latencies.extend([(time.perf_counter() - began) / len(chunk)] * len(chunk))
+        rows.append((f'ner-only, nlp.pipe x{batch_size}', latencies, _agreement(entities, reference)))
+
+        service = NERService(trimmed, cache_size=len(texts), max_batch=batch_size)
+        service.extract_many(texts)  # fill the cache
+        entities, latencies = self._one_by_one(service, texts)
+        rows.append(('ner-only, cached', latencies, _agreement(entities, reference)))
+
+        self.stdout.write(f"{'mode':<26} {'agree':>7} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, latencies, agree in rows:
+            self.stdout.write(
+                f"{name:<26} {agree:>7.2%} {statistics.mean(latencies) * 1000:>9.3f} "
+                f"{_percentile(latencies, 50) * 1000:>8.3f} {_percentile(latencies, 95) * 1000:>8.3f}"
+            )
+
+    @staticmethod
+    def _one_by_one(nlp_or_service, texts):
+        entities, latencies = [], []
+        for text in texts:
+            began = time.perf_counter()
+            if isinstance(nlp_or_service, NERService):
+                entities.append(nlp_or_service.extract(text))
+            else:
+                entities.append(doc_entities(nlp_or_service(text)))
+            latencies.append(time.perf_counter() - began)
+        return entities, latencies
+
+
+def _agreement(entities, reference):
+    return sum(a == b for a, b in zip(entities, reference)) / len(reference)
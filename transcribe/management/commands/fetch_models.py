@@ -0,0 +1,51 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Download the Whisper checkpoints into WHISPER_DOWNLOAD_ROOT and the verdict-cache "
+        "embedding model into the Hugging Face cache. Run at build time: the model registry "
+        "never downloads anything while serving."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('sizes', nargs='*', default=[settings.WHISPER_MODEL_SIZE],
+                            help="Whisper model sizes to fetch (default: WHISPER_MODEL_SIZE).")
+        parser.add_argument('--skip-embedder', action='store_true',
+                            help="Do not fetch the VERDICT_CACHE_MODEL sentence embedder.")
+
+    def handle(self, *args, **options):
+        try:
+            import whisper
+        except ImportError as e:
+            raise CommandError(f"openai-whisper is not installed: {e}")
+        os.makedirs(settings.WHISPER_DOWNLOAD_ROOT, exist_ok=True)
+        for size in options['sizes']:
+            url = whisper._MODELS.get(size)
+            if url is None:
+                raise CommandError(f"Unknown Whisper model size '{size}'")
+            target = os.path.join(settings.WHISPER_DOWNLOAD_ROOT, os.path.basename(url))
+            if os.path.exists(target):
+                self.stdout.write(f"whisper-{size}: already present at {target}")
+                continue
+            self.stdout.write(f"whisper-{size}: downloading {url}")
+            # whisper's own downloader verifies the SHA256 embedded in the URL.
+            whisper._download(url, settings.WHISPER_DOWNLOAD_ROOT, in_memory=False)
+            self.stdout.write(self.style.SUCCESS(f"whisper-{size}: saved to {target}"))
+
+        if settings.VERDICT_CACHE_ENABLED and not options['skip_embedder']:
+            self.fetch_embedder(settings.VERDICT_CACHE_MODEL)
+
+    def fetch_embedder(self, name):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise CommandError(f"sentence-transformers is not installed: {e}")
+        self.stdout.write(f"embedder {name}: fetching")
+        SentenceTransformer(name, device='cpu')
+        location = os.environ.get('SENTENCE_TRANSFORMERS_HOME') or os.environ.get('HF_HOME') or "the default cache"
+        self.stdout.write(self.style.SUCCESS(f"embedder {name}: ready in {location}"))
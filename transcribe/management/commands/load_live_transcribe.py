@@ -0,0 +1,267 @@
+import asyncio
+import gc
+import json
+import math
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from transcribe.audio import SAMPLE_RATE, AudioDecodeError, decode_file
+from transcribe.management.commands.bench_classify import _RSSSampler
+from transcribe.management.commands.compare_backends import _percentile
+from transcribe.registry import memory_usage_mb
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test for ws/live-transcribe/: N concurrent in-process websocket clients each "
+        "stream webm/opus audio in real-time-paced chunks and send stop. Reports connect "
+        "latency, time from stop to the final transcript, event-loop lag and memory growth "
+        "per session. Google recognition and Whisper are local stand-ins unless --real-backends."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=10, help="Concurrent websocket sessions.")
+        parser.add_argument('--ramp-s', type=float, default=1.0, help="Spread the connects over this many seconds.")
+        parser.add_argument('--audio', help="webm/opus recording to stream (default: synthetic speech-like bursts).")
+        parser.add_argument('--duration', type=float, default=8.0, help="Length of the synthetic recording.")
+        parser.add_argument('--chunk-ms', type=int, default=250, help="MediaRecorder timeslice to pace chunks at.")
+        parser.add_argument('--buffered', action='store_true', help="Use ?streaming=0 (decode everything on stop).")
+        parser.add_argument('--google-latency', type=float, default=0.3)
+        parser.add_argument('--google-miss-rate', type=float, default=0.0,
+                            help="Share of utterances Google 'cannot understand', sent to Whisper instead.")
+        parser.add_argument('--whisper-rtf', type=float, default=0.3,
+                            help="Stub Whisper seconds per second of audio.")
+        parser.add_argument('--whisper-instances', type=int, default=settings.WHISPER_INSTANCES)
+        parser.add_argument('--real-backends', action='store_true',
+                            help="Use the real Google recognizer and Whisper model.")
+        parser.add_argument('--timeout', type=float, default=120.0, help="Seconds to wait for a final transcript.")
+        parser.add_argument('--output', default='load_live_transcribe.json')
+
+    def handle(self, *args, **options):
+        clients = max(1, options['clients'])
+        if options['audio']:
+            with open(options['audio'], 'rb') as f:
+                audio = f.read()
+            try:
+                duration = len(decode_file(options['audio'])) / SAMPLE_RATE
+            except AudioDecodeError as e:
+                raise CommandError(f"Cannot decode {options['audio']}: {e}")
+        else:
+            duration = options['duration']
+            audio = synthetic_webm(duration)
+        chunk_s = options['chunk_ms'] / 1000
+        per_chunk = max(1, math.ceil(len(audio) * chunk_s / max(duration, chunk_s)))
+        chunks = [audio[i:i + per_chunk] for i in range(0, len(audio), per_chunk)]
+        self.stdout.write(f"{clients} clients x {duration:.1f}s of audio in {len(chunks)} chunks of {per_chunk} bytes")
+
+        stand_ins = None if options['real_backends'] else self._install_stand_ins(options)
+        report = asyncio.run(self._run(clients, chunks, chunk_s, options))
+        report['config'] = {key: options[key] for key in (
+            'clients', 'ramp_s', 'audio', 'chunk_ms', 'buffered', 'google_latency', 'google_miss_rate',
+            'whisper_rtf', 'whisper_instances', 'real_backends', 'timeout')}
+        report['config'].update(duration_s=round(duration, 2), executor_workers=settings.LIVE_EXECUTOR_WORKERS,
+                                executor_queue=settings.LIVE_EXECUTOR_QUEUE)
+        if stand_ins is not None:
+            recognizer, models = stand_ins
+            report['backend_calls'] = {'google': recognizer.calls, 'whisper': sum(m.calls for m in models)}
+
+        summary = report['summary']
+        self.stdout.write(
+            f"completed {summary['completed']}/{clients}, failed {summary['failed']}, busy replies {summary['busy']}\n"
+            f"connect           p50 {summary['connect_ms']['p50']:>8.1f} ms  p95 {summary['connect_ms']['p95']:>8.1f} ms"
+            f"  max {summary['connect_ms']['max']:>8.1f} ms\n"
+            f"stop->transcript  p50 {summary['transcript_ms']['p50']:>8.1f} ms  p95 {summary['transcript_ms']['p95']:>8.1f}"
+            f" ms  max {summary['transcript_ms']['max']:>8.1f} ms\n"
+            f"event-loop lag    p50 {summary['loop_lag_ms']['p50']:>8.1f} ms  p99 {summary['loop_lag_ms']['p99']:>8.1f}"
+            f" ms  max {summary['loop_lag_ms']['max']:>8.1f} ms\n"
+            f"RSS {summary['rss_before_mb']} -> peak {summary['rss_peak_mb']} -> after {summary['rss_after_mb']} MiB; "
+            f"per session: {summary['rss_growth_per_session_mb']} MiB peak growth, "
+            f"{summary['rss_retained_per_session_mb']} MiB retained"
+        )
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"Wrote {options['output']}")
+
+    def _install_stand_ins(self, options):
+        """Swap Google recognition and Whisper for local stand-ins in the consumer module."""
+        from transcribe import consumers
+        from transcribe.stubs import StubRecognizer, StubWhisperModel
+        from transcribe.whisper_service import WhisperService
+
+        recognizer = StubRecognizer(latency=options['google_latency'], miss_rate=options['google_miss_rate'])
+        models = [StubWhisperModel(rtf=options['whisper_rtf']) for _ in range(max(1, options['whisper_instances']))]
+        service = WhisperService(models, queue_size=settings.WHISPER_QUEUE_SIZE)
+        consumers.recognizer = recognizer
+        consumers.get_whisper_service = lambda: service
+        return recognizer, models
+
+    async def _run(self, clients, chunks, chunk_s, options):
+        from channels.routing import URLRouter
+        from transcribe.routing import websocket_urlpatterns
+
+        application = URLRouter(websocket_urlpatterns)
+        query = 'streaming=0' if options['buffered'] else 'streaming=1'
+        gc.collect()
+        rss_before = memory_usage_mb()['rss']
+        sampler = _RSSSampler().start()
+        lag = _LoopLag()
+        lag_task = asyncio.create_task(lag.run())
+        started = time.perf_counter()
+        sessions = await asyncio.gather(*(
+            self._session(application, index, query, chunks, chunk_s,
+                          options['ramp_s'] * index / clients, options['timeout'])
+            for index in range(clients)
+        ))
+        wall = time.perf_counter() - started
+        lag.stop()
+        await lag_task
+        rss_peak = sampler.stop()
+        gc.collect()
+        await asyncio.sleep(0.5)  # let cancelled jobs and ffmpeg processes wind down
+        rss_after = memory_usage_mb()['rss']
+
+        done = [s for s in sessions if 'transcript_ms' in s]
+        summary = {
+            'completed': len(done),
+            'failed': len(sessions) - len(done),
+            'busy': sum(s.get('busy', 0) for s in sessions),
+            'wall_s': round(wall, 2),
+            'connect_ms': _spread([s['connect_ms'] for s in sessions if 'connect_ms' in s]),
+            'transcript_ms': _spread([s['transcript_ms'] for s in done]),
+            'first_partial_ms': _spread([s['first_partial_ms'] for s in sessions if 'first_partial_ms' in s]),
+            'loop_lag_ms': _spread([value * 1000 for value in lag.samples]),
+            'rss_before_mb': _round(rss_before),
+            'rss_peak_mb': _round(rss_peak),
+            'rss_after_mb': _round(rss_after),
+            'rss_growth_per_session_mb': _round(_delta(rss_peak, rss_before, clients)),
+            'rss_retained_per_session_mb': _round(_delta(rss_after, rss_before, clients)),
+        }
+        return {'summary': summary, 'sessions': sessions}
+
+    @staticmethod
+    async def _session(application, index, query, chunks, chunk_s, delay, timeout):
+        """One client: connect, stream ``chunks`` at real-time pace, stop, wait for the transcript."""
+        from channels.testing import WebsocketCommunicator
+
+        await asyncio.sleep(delay)
+        loop = asyncio.get_running_loop()
+        result = {'client': index, 'partials': 0, 'busy': 0}
+        communicator = WebsocketCommunicator(application, f"/ws/live-transcribe/?{query}")
+        began = loop.time()
+        try:
+            connected, _ = await communicator.connect(timeout=timeout)
+        except asyncio.TimeoutError:
+            result['error'] = 'connect timed out'
+            return result
+        result['connect_ms'] = round((loop.time() - began) * 1000, 1)
+        if not connected:
+            result['error'] = 'connection rejected'
+            return result
+
+        final = loop.create_future()
+        streaming_started = loop.time()
+
+        async def read():
+            while True:
+                message = json.loads(await communicator.receive_from(timeout=timeout + len(chunks) * chunk_s))
+                kind = message.get('type')
+                if kind == 'partial':
+                    result['partials'] += 1
+                    result.setdefault('first_partial_ms', round((loop.time() - streaming_started) * 1000, 1))
+                elif kind == 'busy':
+                    result['busy'] += 1
+                elif kind == 'transcription':
+                    final.set_result(message.get('text', ''))
+                    return
+
+        reader = asyncio.create_task(read())
+        try:
+            for number, chunk in enumerate(chunks):
+                # Absolute schedule, so a slow send does not stretch the recording.
+                await asyncio.sleep(max(0.0, streaming_started + number * chunk_s - loop.time()))
+                await communicator.send_to(bytes_data=chunk)
+            await asyncio.sleep(max(0.0, streaming_started + len(chunks) * chunk_s - loop.time()))
+            stopped = loop.time()
+            await communicator.send_to(text_data=json.dumps({'type': 'stop'}))
+            done, _ = await asyncio.wait({final, reader}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if final.done():
+                result['transcript_ms'] = round((loop.time() - stopped) * 1000, 1)
+                result['text'] = final.result()
+            elif reader in done and reader.exception() is not None:
+                result['error'] = f"receive failed: {reader.exception()!r}"
+            else:
+                result['error'] = 'no transcript before --timeout'
+        finally:
+            reader.cancel()
+            await communicator.disconnect()
+        result['rss_at_end_mb'] = _round(memory_usage_mb()['rss'])
+        return result
+
+
+class _LoopLag:
+    """Measures how late ``asyncio.sleep`` wakes up: the event loop's scheduling lag."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.samples = []
+        self._running = True
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while self._running:
+            before = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - before - self.interval))
+
+    def stop(self):
+        self._running = False
+
+
+def synthetic_webm(duration, burst_s=1.2, pause_s=0.8):
+    """webm/opus of a voiced tone in ``burst_s`` bursts separated by ``pause_s`` of silence.
+
+    The pauses are longer than the default ``LIVE_VAD_SILENCE_MS``, so the
+    streaming consumer cuts the recording into several utterances like speech.
+    """
+    period = burst_s + pause_s
+    command = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=48000:duration={duration}",
+        "-af", f"volume='if(lt(mod(t,{period}),{burst_s}),0.8,0)':eval=frame",
+        "-c:a", "libopus", "-b:a", "32k", "-f", "webm", "pipe:1",
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise CommandError(f"ffmpeg is needed to synthesize audio (or pass --audio): {e}")
+    if result.returncode != 0 or not result.stdout:
+        raise CommandError(f"ffmpeg could not synthesize audio: {result.stderr.decode(errors='ignore').strip()}")
+    return result.stdout
+
+
+def _spread(values):
+    if not values:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    return {
+        'count': len(values),
+        'mean': round(statistics.mean(values), 1),
+        'p50': round(_percentile(values, 50), 1),
+        'p95': round(_percentile(values, 95), 1),
+        'p99': round(_percentile(values, 99), 1),
+        'max': round(max(values), 1),
+    }
+
+
+def _delta(after, before, sessions):
+    if after is None or before is None:
+        return None
+    return (after - before) / sessions
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
@@ -0,0 +1,47 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the model server: load the classifier, spaCy and Whisper once and serve "
+        "classify/NER/transcribe calls to the web workers over a Unix socket. "
+        "Start the workers with the same MODEL_SERVER_SOCKET."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.MODEL_SERVER_SOCKET or '/tmp/truthtell-models.sock')
+        parser.add_argument('--models', default='classifier,spacy,whisper',
+                            help="Registry models to load before accepting connections.")
+        parser.add_argument('--threads', type=int, default=settings.MODEL_SERVER_THREADS,
+                            help="torch intra-op threads (0 = one per core).")
+
+    def handle(self, *args, **options):
+        # This process owns the models; the registry must load them here, not proxy to itself.
+        settings.MODEL_SERVER_SOCKET = ''
+        import torch
+        threads = options['threads'] or os.cpu_count() or 1
+        torch.set_num_threads(threads)
+
+        from transcribe.modelserver import ModelServer
+        from transcribe.registry import memory_usage_mb, registry
+
+        names = [n.strip() for n in options['models'].split(',') if n.strip()]
+        registry.preload(names)  # failures are logged; those models load on first use instead
+        # Bound only now, so workers that connect early wait until the models are ready.
+        server = ModelServer(options['socket'])
+        self.stdout.write(
+            f"Model server on {options['socket']} (pid {os.getpid()}, {threads} torch threads, "
+            f"models {registry.loaded()}, rss {memory_usage_mb()['rss']:.0f} MiB)"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if os.path.exists(options['socket']):
+                os.remove(options['socket'])
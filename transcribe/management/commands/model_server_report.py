@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from transcribe.management.commands.compare_backends import _percentile, load_claims
+from transcribe.registry import memory_usage_mb
+
+
+class Command(BaseCommand):
+    help = (
+        "Memory and throughput of N web workers that each load their own models ('per-worker', "
+        "the current layout) against N thin workers calling one model server ('model-server'). "
+        "Every worker is a separate process running classify + NER (and optionally Whisper) "
+        "calls back to back; all of them start together."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=200, help="Calls per worker.")
+        parser.add_argument('--models', default='classifier,spacy',
+                            help="Models the model server loads up front.")
+        parser.add_argument('--audio-s', type=float, default=0.0,
+                            help="Also transcribe this many seconds of audio per call (needs Whisper).")
+        parser.add_argument('--data', default=str(settings.BASE_DIR / 'data.csv'))
+        parser.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+        parser.add_argument('--index', type=int, default=0, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['probe']:
+            return self._probe(options)
+
+        workers = max(1, options['workers'])
+        rows = [('per-worker', self._scenario(options, workers, socket_path=''))]
+        with tempfile.TemporaryDirectory(prefix='model-server-') as tmp:
+            socket_path = os.path.join(tmp, 'models.sock')
+            rows.append(('model-server', self._scenario(options, workers, socket_path=socket_path)))
+
+        self.stdout.write(
+            f"{'layout':<13} {'workers PSS':>12} {'server PSS':>11} {'total PSS':>10} {'total RSS':>10} "
+            f"{'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}"
+        )
+        for name, r in rows:
+            self.stdout.write(
+                f"{name:<13} {_mb(r['workers_pss']):>12} {_mb(r['server_pss']):>11} {_mb(r['total_pss']):>10} "
+                f"{_mb(r['total_rss']):>10} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}"
+            )
+
+    def _command(self, *args):
+        return [sys.executable, str(settings.BASE_DIR / 'manage.py'), *args]
+
+    def _scenario(self, options, workers, socket_path):
+        env = dict(os.environ, MODEL_SERVER_SOCKET=socket_path, MODEL_LOADING='lazy')
+        models = options['models'] + (',whisper' if options['audio_s'] and 'whisper' not in options['models'] else '')
+        server = None
+        if socket_path:
+            server = subprocess.Popen(
+                self._command('model_server', '--socket', socket_path, '--models', models),
+                env=env, stdout=subprocess.PIPE, text=True,
+            )
+            # "Model server on ..." is printed once the models are loaded and the socket is bound.
+            if not any(line.startswith('Model server on') for line in server.stdout):
+                raise CommandError(f"model server did not start (exit code {server.wait()})")
+
+        probes = [
+            subprocess.Popen(
+                self._command('model_server_report', '--probe', '--index', str(index),
+                              '--requests', str(options['requests']), '--audio-s', str(options['audio_s']),
+                              '--data', options['data']),
+                env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+            )
+            for index in range(workers)
+        ]
+        try:
+            for probe in probes:
+                _read_json(probe)  # loaded and warmed up
+            started = time.perf_counter()
+            for probe in probes:
+                probe.stdin.write('go\n')
+                probe.stdin.flush()
+            results = [_read_json(probe) for probe in probes]
+            wall = time.perf_counter() - started
+            server_memory = memory_usage_mb(server.pid) if server is not None else {'rss': 0.0, 'pss': 0.0}
+        except BaseException:
+            for probe in probes:
+                probe.kill()
+            raise
+        finally:
+            for probe in probes:
+                probe.wait()
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+        latencies = [seconds for r in results for seconds in r['latencies']]
+        workers_pss = _total(r['memory']['pss'] for r in results)
+        workers_rss = _total(r['memory']['rss'] for r in results)
+        return {
+            'workers_pss': workers_pss,
+            'server_pss': server_memory['pss'],
+            'total_pss': _total([workers_pss, server_memory['pss']]),
+            'total_rss': _total([workers_rss, server_memory['rss']]),
+            'rps': len(latencies) / wall,
+            'p50_ms': _percentile(latencies, 50) * 1000,
+            'p95_ms': _percentile(latencies, 95) * 1000,
+            'mean_ms': statistics.mean(latencies) * 1000,
+        }
+
+    def _probe(self, options):
+        import numpy as np
+        from transcribe.audio import SAMPLE_RATE
+        from transcribe.ner import get_ner_service
+        from transcribe.registry import registry
+        from transcribe.whisper_service import get_whisper_service
+
+        claims = [text for text, _ in load_claims(options['data'])]
+        if not claims:
+            raise CommandError(f"No claims found in {options['data']}")
+        first = options['index'] * options['requests']
+        # Distinct claims per worker, so no worker is served from another one's NER cache.
+        texts = [claims[(first + i) % len(claims)] for i in range(options['requests'])]
+        classifier = registry.get('classifier')
+        ner = get_ner_service()
+        whisper = get_whisper_service() if options['audio_s'] else None
+        audio = None
+        if whisper is not None:
+            rng = np.random.default_rng(options['index'])
+            audio = rng.normal(0, 0.01, int(options['audio_s'] * SAMPLE_RATE)).astype(np.float32)
+
+        def call(text):
+            classifier.predict([text])
+            ner.extract(text)
+            if audio is not None:
+                whisper.transcribe(audio)
+
+        call('Warm-up claim about the Moon.')  # load models / open the connection
+        self._emit({'ready': True})
+        sys.stdin.readline()
+
+        latencies = []
+        for text in texts:
+            began = time.perf_counter()
+            call(text)
+            latencies.append(time.perf_counter() - began)
+        self._emit({'latencies': latencies, 'memory': memory_usage_mb()})
+
+    def _emit(self, payload):
+        self.stdout.write(json.dumps(payload))
+        self.stdout.flush()
+
+
+def _read_json(process):
+    for line in process.stdout:
+        if line.startswith('{'):
+            return json.loads(line)
+    raise CommandError(f"worker {process.pid} exited without reporting (exit code {process.wait()})")
+
+
+def _total(values):
+    values = list(values)
+    return None if any(v is None for v in values) else sum(values)
+
+
+def _mb(value):
+    return "n/a" if value is None else f"{value:.0f} MiB"
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from transcribe.jobs import JobWorkerPool, housekeeping
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued /detect/ transcription jobs in this process. Run it "
+        "with JOBS_WORKERS=0 for the web workers to keep Whisper out of them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=max(1, settings.JOBS_WORKERS))
+        parser.add_argument('--once', action='store_true',
+                            help="Only requeue stuck jobs and delete expired ones, then exit.")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            housekeeping()
+            return
+        pool = JobWorkerPool(options['workers'], settings.JOBS_POLL_S, name='run_jobs').start()
+        self.stdout.write(f"Processing jobs with {options['workers']} workers (Ctrl-C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pool.stop(timeout=5)
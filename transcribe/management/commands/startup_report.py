@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Report cold-start time and per-worker memory for the serving process. "
+        "Each scenario runs in a fresh interpreter: 'eager' loads every model at import "
+        "(the old behaviour), 'lazy' only imports the views, and 'preload' loads every "
+        "model once and then forks workers that share the weights copy-on-write."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help="Number of forked workers to measure in the preload scenario.")
+        parser.add_argument('--models', default='classifier,spacy',
+                            help="Registry models to load in the eager/preload scenarios.")
+        parser.add_argument('--probe', choices=['eager', 'lazy', 'preload'], help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['probe']:
+            return self._probe(options['probe'], options['models'].split(','), options['workers'])
+
+        rows = []
+        for scenario in ('eager', 'lazy', 'preload'):
+            started = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'startup_report',
+                 '--probe', scenario, '--models', options['models'], '--workers', str(options['workers'])],
+                capture_output=True, text=True,
+            )
+            wall = time.perf_counter() - started
+            lines = [line for line in output.stdout.splitlines() if line.startswith('{')]
+            if output.returncode != 0 or not lines:
+                self.stderr.write(f"{scenario}: probe failed\n{output.stderr[-2000:]}")
+                continue
+            result = json.loads(lines[-1])
+            result['wall_s'] = wall
+            rows.append((scenario, result))
+
+        self.stdout.write(
+            f"{'scenario':<9} {'ready s':>8} {'wall s':>7} {'master RSS':>11} {'worker RSS':>11} {'worker PSS':>11}"
+        )
+        for scenario, r in rows:
+            self.stdout.write(
+                f"{scenario:<9} {r['ready_s']:>8.2f} {r['wall_s']:>7.2f} {_mb(r['master']['rss']):>11} "
+                f"{_mb(r['worker']['rss']):>11} {_mb(r['worker']['pss']):>11}"
+            )
+
+    def _probe(self, scenario, models, workers):
+        from transcribe.registry import memory_usage_mb, registry
+
+        started = time.perf_counter()
+        import transcribe.views  # noqa: F401  (what every worker and manage.py command imports)
+        if scenario == 'eager':
+            for name in models:
+                registry.get(name)
+        elif scenario == 'preload':
+            registry.preload(models)
+        ready = time.perf_counter() - started
+        master = memory_usage_mb()
+
+        if scenario != 'preload':
+            worker = master
+        else:
+            # Fork like gunicorn does and let each worker report its own share.
+            pipes = []
+            for _ in range(max(1, workers)):
+                read_fd, write_fd = os.pipe()
+                pid = os.fork()
+                if pid == 0:
+                    os.close(read_fd)
+                    registry.get(models[0])
+                    os.write(write_fd, json.dumps(memory_usage_mb()).encode())
+                    os._exit(0)
+                os.close(write_fd)
+                pipes.append((pid, read_fd))
+            reports = []
+            for pid, read_fd in pipes:
+                with os.fdopen(read_fd) as f:
+                    reports.append(json.loads(f.read()))
+                os.waitpid(pid, 0)
+            worker = {
+                key: (sum(r[key] for r in reports) / len(reports)) if reports[0][key] is not None else None
+                for key in ('rss', 'pss')
+            }
+        self.stdout.write(json.dumps({'ready_s': ready, 'master': master, 'worker': worker}))
+
+
+def _mb(value):
+    return "n/a" if value is None else f"{value:.0f} MiB"
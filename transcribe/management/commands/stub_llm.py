@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from transcribe.stubs import llm_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local OpenAI-compatible stand-in for the Groq chat completions API. "
+        "Set GROQ_BASE_URL='http://HOST:PORT' (and any GROQ_API_KEY) to use it."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8767)
+        parser.add_argument('--latency', type=float, default=0.4, help="Seconds added to every response.")
+        parser.add_argument('--jitter', type=float, default=0.1, help="+/- seconds of random latency.")
+        parser.add_argument('--tail-rate', type=float, default=0.05, help="Fraction of slow responses.")
+        parser.add_argument('--tail-latency', type=float, default=3.0, help="Extra seconds for slow responses.")
+        parser.add_argument('--fail-rate', type=float, default=0.0, help="Fraction of requests answered with 503.")
+
+    def handle(self, *args, **options):
+        server = llm_server(
+            options['host'], options['port'],
+            latency=options['latency'], jitter=options['jitter'], fail_rate=options['fail_rate'],
+            tail_rate=options['tail_rate'], tail_latency=options['tail_latency'],
+        )
+        self.stdout.write(f"Stub chat completions on {server.url}/openai/v1/chat/completions (Ctrl-C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from transcribe.stubs import rss_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for Google News RSS search. Set "
+        "NEWS_RSS_URL='http://HOST:PORT/rss/search?q={query}' to use it."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency', type=float, default=0.2, help="Seconds added to every response.")
+        parser.add_argument('--jitter', type=float, default=0.1, help="+/- seconds of random latency.")
+        parser.add_argument('--fail-rate', type=float, default=0.0, help="Fraction of requests answered with 503.")
+        parser.add_argument('--empty-rate', type=float, default=0.0, help="Fraction of feeds with no items.")
+        parser.add_argument('--items', type=int, default=5, help="Items per feed.")
+
+    def handle(self, *args, **options):
+        server = rss_server(
+            options['host'], options['port'],
+            latency=options['latency'], jitter=options['jitter'],
+            fail_rate=options['fail_rate'], empty_rate=options['empty_rate'], items=options['items'],
+        )
+        self.stdout.write(f"Stub RSS on {server.url}/rss/search?q={{query}} (Ctrl-C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
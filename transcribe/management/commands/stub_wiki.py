@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from transcribe.stubs import wiki_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Wikipedia (MediaWiki) query API. Set "
+        "WIKI_API_URL='http://HOST:PORT/w/api.php' to use it."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8766)
+        parser.add_argument('--latency', type=float, default=0.15, help="Seconds added to every response.")
+        parser.add_argument('--jitter', type=float, default=0.05, help="+/- seconds of random latency.")
+        parser.add_argument('--fail-rate', type=float, default=0.0, help="Fraction of requests answered with 503.")
+        parser.add_argument('--missing-rate', type=float, default=0.2,
+                            help="Fraction of titles reported as missing pages (stable per title).")
+
+    def handle(self, *args, **options):
+        server = wiki_server(
+            options['host'], options['port'],
+            latency=options['latency'], jitter=options['jitter'],
+            fail_rate=options['fail_rate'], empty_rate=options['missing_rate'],
+        )
+        self.stdout.write(f"Stub Wikipedia API on {server.url}/w/api.php (Ctrl-C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,261 @@
+"""Per-stage timers, counters and gauges, exposed in Prometheus text format.
+
+``stage('wikipedia')`` (a context manager) times one pipeline stage. The
+duration goes into the ``truthtell_stage_seconds`` histogram, failures into
+``truthtell_stage_errors_total``. When the stage runs inside an HTTP request,
+it is also added to that request's ``Server-Timing`` header, so browser
+devtools show the per-stage breakdown. ``MetricsMiddleware`` counts
+requests per route, tracks how many are in flight and times them end to
+end. ``/metrics`` serves everything via ``render()``.
+
+No client library is needed: the handful of metric types here write the
+text exposition format themselves. Values are per process; with several
+gunicorn workers each one reports its own.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_timings = contextvars.ContextVar('server_timings', default=None)
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(value):
+    return repr(float(value)) if value not in (float('inf'), float('-inf')) else ('+Inf' if value > 0 else '-Inf')
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in values]
+
+
+class Gauge(_Metric):
+    """Settable gauge; with ``function`` its value is read at scrape time instead."""
+    kind = 'gauge'
+
+    def __init__(self, name, help, labelnames=(), function=None):
+        super().__init__(name, help, labelnames)
+        self.function = function
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception:
+                return []
+            if value is None:
+                return []
+            return self.header() + [f"{self.name} {_number(value)}"]
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in values]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            counts, total = self._values.get(labels, (None, 0.0))
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[labels] = (counts, total + value)
+
+    def render(self):
+        with self._lock:
+            values = sorted((k, (list(c), t)) for k, (c, t) in self._values.items())
+        lines = self.header()
+        names = self.labelnames + ('le',)
+        for labels, (counts, total) in values:
+            running = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                running += count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (_number(bound),))} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {running}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.add(Histogram(
+    'truthtell_stage_seconds', 'Time spent in one pipeline stage.', ('stage',)))
+STAGE_ERRORS = metrics.add(Counter(
+    'truthtell_stage_errors_total', 'Pipeline stages that raised.', ('stage',)))
+REQUESTS = metrics.add(Counter(
+    'truthtell_http_requests_total', 'HTTP requests by route and status.', ('route', 'status')))
+REQUEST_SECONDS = metrics.add(Histogram(
+    'truthtell_http_request_seconds', 'HTTP request latency by route.', ('route',)))
+REQUESTS_IN_FLIGHT = metrics.add(Gauge(
+    'truthtell_http_requests_in_flight', 'HTTP requests being handled, by route.', ('route',)))
+WEBSOCKETS = metrics.add(Gauge(
+    'truthtell_websocket_connections', 'Open websocket connections, by route.', ('route',)))
+WEBSOCKET_MESSAGES = metrics.add(Counter(
+    'truthtell_websocket_messages_total', 'Websocket messages received, by route and kind.', ('route', 'kind')))
+
+
+
+def _executor_active():
+    from .executor import get_executor
+    return get_executor().active
+
+
+def _whisper_pending():
+    from .registry import registry
+    if not registry.is_loaded('whisper'):
+        return None  # do not load Whisper just to report it idle
+    return registry.get('whisper').pending
+
+
+def _jobs_in(status):
+    def count():
+        from .models import AudioJob
+        return AudioJob.objects.filter(status=status).count()
+    return count
+
+
+metrics.add(Gauge('truthtell_executor_active', 'Live-transcription jobs queued or running in the executor.',
+                  function=_executor_active))
+metrics.add(Gauge('truthtell_whisper_pending', 'Whisper jobs waiting for a free model instance.',
+                  function=_whisper_pending))
+metrics.add(Gauge('truthtell_jobs_queued', 'Background transcription jobs waiting to run (all processes).',
+                  function=_jobs_in('queued')))
+metrics.add(Gauge('truthtell_jobs_running', 'Background transcription jobs running (all processes).',
+                  function=_jobs_in('running')))
+
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage into the histogram and the current request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(name)
+        raise
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def record(name, seconds):
+    """Record an already measured stage duration."""
+    STAGE_SECONDS.observe(seconds, name)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+def server_timing(timings, total=None):
+    """``Server-Timing`` header value; repeated stages are summed."""
+    merged = {}
+    for name, seconds in timings:
+        merged[name] = merged.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in merged.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ', '.join(parts)
+
+
+def _route(request):
+    from django.urls import Resolver404, resolve
+    try:
+        return resolve(request.path_info).url_name or 'unnamed'
+    except Resolver404:
+        return 'unmatched'
+
+
+class MetricsMiddleware:
+    """Request counts, latency and in-flight gauges per route, plus the Server-Timing header."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        route = _route(request)
+        timings = []
+        token = _timings.set(timings)
+        REQUESTS_IN_FLIGHT.inc(route)
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec(route)
+            REQUESTS.inc(route, str(status))
+            REQUEST_SECONDS.observe(elapsed, route)
+            _timings.reset(token)
+        response['Server-Timing'] = server_timing(timings, elapsed)
+        return response
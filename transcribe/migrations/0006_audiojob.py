@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:02
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcribe', '0005_delete_newsarticle_remove_register_phone_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='queued', max_length=16)),
+                ('stage', models.CharField(blank=True, max_length=32)),
+                ('progress', models.FloatField(default=0.0)),
+                ('file_path', models.CharField(max_length=500)),
+                ('file_name', models.CharField(blank=True, max_length=255)),
+                ('language', models.CharField(blank=True, max_length=16)),
+                ('transcription', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=3)),
+                ('cancel_requested', models.BooleanField(default=False)),
+                ('worker', models.CharField(blank=True, max_length=64)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('lease_expires', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'available_at'], name='transcribe__status_b27101_idx')],
+            },
+        ),
+    ]
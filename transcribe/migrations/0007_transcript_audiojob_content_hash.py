@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcribe', '0006_audiojob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Transcript',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('model_size', models.CharField(max_length=32)),
+                ('language', models.CharField(blank=True, max_length=16)),
+                ('text', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='audiojob',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='transcript',
+            constraint=models.UniqueConstraint(fields=('content_hash', 'model_size'), name='unique_transcript_per_model'),
+        ),
+    ]
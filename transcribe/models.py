@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 
 class Register(models.Model):
     username = models.CharField(max_length=100, unique=True)  # Updated to username
@@ -18,3 +21,79 @@ class Contact(models.Model):
     def __str__(self):
         return f"{self.name} - {self.email}"
     
+
+
+class AudioJob(models.Model):
+    """One /detect/ upload waiting for, or going through, background transcription (see jobs.py)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+    FINISHED = (DONE, FAILED, CANCELLED)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    stage = models.CharField(max_length=32, blank=True)
+    progress = models.FloatField(default=0.0)
+    file_path = models.CharField(max_length=500)
+    file_name = models.CharField(max_length=255, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)  # SHA-256 of the upload (see uploads.py)
+    language = models.CharField(max_length=16, blank=True)
+    transcription = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    cancel_requested = models.BooleanField(default=False)
+    worker = models.CharField(max_length=64, blank=True)
+    available_at = models.DateTimeField(default=timezone.now)  # not claimed before this (retry backoff)
+    lease_expires = models.DateTimeField(null=True, blank=True)  # a running job is requeued after this
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'available_at'])]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.status})"
+
+    def as_dict(self):
+        data = {
+            'job_id': str(self.id),
+            'status': self.status,
+            'stage': self.stage,
+            'progress': round(self.progress, 3),
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+        if self.status == self.DONE:
+            data.update(transcription=self.transcription, language=self.language)
+        if self.error:
+            data['error'] = self.error
+        return data
+
+
+class Transcript(models.Model):
+    """Whisper output for one upload's content, reused when the same bytes come in again."""
+    content_hash = models.CharField(max_length=64)
+    model_size = models.CharField(max_length=32)
+    language = models.CharField(max_length=16, blank=True)
+    text = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'model_size'], name='unique_transcript_per_model'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.model_size})"
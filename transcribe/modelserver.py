@@ -0,0 +1,419 @@
+"""Model server: one process owns the models, web workers call it over a Unix socket.
+
+Every gunicorn worker used to hold (or at least map) its own BERT, spaCy and
+Whisper, and each ran torch with a full set of threads, so four workers fought
+over the same cores. With ``MODEL_SERVER_SOCKET`` set, ``manage.py
+model_server`` loads the models once. The registry then hands workers thin
+proxies (``RemoteClassifier``, ``RemoteNER``, ``RemoteWhisperService``) with
+the same interface as the local objects. Concurrent calls from all workers meet
+in the server's micro-batchers, NER cache and Whisper queue.
+
+Wire format: each message is a 4-byte big-endian length followed by a JSON
+object. Requests carry ``op`` plus arguments and replies carry ``result`` or
+``error``/``type``. Arrays (audio, log-mels) are not serialized. The caller
+copies them into a ``multiprocessing.shared_memory`` block and sends only its
+name, shape and dtype. Each worker keeps a small pool of open connections
+(``MODEL_SERVER_POOL_SIZE``).
+"""
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from django.conf import settings
+
+from .whisper_service import WhisperQueueFull
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE = 64 * 1024 * 1024
+
+
+class ModelServerError(RuntimeError):
+    """The model server answered with an error."""
+
+
+class ModelServerUnavailable(ModelServerError):
+    """The model server could not be reached."""
+
+
+def _whisper_functions():
+    # Whisper jobs run ``fn(model, ...)`` in the server; only these can be named over the wire.
+    from .audio import detect_language, transcribe_mel
+    from .whisper_service import transcribe_audio
+    return {fn.__name__: fn for fn in (detect_language, transcribe_mel, transcribe_audio)}
+
+
+def send_message(sock, payload):
+    body = json.dumps(payload).encode('utf-8')
+    sock.sendall(HEADER.pack(len(body)) + body)
+
+
+def recv_message(sock):
+    """Next message from ``sock``, or None if the peer closed the connection."""
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_MESSAGE:
+        raise ModelServerError(f"message of {length} bytes exceeds the {MAX_MESSAGE} byte limit")
+    body = _recv_exactly(sock, length)
+    if body is None:
+        raise ConnectionError("connection closed mid-message")
+    return json.loads(body)
+
+
+def _recv_exactly(sock, size):
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ConnectionError("connection closed mid-message")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+# -- shared memory ---------------------------------------------------------
+
+class _SharedArrays:
+    """Caller side: arguments that are arrays travel through shared memory blocks."""
+
+    def __init__(self):
+        self.blocks = []
+
+    def encode(self, value):
+        is_tensor = type(value).__module__.startswith('torch')
+        if not is_tensor and not isinstance(value, np.ndarray):
+            return value
+        array = np.ascontiguousarray(value.detach().cpu().numpy() if is_tensor else value)
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        self.blocks.append(block)
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+        return {'__shm__': block.name, 'shape': list(array.shape), 'dtype': array.dtype.str, 'torch': is_tensor}
+
+    def release(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def _decode_array(value):
+    """Server side: copy a shared-memory argument out, so the caller may free its block."""
+    if not (isinstance(value, dict) and '__shm__' in value):
+        return value
+    block = shared_memory.SharedMemory(name=value['__shm__'])
+    try:
+        # The caller owns the block; keep this process's tracker from unlinking it at exit.
+        resource_tracker.unregister(block._name, 'shared_memory')
+        array = np.ndarray(value['shape'], np.dtype(value['dtype']), buffer=block.buf).copy()
+    finally:
+        block.close()
+    if value.get('torch'):
+        import torch
+        return torch.from_numpy(array)
+    return array
+
+
+# -- server ----------------------------------------------------------------
+
+class _Handler(socketserver.BaseRequestHandler):
+    """One worker connection: answer requests until the worker hangs up."""
+
+    def handle(self):
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ConnectionError, OSError, ValueError) as e:
+                logger.debug("[ModelServer] connection dropped: %s", e)
+                return
+            if request is None:
+                return
+            try:
+                reply = {'result': self.server.dispatch(request)}
+            except Exception as e:
+                if not isinstance(e, (WhisperQueueFull, KeyError, ValueError)):
+                    logger.exception("[ModelServer] %s failed: %s", request.get('op'), e)
+                reply = {'error': str(e), 'type': type(e).__name__}
+            try:
+                send_message(self.request, reply)
+            except OSError:
+                return
+
+
+class ModelServer(socketserver.ThreadingUnixStreamServer):
+    """Serves ``classify``, ``ner``, ``whisper`` and ``info`` from this process's registry."""
+
+    daemon_threads = True
+
+    def __init__(self, path):
+        if os.path.exists(path):
+            os.remove(path)  # stale socket from a previous run
+        super().__init__(path, _Handler)
+        self.path = path
+        self.requests = {}
+        self._count_lock = threading.Lock()
+        self._batcher = None
+        self._batcher_lock = threading.Lock()
+        self._functions = _whisper_functions()
+
+    def _classifier_batcher(self):
+        from .batching import MicroBatcher
+        from .registry import registry
+        with self._batcher_lock:
+            if self._batcher is None:
+                self._batcher = MicroBatcher(
+                    registry.get('classifier').predict,
+                    max_batch=settings.CLASSIFIER_MAX_BATCH,
+                    wait_ms=settings.CLASSIFIER_BATCH_WAIT_MS,
+                    name="model-server-bert",
+                )
+        return self._batcher
+
+    def dispatch(self, request):
+        op = request.get('op')
+        with self._count_lock:
+            self.requests[op] = self.requests.get(op, 0) + 1
+        if op == 'classify':
+            return self._classifier_batcher().predict_many(request['texts'])
+        if op == 'ner':
+            from .ner import get_ner_service
+            return get_ner_service().extract_many(request['texts'])
+        if op == 'whisper':
+            from .whisper_service import get_whisper_service
+            service = get_whisper_service()
+            if service is None:
+                raise ModelServerError("Whisper model is unavailable on the model server.")
+            fn = self._functions[request['fn']]
+            args = [_decode_array(a) for a in request.get('args', [])]
+            kwargs = {k: _decode_array(v) for k, v in request.get('kwargs', {}).items()}
+            return service.run(fn, *args, timeout=settings.WHISPER_TIMEOUT_S, **kwargs)
+        if op == 'info':
+            return self.info(load_whisper=request.get('whisper', False))
+        raise ValueError(f"unknown op {op!r}")
+
+    def info(self, load_whisper=False):
+        from .registry import memory_usage_mb, registry
+        from .whisper_service import get_whisper_service
+        with self._count_lock:
+            requests = dict(self.requests)
+        info = {'pid': os.getpid(), 'models': registry.loaded(), 'requests': requests,
+                'memory_mb': memory_usage_mb()}
+        service = get_whisper_service() if load_whisper or registry.is_loaded('whisper') else None
+        if service is not None:
+            info['whisper'] = {'n_mels': service.n_mels, 'device': str(service.device), 'pending': service.pending}
+        return info
+
+
+# -- client ----------------------------------------------------------------
+
+class ModelServerClient:
+    """Pooled connections to a model server; safe to share between threads.
+
+    At most ``pool_size`` calls are in flight per process; connections are
+    reopened after a fork and when the server went away between calls.
+    """
+
+    def __init__(self, path, pool_size=8, timeout=300.0, connect_wait=10.0):
+        self.path = path
+        self.pool_size = max(1, int(pool_size))
+        self.timeout = timeout
+        self.connect_wait = connect_wait
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+
+    def _connect(self):
+        deadline = time.monotonic() + self.connect_wait
+        delay = 0.05
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+                return sock
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                sock.close()
+                # The server binds its socket only once the models are loaded.
+                if time.monotonic() >= deadline:
+                    raise ModelServerUnavailable(f"model server at {self.path} is not accepting connections: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+
+    @contextmanager
+    def _connection(self):
+        if os.getpid() != self._pid:
+            self._reset()  # never share a parent's sockets after fork
+        self._slots.acquire()
+        try:
+            try:
+                sock, reused = self._idle.get_nowait(), True
+            except queue.Empty:
+                sock, reused = self._connect(), False
+            try:
+                yield sock, reused
+            except BaseException:
+                sock.close()
+                raise
+            self._idle.put(sock)
+        finally:
+            self._slots.release()
+
+    def call(self, op, **payload):
+        request = dict(payload, op=op)
+        for attempt in (1, 2):
+            try:
+                with self._connection() as (sock, reused):
+                    try:
+                        send_message(sock, request)
+                        reply = recv_message(sock)
+                    except (ConnectionError, BrokenPipeError) as e:
+                        if reused and attempt == 1:
+                            raise _Stale() from e
+                        raise ModelServerUnavailable(f"model server connection failed: {e}") from e
+                    if reply is None:
+                        if reused and attempt == 1:
+                            raise _Stale()
+                        raise ModelServerUnavailable("model server closed the connection")
+            except _Stale:
+                continue  # a pooled connection died while idle; try once on a fresh one
+            break
+        if 'error' in reply:
+            if reply.get('type') == 'WhisperQueueFull':
+                raise WhisperQueueFull(reply['error'])
+            raise ModelServerError(f"{reply.get('type')}: {reply['error']}")
+        return reply['result']
+
+    def whisper(self, fn_name, args, kwargs):
+        shared = _SharedArrays()
+        try:
+            return self.call(
+                'whisper', fn=fn_name,
+                args=[shared.encode(a) for a in args],
+                kwargs={k: shared.encode(v) for k, v in kwargs.items()},
+            )
+        finally:
+            shared.release()
+
+
+class _Stale(Exception):
+    pass
+
+
+class RemoteClassifier:
+    """Stands in for an inference backend: ``predict`` runs on the model server."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def predict(self, texts):
+        return self.client.call('classify', texts=list(texts))
+
+    def warmup(self):
+        pass
+
+
+class RemoteNER:
+    """Stands in for the spaCy pipeline; ``NERService`` calls ``entities`` instead of ``pipe``."""
+
+    pipe_names = ['model-server']
+
+    def __init__(self, client):
+        self.client = client
+
+    def entities(self, texts):
+        return self.client.call('ner', texts=list(texts))
+
+
+class RemoteWhisperService:
+    """``WhisperService`` interface backed by the model server's Whisper queue.
+
+    Jobs must name one of the functions the server knows (see
+    ``_whisper_functions``); array arguments go through shared memory.
+    """
+
+    def __init__(self, client, max_workers=8):
+        self.client = client
+        self._functions = {fn: name for name, fn in _whisper_functions().items()}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="whisper-remote")
+        self._info = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _server_info(self):
+        if self._info is None:
+            self._info = self.client.call('info', whisper=True).get('whisper') or {}
+        return self._info
+
+    @property
+    def device(self):
+        return self._server_info().get('device', 'cpu')
+
+    @property
+    def n_mels(self):
+        return self._server_info().get('n_mels', 80)
+
+    @property
+    def pending(self):
+        """Jobs this worker has submitted that have not finished yet."""
+        return self._pending
+
+    def submit(self, fn, *args, **kwargs):
+        name = self._functions.get(fn)
+        if name is None:
+            raise ValueError(f"{getattr(fn, '__name__', fn)!r} cannot run on the model server")
+        with self._lock:
+            self._pending += 1
+        future = self._pool.submit(self.client.whisper, name, args, kwargs)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def run(self, fn, *args, timeout=None, **kwargs):
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()  # still queued: don't send the server a job nobody waits for
+            raise
+
+    def transcribe(self, audio, timeout=None, **options):
+        from .whisper_service import transcribe_audio
+        return self.run(transcribe_audio, audio, timeout=timeout, **options)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_model_client():
+    """Process-wide client for ``MODEL_SERVER_SOCKET``."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ModelServerClient(
+                settings.MODEL_SERVER_SOCKET,
+                pool_size=settings.MODEL_SERVER_POOL_SIZE,
+                timeout=settings.MODEL_SERVER_TIMEOUT_S,
+            )
+    return _client
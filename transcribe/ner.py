@@ -0,0 +1,138 @@
+"""Named-entity recognition for claims.
+
+Only ``doc.ents`` is ever used, so the spaCy pipeline is loaded without the
+components NER does not need (tagger, parser, lemmatizer, ...; see
+``NER_EXCLUDE``). Calls go through a ``MicroBatcher``: texts arriving
+together (concurrent requests, /classify-batch/) are processed by one
+``nlp.pipe`` call instead of one ``nlp(text)`` each.
+
+Results are cached in an LRU keyed by the whitespace-normalized text (case
+is kept, it matters to NER). Identical texts already in flight share one
+future.
+"""
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from .batching import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+# Pipeline components whose output NER never reads. tok2vec stays: in some
+# pipelines the ner component listens to a shared tok2vec.
+NER_EXCLUDE = ('tagger', 'morphologizer', 'parser', 'senter', 'attribute_ruler', 'lemmatizer', 'textcat')
+
+
+def load_pipeline(model, trimmed=True):
+    """Load ``model`` for NER only (or whole, with ``trimmed=False``); blank English if missing."""
+    import spacy
+    try:
+        return spacy.load(model, exclude=list(NER_EXCLUDE) if trimmed else [])
+    except Exception:
+        # Fallback prevents server failure; NER will be limited until the model is installed.
+        logger.warning("[ner] spaCy model %s not installed; using blank English", model)
+        return spacy.blank("en")
+
+
+def normalize(text):
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def doc_entities(doc):
+    return [{'text': ent.text, 'label': ent.label_} for ent in doc.ents]
+
+
+class NERService:
+    def __init__(self, nlp, cache_size=4096, max_batch=64, wait_ms=5.0):
+        self.nlp = nlp
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+        self.batcher = MicroBatcher(self._pipe, max_batch=max_batch, wait_ms=wait_ms, name="ner")
+
+    def _pipe(self, texts):
+        remote = getattr(self.nlp, 'entities', None)
+        if remote is not None:  # modelserver.RemoteNER: the server runs (and caches) NER
+            return remote(texts)
+        return [doc_entities(doc) for doc in self.nlp.pipe(texts, batch_size=len(texts))]
+
+    def submit(self, text):
+        """Future resolving to ``text``'s entities (already resolved on a cache hit)."""
+        key = normalize(text)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._stats['hits'] += 1
+                future = Future()
+                future.set_result(_copy(self._cache[key]))
+                return future
+            if key in self._inflight:
+                self._stats['coalesced'] += 1
+                return self._inflight[key]
+            self._stats['misses'] += 1
+            future = self.batcher.submit(key)
+            self._inflight[key] = future
+        future.add_done_callback(lambda f: self._store(key, f))
+        return future
+
+    def _store(self, key, future):
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._cache[key] = future.result()
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def extract(self, text, timeout=None):
+        return _copy(self.submit(text).result(timeout=timeout))
+
+    def extract_many(self, texts, timeout=None):
+        """Entities for each of ``texts``, in order; misses share batched ``nlp.pipe`` calls."""
+        futures = [self.submit(text) for text in texts]
+        return [_copy(f.result(timeout=timeout)) for f in futures]
+
+    def prefetch(self, texts):
+        """Start NER for ``texts`` without waiting, so later ``extract`` calls hit the cache."""
+        for text in texts:
+            if text:
+                self.submit(text)
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats, entries=len(self._cache))
+        lookups = snapshot['hits'] + snapshot['misses'] + snapshot['coalesced']
+        snapshot['hit_rate'] = (snapshot['hits'] + snapshot['coalesced']) / lookups if lookups else 0.0
+        snapshot['batching'] = self.batcher.stats.snapshot()
+        return snapshot
+
+
+def _copy(entities):
+    # Callers may mutate their list; the cached one must stay intact.
+    return [dict(entity) for entity in entities]
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_ner_service():
+    """Process-wide NER service around the registry's spaCy pipeline."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            from .registry import registry
+            _service = NERService(
+                registry.get('spacy'),
+                cache_size=settings.NER_CACHE_SIZE,
+                max_batch=settings.NER_MAX_BATCH,
+                wait_ms=settings.NER_BATCH_WAIT_MS,
+            )
+    return _service
@@ -0,0 +1,131 @@
+"""Concurrent Google News RSS retrieval for the News branch of verify_claim.
+
+Every search query (one per entity, the full text, keywords) is fetched at
+the same time on a shared thread pool, each with its own timeout. As soon as
+enough articles have arrived the remaining fetches are abandoned. Queries
+that came back empty or failed are retried in later rounds after a jittered
+exponential backoff, and every round shares one overall deadline, so the
+worst case is bounded by ``NEWS_DEADLINE_S`` rather than by
+rounds x queries x timeout.
+
+Feeds go through ``FeedCache`` (pooled connections, TTL + conditional GET).
+``NEWS_RSS_URL`` is a template with a ``{query}`` placeholder; point it at
+``manage.py stub_rss`` to exercise this without the network.
+"""
+import logging
+import random
+import threading
+import time
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from .feedcache import get_feed_cache
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=settings.NEWS_FETCH_WORKERS, thread_name_prefix="news")
+    return _pool
+
+
+def feed_url(query):
+    """RSS search URL for ``query`` built from ``NEWS_RSS_URL``."""
+    return settings.NEWS_RSS_URL.format(query=urllib.parse.quote(query))
+
+
+def fetch_feed(url, timeout):
+    """Parsed feed for ``url`` through the shared FeedCache; ``timeout`` bounds connect and each read."""
+    return get_feed_cache().fetch(url, timeout)
+
+
+def get_relevant_articles(query, rss_feed_url, timeout=10):
+    """Fetch up to NEWS_ARTICLES_PER_QUERY titled entries for ``query``; [] on any error."""
+    try:
+        feed = fetch_feed(rss_feed_url, timeout)
+    except Exception as e:
+        logger.error(f"[get_relevant_articles] Error fetching articles for query '{query}': {str(e)}")
+        return []
+
+    if feed.get('bozo'):
+        logger.warning(f"[get_relevant_articles] Feed parse warning for '{query}': {feed.get('bozo_exception')}")
+    relevant_articles = [e for e in feed.entries[:settings.NEWS_ARTICLES_PER_QUERY] if e.get('title')]
+    logger.info(f"[get_relevant_articles] query='{query}' rss_entries={len(feed.entries)} returned={len(relevant_articles)}")
+    return relevant_articles
+
+
+def backoff_delay(attempt, base=0.25, cap=2.0):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def fetch_articles(queries, enough=None, query_timeout=None, deadline=None, max_rounds=None,
+                   fetch=get_relevant_articles):
+    """Fetch articles for ``queries`` concurrently.
+
+    Returns ``(articles, rounds, timed_out)``. Articles keep the priority
+    order of ``queries`` (entities before full text before keywords) and stop
+    at ``enough``. ``deadline`` is in seconds from now and covers every round,
+    including backoff sleeps; ``timed_out`` says queries of the last round
+    were abandoned, or rounds skipped, because time ran out.
+    """
+    enough = enough or settings.NEWS_ENOUGH_ARTICLES
+    query_timeout = query_timeout or settings.NEWS_QUERY_TIMEOUT_S
+    max_rounds = max_rounds or settings.NEWS_MAX_ROUNDS
+    stop_at = time.monotonic() + (deadline or settings.NEWS_DEADLINE_S)
+    pool = _get_pool()
+
+    found = {}
+    pending_queries = list(dict.fromkeys(q for q in queries if q))
+    rounds = 0
+    timed_out = False
+    while pending_queries and rounds < max_rounds:
+        remaining = stop_at - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            break
+        rounds += 1
+        timeout = min(query_timeout, remaining)
+        logger.info(f"[fetch_articles] Round {rounds}/{max_rounds}: {len(pending_queries)} queries, timeout {timeout:.1f}s")
+        futures = {pool.submit(fetch, query, feed_url(query), timeout): query for query in pending_queries}
+        round_ends = time.monotonic() + timeout
+        not_done = set(futures)
+        while not_done and sum(map(len, found.values())) < enough:
+            left = round_ends - time.monotonic()
+            if left <= 0:
+                break
+            done, not_done = wait(not_done, timeout=left, return_when=FIRST_COMPLETED)
+            for future in done:
+                articles = future.result()
+                if articles:
+                    found[futures[future]] = articles
+        for future in not_done:
+            # Queued fetches never start; running ones finish within their own timeout.
+            future.cancel()
+        if not_done:
+            logger.info(f"[fetch_articles] Abandoned {len(not_done)} outstanding queries")
+        # Only the latest round counts; abandoned because enough articles arrived is a success, not a timeout.
+        timed_out = bool(not_done) and sum(map(len, found.values())) < enough
+
+        if sum(map(len, found.values())) >= enough:
+            break
+        pending_queries = [q for q in pending_queries if q not in found]
+        if found or not pending_queries or rounds >= max_rounds:
+            break
+        delay = min(backoff_delay(rounds - 1), stop_at - time.monotonic())
+        if delay <= 0:
+            timed_out = True
+            break
+        logger.info(f"[fetch_articles] No articles yet, retrying in {delay:.2f}s")
+        time.sleep(delay)
+
+    articles = [a for q in queries if q in found for a in found.pop(q)]
+    return articles[:enough], rounds, timed_out
@@ -0,0 +1,110 @@
+"""Token-budgeted evidence for the Groq prompts.
+
+The News prompt used to concatenate up to ten article titles and summaries
+plus the whole Wikipedia summary, so its size (and the LLM's latency and
+cost) had no upper bound. ``build_news_context`` fills fixed budgets instead:
+
+* articles, in relevance order, share ``PROMPT_ARTICLE_TOKENS``; each one
+  gets at most ``PROMPT_ARTICLE_MAX_TOKENS``, so the best evidence is kept
+  whole and the tail is cut first;
+* background (Wikipedia) gets ``PROMPT_BACKGROUND_TOKENS`` plus whatever the
+  articles left unused;
+* nothing may push the whole prompt past ``PROMPT_MAX_TOKENS``.
+
+Text is cut at sentence boundaries, falling back to word boundaries for a
+single over-long sentence. Token counts are estimates (see ``tokens.py``).
+"""
+import re
+from collections import namedtuple
+
+from django.conf import settings
+
+from .tokens import estimate_tokens
+
+_TAG_RE = re.compile('<.*?>')
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+ELLIPSIS = '…'
+
+NewsContext = namedtuple('NewsContext', 'articles background report')
+
+
+def clean_html(raw_html):
+    """Remove HTML tags from summary text."""
+    return _TAG_RE.sub('', raw_html).strip()
+
+
+def truncate_tokens(text, budget):
+    """Longest prefix of ``text`` within ``budget`` tokens, cut at a sentence end if possible.
+
+    Returns ``(text, tokens)``.
+    """
+    tokens = estimate_tokens(text)
+    if tokens <= budget:
+        return text, tokens
+    if budget <= 0:
+        return '', 0
+    kept, used = [], 0
+    for sentence in _SENTENCE_RE.split(text):
+        cost = estimate_tokens(sentence)
+        if used + cost > budget:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return ' '.join(kept), used
+    # A single sentence longer than the budget: cut between words.
+    words, used = [], 1  # the ellipsis
+    for word in text.split():
+        cost = estimate_tokens(word)
+        if used + cost > budget:
+            break
+        words.append(word)
+        used += cost
+    return (' '.join(words) + ELLIPSIS, used) if words else ('', 0)
+
+
+def claim_for_prompt(text):
+    """The claim itself, capped at ``PROMPT_CLAIM_TOKENS``."""
+    return truncate_tokens(text, settings.PROMPT_CLAIM_TOKENS)[0]
+
+
+def build_news_context(articles, background, reserved_tokens):
+    """Budgeted article and background text for the News prompt.
+
+    ``articles`` must already be in relevance order. ``reserved_tokens`` is
+    everything else in the prompt (system message, template, claim).
+    """
+    room = max(0, settings.PROMPT_MAX_TOKENS - reserved_tokens)
+    article_budget = min(settings.PROMPT_ARTICLE_TOKENS, room)
+    entries, article_tokens, truncated = [], 0, 0
+    for article in articles:
+        remaining = article_budget - article_tokens
+        cap = min(settings.PROMPT_ARTICLE_MAX_TOKENS, remaining)
+        title = clean_html(article.get('title', 'No title'))
+        header = f"Title: {title}\nSummary: "
+        header_tokens = estimate_tokens(header)
+        if header_tokens >= cap:
+            break
+        full_summary = clean_html(article.get('summary', 'No summary'))
+        summary, summary_tokens = truncate_tokens(full_summary, cap - header_tokens)
+        if summary != full_summary:
+            truncated += 1
+        entries.append(header + summary)
+        article_tokens += header_tokens + summary_tokens
+
+    background_budget = min(settings.PROMPT_BACKGROUND_TOKENS + (article_budget - article_tokens),
+                            room - article_tokens)
+    background_text, background_tokens = truncate_tokens(background or '', background_budget)
+    report = {
+        'articles_in_prompt': len(entries),
+        'articles_truncated': truncated,
+        'article_tokens': article_tokens,
+        'background_tokens': background_tokens,
+        'background_truncated': background_tokens < estimate_tokens(background or ''),
+    }
+    return NewsContext("\n".join(entries), background_text, report)
+
+
+def prompt_tokens(messages):
+    """Estimated prompt size of a chat ``messages`` list (content plus ~4 tokens of framing each)."""
+    return sum(estimate_tokens(m['content']) + 4 for m in messages)
@@ -0,0 +1,164 @@
+"""Central, lazily populated registry of the models the app serves.
+
+Nothing is loaded at import time. ``registry.get(name)`` loads a model on
+first use (``MODEL_LOADING = 'lazy'``). With ``MODEL_LOADING = 'preload'`` the
+WSGI entry point calls ``registry.preload()`` in the gunicorn master before
+workers fork, so workers share the weights copy-on-write.
+
+Loaders only ever read local files: the classifier and tokenizer come from
+``CLASSIFIER_MODEL_DIR`` and Whisper checkpoints must already be present in
+``WHISPER_DOWNLOAD_ROOT``; a missing checkpoint is reported, never fetched.
+With ``MODEL_SERVER_SOCKET`` set, 'classifier', 'spacy' and 'whisper' resolve
+to proxies for the model server process instead (``modelserver.py``).
+"""
+import gc
+import logging
+import os
+import resource
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Belt and braces: the hub clients must not reach out at startup either.
+os.environ.setdefault('HF_HUB_OFFLINE', '1')
+os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+
+
+def memory_usage_mb(pid='self'):
+    """Return ``{'rss', 'pss'}`` for this process (or ``pid``) in MiB (pss is None off Linux).
+
+    RSS counts shared copy-on-write pages in every worker; PSS splits them
+    between the processes sharing them, so it is the fair per-worker number.
+    """
+    usage = {'rss': None, 'pss': None}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss'):
+                    usage[key.lower()] = int(value.split()[0]) / 1024
+    except OSError:
+        if pid != 'self':
+            return usage
+        # ru_maxrss is KiB on Linux, bytes on macOS; only the peak is available.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage['rss'] = peak / (1024 * 1024) if peak > 1 << 30 else peak / 1024
+    return usage
+
+
+class ModelRegistry:
+    """Thread-safe name -> model cache backed by registered loader functions."""
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._locks = {}
+        self.load_times = {}
+
+    def register(self, name, loader):
+        """Register ``loader()`` as the way to build model ``name``."""
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def loaded(self):
+        return sorted(self._models)
+
+    def get(self, name):
+        """Return model ``name``, loading it on first use."""
+        try:
+            return self._models[name]
+        except KeyError:
+            pass
+        if name not in self._loaders:
+            raise KeyError(f"No model registered under '{name}'")
+        with self._locks[name]:
+            if name not in self._models:
+                started = time.perf_counter()
+                model = self._loaders[name]()
+                elapsed = time.perf_counter() - started
+                self.load_times[name] = elapsed
+                self._models[name] = model
+                logger.info("[registry] loaded %s in %.2fs (rss=%.0f MiB)",
+                            name, elapsed, memory_usage_mb()['rss'])
+        return self._models[name]
+
+    def preload(self, names=None):
+        """Load ``names`` (default: every registered model) now.
+
+        Intended for the gunicorn master before fork. ``gc.freeze()`` moves
+        the loaded objects out of the collector's reach so later collections
+        in the workers do not touch (and un-share) their pages.
+        """
+        started = time.perf_counter()
+        for name in names or list(self._loaders):
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error("[registry] preload of %s failed: %s", name, e)
+        gc.collect()
+        gc.freeze()
+        logger.info("[registry] preloaded %s in %.2fs", sorted(self._models), time.perf_counter() - started)
+
+
+registry = ModelRegistry()
+
+
+def _load_classifier():
+    if settings.MODEL_SERVER_SOCKET:
+        from .modelserver import RemoteClassifier, get_model_client
+        return RemoteClassifier(get_model_client())
+    from .inference import load_backend
+    return load_backend(
+        settings.CLASSIFIER_BACKEND,
+        settings.CLASSIFIER_MODEL_DIR,
+        buckets=settings.CLASSIFIER_SEQ_BUCKETS,
+    )
+
+
+def _load_spacy():
+    if settings.MODEL_SERVER_SOCKET:
+        from .modelserver import RemoteNER, get_model_client
+        return RemoteNER(get_model_client())
+    from .ner import load_pipeline
+    return load_pipeline(settings.SPACY_MODEL, trimmed=settings.SPACY_NER_ONLY)
+
+
+def _load_embedder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(settings.VERDICT_CACHE_MODEL, device='cpu')
+
+
+def _load_whisper_service():
+    """Build the shared WhisperService, or return None if the checkpoint is missing."""
+    if settings.MODEL_SERVER_SOCKET:
+        from .modelserver import RemoteWhisperService, get_model_client
+        return RemoteWhisperService(get_model_client(), max_workers=settings.MODEL_SERVER_POOL_SIZE)
+    import whisper
+    from .whisper_service import WhisperService
+
+    size = settings.WHISPER_MODEL_SIZE
+    url = whisper._MODELS.get(size)
+    if url is None:
+        raise ValueError(f"Unknown Whisper model size '{size}'")
+    checkpoint = os.path.join(settings.WHISPER_DOWNLOAD_ROOT, os.path.basename(url))
+    if not os.path.exists(checkpoint):
+        # Loading would download ~100MB-3GB at request time; refuse instead.
+        logger.error("[registry] Whisper checkpoint %s missing; run 'manage.py fetch_models'", checkpoint)
+        return None
+    models = [
+        whisper.load_model(size, download_root=settings.WHISPER_DOWNLOAD_ROOT)
+        for _ in range(max(1, settings.WHISPER_INSTANCES))
+    ]
+    return WhisperService(models, queue_size=settings.WHISPER_QUEUE_SIZE)
+
+
+registry.register('classifier', _load_classifier)
+registry.register('spacy', _load_spacy)
+registry.register('embedder', _load_embedder)
+registry.register('whisper', _load_whisper_service)
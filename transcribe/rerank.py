@@ -0,0 +1,86 @@
+"""Relevance reranking and near-duplicate removal for retrieved news articles.
+
+The RSS queries return the first few entries of each feed, often the same
+story from several outlets. ``rerank_articles`` embeds the claim together with
+every candidate's title and summary in one batch, orders the candidates by
+cosine similarity to the claim and walks down that list, dropping any article
+too similar to one already kept. The top ``RERANK_TOP_K`` survivors go into the
+prompt, and the report says how many prompt tokens that saved.
+"""
+import logging
+import re
+
+import numpy as np
+from django.conf import settings
+
+from .prompting import clean_html
+from .tokens import estimate_tokens
+from .verdict_cache import embed_many
+
+logger = logging.getLogger(__name__)
+
+def article_text(article):
+    """Title and summary of a feed entry, without markup."""
+    title = clean_html(article.get('title', ''))
+    summary = clean_html(article.get('summary', ''))
+    return f"{title}. {summary}" if summary else title
+
+
+def _title_key(article):
+    # Google News titles end in " - Outlet"; the same wire story differs only there.
+    title = article.get('title', '').rsplit(' - ', 1)[0]
+    return ' '.join(re.sub(r'\W+', ' ', title.casefold()).split())
+
+
+def rerank_articles(claim, articles, top_k=None, duplicate_threshold=None):
+    """Return ``(selected_articles, report)``.
+
+    ``report`` has ``candidates``, ``kept``, ``duplicates_removed``,
+    ``tokens_before``, ``tokens_after`` and ``tokens_saved``, where
+    "before" is what the old ``articles[:10]`` prompt would have used.
+    Without the embedding model, exact duplicate titles are still removed
+    and the retrieval order is kept.
+    """
+    top_k = top_k or settings.RERANK_TOP_K
+    duplicate_threshold = duplicate_threshold or settings.RERANK_DUPLICATE_THRESHOLD
+    texts = [article_text(a) for a in articles]
+    selected, duplicates = [], 0
+    try:
+        vectors = embed_many([claim] + texts)
+    except Exception as e:
+        logger.warning("[rerank] embedding unavailable (%s); keeping retrieval order", e)
+        seen = set()
+        for article in articles:
+            key = _title_key(article)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            selected.append(article)
+            if len(selected) == top_k:
+                break
+    else:
+        claim_vector, candidates = vectors[0], vectors[1:]
+        scores = candidates @ claim_vector
+        kept = []
+        for index in np.argsort(-scores):
+            if kept and float(np.max(candidates[kept] @ candidates[index])) >= duplicate_threshold:
+                duplicates += 1
+                continue
+            kept.append(int(index))
+            if len(kept) == top_k:
+                break
+        selected = [articles[i] for i in kept]
+
+    tokens_before = sum(estimate_tokens(t) for t in texts[:10])
+    tokens_after = sum(estimate_tokens(article_text(a)) for a in selected)
+    report = {
+        'candidates': len(articles),
+        'kept': len(selected),
+        'duplicates_removed': duplicates,
+        'tokens_before': tokens_before,
+        'tokens_after': tokens_after,
+        'tokens_saved': max(0, tokens_before - tokens_after),
+    }
+    logger.info("[rerank] %s", report)
+    return selected, report
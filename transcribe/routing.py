@@ -3,4 +3,5 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r"ws/live-transcribe/$", consumers.TranscriptionConsumer.as_asgi()),
+    re_path(r"ws/jobs/(?P<job_id>[0-9a-f-]{36})/$", consumers.JobConsumer.as_asgi()),
 ]
@@ -99,6 +99,16 @@
     });
   }
 
+  async function waitForJob(job) {
+    while (job.status === 'queued' || job.status === 'running') {
+      await new Promise(resolve => setTimeout(resolve, 1000));
+      const res = await fetch(job.status_url, { headers: { 'Accept': 'application/json' } });
+      job = { ...job, ...(await res.json()) };
+    }
+    if (job.status !== 'done' && !job.error) job.error = `Transcription ${job.status}`;
+    return job;
+  }
+
   async function uploadMedia(file) {
     appendMsg('user', `📎 ${file.name}`);
     const form = new FormData();
@@ -114,8 +124,12 @@
       body: form
     });
     const isJson = res.headers.get('content-type')?.includes('application/json');
-    const data = isJson ? await res.json() : { error: await res.text() };
+    let data = isJson ? await res.json() : { error: await res.text() };
     console.log('[chat] /detect response', res.status, data);
+    if (res.status === 202 && data.job_id) {
+      data = await waitForJob(data);
+      console.log('[chat] /detect job finished', data);
+    }
     if (!res.ok || data.error) {
       appendMsg('assistant', `Upload failed: ${data.error || ('HTTP ' + res.status)}`);
       return;
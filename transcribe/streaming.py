@@ -0,0 +1,185 @@
+"""Incremental decoding and voice-activity segmentation for live audio.
+
+``StreamingDecoder`` keeps one ffmpeg process per websocket: the browser's
+webm/opus chunks go into its stdin as they arrive and 16 kHz mono PCM comes
+out of its stdout. ``EnergyVAD`` cuts that PCM into utterances on pauses, so
+each one can be transcribed while the user is still speaking.
+"""
+import asyncio
+import logging
+
+import numpy as np
+
+from .audio import SAMPLE_RATE, ffmpeg_command
+
+logger = logging.getLogger(__name__)
+
+
+class EnergyVAD:
+    """Frame-energy voice-activity detector with an adaptive noise floor.
+
+    A frame is speech when its RMS is above both ``min_rms`` and
+    ``ratio`` x the running noise floor. An utterance ends after
+    ``silence_ms`` of non-speech, or is cut at ``max_segment_s``.
+    Utterances with less than ``min_speech_ms`` of speech are dropped.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_ms=30, ratio=3.0, min_rms=0.01,
+                 silence_ms=600, min_speech_ms=250, max_segment_s=15.0, preroll_ms=200):
+        self.sample_rate = sample_rate
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_frames = int(max_segment_s * 1000 / frame_ms)
+        self.preroll_frames = preroll_ms // frame_ms
+        self.noise = None
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._preroll = []
+        self._segment = []
+        self._speech_frames = 0
+        self._silent_run = 0
+
+    def feed(self, samples):
+        """Add PCM samples; return the list of utterances completed by them."""
+        buffer = np.concatenate([self._pending, samples]) if self._pending.size else samples
+        usable = (len(buffer) // self.frame) * self.frame
+        self._pending = buffer[usable:].copy()
+        if not usable:
+            return []
+        frames = buffer[:usable].reshape(-1, self.frame)
+        energies = np.sqrt(np.mean(frames * frames, axis=1))
+        finished = []
+        for frame, rms in zip(frames, energies):
+            segment = self._step(frame, float(rms))
+            if segment is not None:
+                finished.append(segment)
+        return finished
+
+    def flush(self):
+        """Return whatever utterance is still open (end of stream), or None."""
+        if self._pending.size and self._segment:
+            self._segment.append(self._pending)
+        self._pending = np.zeros(0, dtype=np.float32)
+        return self._close()
+
+    def _is_speech(self, rms):
+        if self.noise is None:
+            self.noise = rms
+        speech = rms > max(self.min_rms, self.noise * self.ratio)
+        if not speech:
+            # Track the background level slowly so a pause does not reset it.
+            self.noise = 0.95 * self.noise + 0.05 * rms
+        return speech
+
+    def _step(self, frame, rms):
+        speech = self._is_speech(rms)
+        if not self._segment:
+            if not speech:
+                self._preroll.append(frame)
+                if len(self._preroll) > self.preroll_frames:
+                    self._preroll.pop(0)
+                return None
+            self._segment = self._preroll + [frame]
+            self._preroll = []
+            self._speech_frames = 1
+            self._silent_run = 0
+            return None
+        self._segment.append(frame)
+        if speech:
+            self._speech_frames += 1
+            self._silent_run = 0
+        else:
+            self._silent_run += 1
+        if self._silent_run >= self.silence_frames or len(self._segment) >= self.max_frames:
+            return self._close()
+        return None
+
+    def _close(self):
+        segment, speech_frames = self._segment, self._speech_frames
+        self._segment, self._speech_frames, self._silent_run = [], 0, 0
+        if not segment or speech_frames < self.min_speech_frames:
+            return None
+        return np.concatenate(segment)
+
+
+class StreamingDecoder:
+    """Long-lived ffmpeg process turning a webm/opus byte stream into PCM.
+
+    ``on_samples`` is called from the event loop with each float32 block as
+    ffmpeg produces it.
+    """
+
+    read_size = 16000 * 2 // 10  # ~100 ms of s16le audio
+
+    def __init__(self, on_samples, sample_rate=SAMPLE_RATE):
+        self.on_samples = on_samples
+        self.sample_rate = sample_rate
+        self._proc = None
+        self._reader = None
+        self._stderr = None
+
+    async def start(self):
+        self._proc = await asyncio.create_subprocess_exec(
+            *ffmpeg_command("pipe:0", self.sample_rate),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        self._reader = asyncio.create_task(self._read())
+        self._stderr = asyncio.create_task(self._proc.stderr.read())
+
+    @property
+    def started(self):
+        return self._proc is not None
+
+    async def write(self, data):
+        if self._proc is None:
+            await self.start()
+        try:
+            self._proc.stdin.write(data)
+            await self._proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            logger.error("[StreamingDecoder] ffmpeg closed its input: %s", await self._error())
+
+    async def _read(self):
+        leftover = b""
+        while True:
+            chunk = await self._proc.stdout.read(self.read_size)
+            if not chunk:
+                break
+            chunk = leftover + chunk
+            usable = len(chunk) - (len(chunk) % 2)
+            leftover = chunk[usable:]
+            if usable:
+                samples = np.frombuffer(chunk[:usable], np.int16).astype(np.float32) / 32768.0
+                await self.on_samples(samples)
+
+    async def _error(self):
+        if self._stderr is None:
+            return ""
+        try:
+            return (await asyncio.wait_for(asyncio.shield(self._stderr), 1)).decode(errors="ignore").strip()
+        except asyncio.TimeoutError:
+            return ""
+
+    async def finish(self):
+        """Close ffmpeg's input and wait until every decoded sample was delivered."""
+        if self._proc is None:
+            return
+        if not self._proc.stdin.is_closing():
+            self._proc.stdin.close()
+        await self._reader
+        returncode = await self._proc.wait()
+        if returncode != 0:
+            logger.error("[StreamingDecoder] ffmpeg exited with %s: %s", returncode, await self._error())
+        self._proc = None
+
+    def kill(self):
+        """Abort decoding (socket went away)."""
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._proc is not None and self._proc.returncode is None:
+            self._proc.kill()
+        self._proc = None
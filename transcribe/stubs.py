@@ -0,0 +1,280 @@
+"""Local stand-ins for the external services verify_claim talks to.
+
+They let the retrieval code be exercised, timed and load-tested without the
+network: point the matching setting (e.g. ``NEWS_RSS_URL``) at the server and
+tune its latency and failure rate from the command line. ``StubRecognizer``
+and ``StubWhisperModel`` do the same in-process for live transcription.
+"""
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+logger = logging.getLogger(__name__)
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server carrying the stand-in's knobs for its handler."""
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, latency=0.0, jitter=0.0, fail_rate=0.0, empty_rate=0.0, items=5,
+                 tail_rate=0.0, tail_latency=0.0):
+        super().__init__(address, handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.fail_rate = fail_rate
+        self.empty_rate = empty_rate
+        self.items = items
+        self.published = formatdate(usegmt=True)
+        self.requests = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self):
+        with self._count_lock:
+            self.requests += 1
+
+    def delay(self):
+        """Sleep for one response's latency: base +/- jitter, plus the tail for a ``tail_rate`` share."""
+        seconds = self.latency + random.uniform(-self.jitter, self.jitter)
+        if random.random() < self.tail_rate:
+            seconds += self.tail_latency
+        time.sleep(max(0.0, seconds))
+
+    def start(self):
+        """Serve from a daemon thread (for harnesses); returns the server."""
+        threading.Thread(target=self.serve_forever, name="stub-server", daemon=True).start()
+        return self
+
+
+class RSSHandler(BaseHTTPRequestHandler):
+    """``GET /rss/search?q=...`` answers with a small Google News-shaped RSS feed.
+
+    Responses carry an ETag and Last-Modified; a matching If-None-Match gets a 304.
+    """
+
+    def do_GET(self):
+        server = self.server
+        server.count()
+        server.delay()
+        if random.random() < server.fail_rate:
+            self.send_error(503, "stub failure")
+            return
+        query = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+        count = 0 if random.random() < server.empty_rate else server.items
+        etag = '"%s"' % hashlib.sha1(f"{query}:{count}".encode()).hexdigest()[:16]
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        body = rss_feed(query, count, server.published).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', server.published)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("[stub] %s - %s", self.address_string(), format % args)
+
+
+def rss_feed(query, count, published=None):
+    """An RSS 2.0 document with ``count`` items mentioning ``query``.
+
+    Titles follow Google News' "Headline - Outlet" shape, and every headline is
+    carried by two outlets, like a syndicated wire story.
+    """
+    now = published or formatdate(usegmt=True)
+    items = "".join(
+        f"<item><title>{escape(query)} update {i // 2 + 1} - Outlet {i % 2 + 1}</title>"
+        f"<link>https://news.example.test/{i + 1}</link>"
+        f"<description>&lt;p&gt;Report {i + 1} about {escape(query)}.&lt;/p&gt;</description>"
+        f"<pubDate>{now}</pubDate></item>"
+        for i in range(count)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<rss version="2.0"><channel><title>"{escape(query)}" - Stub News</title>'
+        f'<link>https://news.example.test/</link><description>stub</description>{items}</channel></rss>'
+    )
+
+
+def rss_server(host='127.0.0.1', port=0, **knobs):
+    """Bind a stand-in RSS server (port 0 picks a free one)."""
+    return StubServer((host, port), RSSHandler, **knobs)
+
+
+class WikiHandler(BaseHTTPRequestHandler):
+    """``GET /w/api.php?action=query`` shaped like MediaWiki's formatversion=2 output.
+
+    ``titles`` (``|``-separated) and ``generator=search`` are supported. Titles
+    are title-cased through ``normalized``; a deterministic ``empty_rate``
+    share of them is reported missing, and titles ending in ``(disambiguation)``
+    come back as disambiguation pages.
+    """
+
+    def do_GET(self):
+        server = self.server
+        server.count()
+        server.delay()
+        if random.random() < server.fail_rate:
+            self.send_error(503, "stub failure")
+            return
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        if params.get('generator') == 'search':
+            titles = [params.get('gsrsearch', '').title()][:int(params.get('gsrlimit', 1))]
+            query = {}
+        else:
+            asked = [t for t in params.get('titles', '').split('|') if t]
+            titles = [t.title() for t in asked]
+            query = {'normalized': [{'from': a, 'to': t} for a, t in zip(asked, titles) if a != t]}
+        query['pages'] = [wiki_page(title, server.empty_rate) for title in titles]
+        body = json.dumps({'batchcomplete': True, 'query': query}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("[stub] %s - %s", self.address_string(), format % args)
+
+
+def wiki_page(title, missing_rate=0.0):
+    """One ``pages`` entry; whether it is missing depends only on the title."""
+    bucket = int(hashlib.sha1(title.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+    if bucket < missing_rate:
+        return {'ns': 0, 'title': title, 'missing': True}
+    page = {'pageid': int(bucket * 10 ** 8), 'ns': 0, 'title': title,
+            'extract': f"{title} is the subject of a stub encyclopedia article."}
+    if title.lower().endswith('(disambiguation)'):
+        page['pageprops'] = {'disambiguation': ''}
+    return page
+
+
+def wiki_server(host='127.0.0.1', port=0, **knobs):
+    """Bind a stand-in MediaWiki API server (port 0 picks a free one)."""
+    return StubServer((host, port), WikiHandler, **knobs)
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible ``POST .../chat/completions`` answering with a fact-check verdict.
+
+    Serves both ``/v1/`` and Groq's ``/openai/v1/`` prefixes. The verdict is
+    JSON in the shape the verify prompts ask for; ``is_true`` is derived from a
+    hash of the last message, so the same claim always gets the same answer.
+    """
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def do_POST(self):
+        server = self.server
+        server.count()
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._reply(400, {'error': {'message': 'invalid JSON'}})
+            return
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._reply(404, {'error': {'message': f'unknown path {self.path}'}})
+            return
+        server.delay()
+        if random.random() < server.fail_rate:
+            self._reply(503, {'error': {'message': 'stub failure', 'type': 'server_error'}})
+            return
+        messages = request.get('messages') or [{'content': ''}]
+        prompt = messages[-1].get('content', '')
+        verdict = int(hashlib.sha1(prompt.encode()).hexdigest()[:2], 16) % 3
+        content = json.dumps({
+            'is_true': (True, False, None)[verdict],
+            'confidence': 70 + verdict * 10,
+            'explanation': "Stub verdict." if verdict < 2 else "I don't know. Stub cannot verify this.",
+        })
+        prompt_tokens = sum(len(m.get('content', '').split()) for m in messages)
+        self._reply(200, {
+            'id': f'chatcmpl-stub-{server.requests}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'stub'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': len(content.split()),
+                      'total_tokens': prompt_tokens + len(content.split())},
+        })
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("[stub] %s - %s", self.address_string(), format % args)
+
+
+def llm_server(host='127.0.0.1', port=0, **knobs):
+    """Bind a stand-in OpenAI/Groq chat completions server (port 0 picks a free one)."""
+    return StubServer((host, port), ChatHandler, **knobs)
+
+
+class StubRecognizer:
+    """Stand-in for ``speech_recognition.Recognizer`` that never leaves the machine.
+
+    ``recognize_google`` sleeps ``latency`` seconds and answers with a
+    placeholder; a ``miss_rate`` share of calls raises ``UnknownValueError``
+    so the consumer's Whisper fallback gets exercised too.
+    """
+
+    def __init__(self, latency=0.3, jitter=0.0, miss_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.miss_rate = miss_rate
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def recognize_google(self, audio_data, **kwargs):
+        import speech_recognition as sr
+        with self._lock:
+            self.calls += 1
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if random.random() < self.miss_rate:
+            raise sr.UnknownValueError()
+        seconds = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        return f"stub transcript of {seconds:.1f} seconds"
+
+
+class StubWhisperModel:
+    """Stand-in for a loaded Whisper model: ``transcribe`` takes ``rtf`` seconds per second of audio."""
+
+    def __init__(self, rtf=0.3, n_mels=80, sample_rate=16000):
+        self.rtf = rtf
+        self.sample_rate = sample_rate
+        self.dims = type('Dims', (), {'n_mels': n_mels})()
+        self.device = 'cpu'
+        self.calls = 0
+
+    def transcribe(self, audio, **options):
+        self.calls += 1  # one worker thread per instance, see WhisperService
+        seconds = len(audio) / self.sample_rate
+        time.sleep(seconds * self.rtf)
+        return {'text': f" stub whisper transcript of {seconds:.1f} seconds", 'language': 'en', 'segments': []}
@@ -0,0 +1,6 @@
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'truthtell.settings')
+django.setup()
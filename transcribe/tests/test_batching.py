@@ -0,0 +1,92 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from transcribe.batching import MicroBatcher
+
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def make(predict_fn, **kwargs):
+        batcher = MicroBatcher(predict_fn, **kwargs)
+        batchers.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in batchers:
+        batcher.close()
+
+
+def test_concurrent_inputs_share_a_batch(make_batcher):
+    sizes = []
+
+    def predict(items):
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = make_batcher(predict, max_batch=8, wait_ms=50)
+    assert batcher.predict_many(range(5), timeout=2) == [0, 2, 4, 6, 8]
+    assert sizes == [5]
+    assert batcher.stats.snapshot()['max_batch_size'] == 5
+
+
+def test_predict_times_out_while_the_batch_is_still_running(make_batcher):
+    release = threading.Event()
+    batcher = make_batcher(lambda items: release.wait(2) and items, wait_ms=0)
+    with pytest.raises(FutureTimeoutError):
+        batcher.predict('slow', timeout=0.05)
+    release.set()
+
+
+def test_cancelled_inputs_are_dropped(make_batcher):
+    seen = []
+    gate = threading.Event()
+
+    def predict(items):
+        gate.wait(2)
+        seen.extend(items)
+        return items
+
+    batcher = make_batcher(predict, max_batch=1, wait_ms=0)
+    first = batcher.submit('first')
+    time.sleep(0.05)  # 'first' is now running, so the next one waits in the queue
+    queued = batcher.submit('gave up')
+    assert queued.cancel()
+    gate.set()
+    assert first.result(timeout=2) == 'first'
+    assert batcher.predict('after', timeout=2) == 'after'
+    assert seen == ['first', 'after']
+
+
+def test_predict_fn_error_fails_every_caller_in_the_batch(make_batcher):
+    def predict(items):
+        raise ValueError("model exploded")
+
+    batcher = make_batcher(predict, max_batch=4, wait_ms=50)
+    futures = [batcher.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError, match="model exploded"):
+            future.result(timeout=2)
+    assert batcher.stats.snapshot()['errors'] == 1
+    # The worker survives the failure.
+    batcher.predict_fn = lambda items: items
+    assert batcher.predict('ok', timeout=2) == 'ok'
+
+
+def test_wrong_number_of_results_is_an_error(make_batcher):
+    batcher = make_batcher(lambda items: items[:-1], max_batch=4, wait_ms=50)
+    futures = [batcher.submit(i) for i in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="1 results for 2 inputs"):
+            future.result(timeout=2)
+
+
+def test_closed_batcher_rejects_new_inputs(make_batcher):
+    batcher = make_batcher(lambda items: items)
+    batcher.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit('late')
@@ -0,0 +1,64 @@
+import argparse
+
+import pytest
+
+pytest.importorskip('pandas')
+pytest.importorskip('sklearn')
+pytest.importorskip('accelerate')
+
+import numpy as np
+import torch
+from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast, DataCollatorWithPadding
+
+from classifier import TokenizedCorpus, split
+from distill import build_trainer
+
+VOCAB = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]', 'the', 'sun', 'rises', 'in', 'east', 'west', 'moon', 'is',
+         'made', 'of', 'cheese', 'rock']
+CLAIMS = ['the sun rises in the east', 'the sun rises in the west', 'the moon is made of rock',
+          'the moon is made of cheese']
+
+
+@pytest.fixture
+def trainer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'vocab.txt').write_text('\n'.join(VOCAB) + '\n')
+    tokenizer = BertTokenizerFast(vocab_file=str(tmp_path / 'vocab.txt'))
+    (tmp_path / 'data.csv').write_text('text,label\n' + ''.join(
+        f'{claim},{i % 2}\n' for _ in range(5) for i, claim in enumerate(CLAIMS)))
+    corpus, _ = TokenizedCorpus.build('data.csv', tokenizer, max_length=32, cache_dir=tmp_path / 'cache')
+    train_idx, test_idx = split(len(corpus))
+    student = BertForSequenceClassification(BertConfig(
+        vocab_size=len(VOCAB), hidden_size=32, num_hidden_layers=1, num_attention_heads=2, intermediate_size=64,
+        num_labels=2))
+    teacher_logits = np.random.default_rng(0).normal(size=(len(corpus), 2)).astype(np.float32)
+    args = argparse.Namespace(epochs=1, batch_size=4, learning_rate=1e-4, seed=42, temperature=2.0, alpha=0.5)
+    return build_trainer(args, student, corpus, train_idx, test_idx, teacher_logits,
+                         DataCollatorWithPadding(tokenizer))
+
+
+def test_training_batches_carry_teacher_logits(trainer):
+    batch = next(iter(trainer.get_train_dataloader()))
+    assert batch['teacher_logits'].shape == (4, 2)
+
+    trainer.model.train()
+    loss = trainer.compute_loss(trainer.model, batch)
+    assert torch.isfinite(loss)
+
+
+def test_training_batch_without_teacher_logits_fails(trainer):
+    batch = next(iter(trainer.get_train_dataloader()))
+    del batch['teacher_logits']
+
+    trainer.model.train()
+    with pytest.raises(ValueError, match='teacher_logits'):
+        trainer.compute_loss(trainer.model, batch)
+
+
+def test_evaluation_needs_no_teacher_logits(trainer):
+    batch = next(iter(trainer.get_eval_dataloader()))
+    assert 'teacher_logits' not in batch
+
+    trainer.model.eval()
+    with torch.no_grad():
+        assert torch.isfinite(trainer.compute_loss(trainer.model, batch))
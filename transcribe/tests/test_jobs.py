@@ -0,0 +1,190 @@
+import threading
+from concurrent.futures import Future
+from datetime import timedelta
+
+import pytest
+from django.db import close_old_connections, connection
+from django.test import override_settings
+from django.utils import timezone
+
+from transcribe import jobs
+from transcribe.audio import AudioDecodeError
+from transcribe.executor import JobCancelled
+from transcribe.models import AudioJob
+from transcribe.uploads import UploadStore
+
+
+@pytest.fixture(scope='module')
+def test_database(tmp_path_factory):
+    # A file rather than :memory:, so worker threads get their own connections to the same database.
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    previous = test_settings.get('NAME')
+    test_settings['NAME'] = str(tmp_path_factory.mktemp('db') / 'test.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    yield
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+    test_settings['NAME'] = previous
+
+
+@pytest.fixture
+def db(test_database, tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, 'get_upload_store', lambda: UploadStore(tmp_path, quota_bytes=1 << 30))
+    with override_settings(JOBS_MAX_RUNNING=10, JOBS_LEASE_S=60, JOBS_RETRY_BACKOFF_S=5):
+        yield
+    AudioJob.objects.all().delete()
+
+
+def queued_job(**fields):
+    return AudioJob.objects.create(file_path='/nonexistent.mp3', file_name='audio.mp3', **fields)
+
+
+def expire_lease(job):
+    AudioJob.objects.filter(pk=job.pk).update(lease_expires=timezone.now() - timedelta(seconds=1))
+
+
+def test_only_one_of_two_workers_claims_a_job(db):
+    job = queued_job()
+    barrier = threading.Barrier(2)
+    claimed = {}
+
+    def worker(worker_id):
+        barrier.wait()
+        try:
+            claimed[worker_id] = jobs.claim(worker_id)
+        finally:
+            close_old_connections()
+
+    threads = [threading.Thread(target=worker, args=(f'w{i}',)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    winners = [worker_id for worker_id, claim in claimed.items() if claim is not None]
+    assert len(winners) == 1
+    job.refresh_from_db()
+    assert (job.status, job.worker, job.attempts) == (AudioJob.RUNNING, winners[0], 1)
+
+
+def test_running_job_is_not_claimed_again(db):
+    queued_job()
+    assert jobs.claim('w1') is not None
+    assert jobs.claim('w2') is None
+
+
+def test_claims_stop_at_max_running(db):
+    queued_job()
+    queued_job()
+    with override_settings(JOBS_MAX_RUNNING=1):
+        assert jobs.claim('w1') is not None
+        assert jobs.claim('w2') is None
+
+
+def test_progress_renews_the_lease(db):
+    queued_job()
+    job = jobs.claim('w1')
+    expire_lease(job)
+    jobs.Progress(job, 'w1')('transcribing', 0.5)
+    job.refresh_from_db()
+    assert job.lease_expires > timezone.now()
+    assert (job.stage, job.progress) == ('transcribing', 0.5)
+
+
+def test_await_renews_the_lease_while_waiting(db):
+    queued_job()
+    job = jobs.claim('w1')
+    future = Future()
+    threading.Timer(0.5, future.set_result, ('done',)).start()
+    reports = []
+
+    def progress(stage, fraction):
+        reports.append(stage)
+        jobs.Progress(job, 'w1')(stage, fraction)
+
+    with override_settings(JOBS_LEASE_S=0.3):
+        assert jobs._await(future, progress, 'decoding', lambda elapsed: 0.05) == 'done'
+    assert len(reports) >= 2
+
+
+def test_await_gives_up_after_its_timeout(db):
+    future = Future()
+    with override_settings(JOBS_LEASE_S=0.3), pytest.raises(TimeoutError, match='decoding took longer than 0.2s'):
+        jobs._await(future, lambda stage, fraction: None, 'decoding', lambda elapsed: 0.05, timeout=0.2)
+    assert future.cancelled()
+
+
+def test_expired_lease_is_requeued_and_reclaimed(db):
+    queued_job()
+    job = jobs.claim('w1')
+    expire_lease(job)
+    with override_settings(JOBS_RETRY_BACKOFF_S=0):
+        jobs.housekeeping()
+    job.refresh_from_db()
+    assert (job.status, job.worker, job.error) == (AudioJob.QUEUED, '', "worker stopped responding")
+
+    reclaimed = jobs.claim('w2')
+    assert (reclaimed.pk, reclaimed.worker, reclaimed.attempts) == (job.pk, 'w2', 2)
+    with pytest.raises(jobs.LeaseLost):
+        jobs.Progress(job, 'w1')('transcribing', 0.5)
+
+
+def test_cancel_stops_a_running_job_at_its_next_report(db):
+    queued_job()
+    job = jobs.claim('w1')
+    assert jobs.cancel(job.pk).cancel_requested
+    with pytest.raises(JobCancelled) as raised:
+        jobs.Progress(job, 'w1')('transcribing', 0.5)
+    assert not isinstance(raised.value, jobs.LeaseLost)
+
+
+def test_cancelled_run_finishes_as_cancelled(db, monkeypatch):
+    queued_job()
+    job = jobs.claim('w1')
+
+    def transcribe_file(path, progress):
+        jobs.cancel(job.pk)
+        progress('transcribing', 0.5)
+
+    monkeypatch.setattr(jobs, 'transcribe_file', transcribe_file)
+    jobs.run(job, 'w1')
+    job.refresh_from_db()
+    assert job.status == AudioJob.CANCELLED
+
+
+def test_deleted_job_raises_lease_lost(db):
+    queued_job()
+    job = jobs.claim('w1')
+    AudioJob.objects.filter(pk=job.pk).delete()
+    with pytest.raises(jobs.LeaseLost):
+        jobs.Progress(job, 'w1')('transcribing', 0.5)
+
+
+def test_retry_backs_off_then_fails_after_max_attempts(db):
+    queued_job(max_attempts=2)
+    job = jobs.claim('w1')
+    jobs._retry_or_fail(job, 'w1', "Transcription failed: boom")
+    job.refresh_from_db()
+    assert (job.status, job.stage, job.worker) == (AudioJob.QUEUED, 'retrying', '')
+    assert job.available_at > timezone.now() + timedelta(seconds=4)
+    assert jobs.claim('w1') is None  # not due yet
+
+    AudioJob.objects.filter(pk=job.pk).update(available_at=timezone.now())
+    job = jobs.claim('w2')
+    assert job.attempts == 2
+    jobs._retry_or_fail(job, 'w2', "Transcription failed: boom again")
+    job.refresh_from_db()
+    assert (job.status, job.error) == (AudioJob.FAILED, "Transcription failed: boom again")
+    assert job.finished_at is not None
+
+
+def test_undecodable_input_fails_without_retry(db, monkeypatch):
+    queued_job()
+    job = jobs.claim('w1')
+
+    def transcribe_file(path, progress):
+        raise AudioDecodeError("not audio")
+
+    monkeypatch.setattr(jobs, 'transcribe_file', transcribe_file)
+    jobs.run(job, 'w1')
+    job.refresh_from_db()
+    assert (job.status, job.attempts, job.error) == (AudioJob.FAILED, 1, "Conversion failed: not audio")
@@ -0,0 +1,89 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from transcribe.llm import CircuitBreaker, LLMClient, LLMTimeout, LLMUnavailable
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=3, cooldown=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record(False)
+    breaker.record(True)  # a success resets the count
+    for _ in range(2):
+        breaker.record(False)
+    assert breaker.state == 'closed'
+    breaker.record(False)
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+
+def test_breaker_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failures=1, cooldown=0.05)
+    breaker.record(False)
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == 'half-open'
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+
+
+def test_breaker_trial_failure_reopens_and_success_closes():
+    breaker = CircuitBreaker(failures=5, cooldown=0.05)
+    for _ in range(5):
+        breaker.record(False)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == 'open'
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+
+
+def test_inconclusive_trial_keeps_breaker_open_for_another_trial():
+    breaker = CircuitBreaker(failures=1, cooldown=0.05)
+    breaker.record(False)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(None)
+    assert breaker.state == 'half-open'
+    assert breaker.allow()
+
+
+class FakeGroq:
+    """Stands in for the Groq SDK client: answers after ``latency`` seconds."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, timeout, **kwargs):
+        if self.latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError()
+        time.sleep(self.latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='ok'))])
+
+
+def test_caller_shortened_timeouts_do_not_open_the_breaker():
+    client = LLMClient(FakeGroq(latency=0.3), timeout=1.0, breaker=CircuitBreaker(failures=2, cooldown=60))
+    for _ in range(3):
+        with pytest.raises(LLMTimeout):
+            client.chat([], model='m', timeout=0.1)
+    assert client.breaker.state == 'closed'
+    assert client.chat([], model='m') == 'ok'
+
+
+def test_full_timeouts_open_the_breaker():
+    client = LLMClient(FakeGroq(latency=1.0), timeout=0.2, breaker=CircuitBreaker(failures=2, cooldown=60))
+    for _ in range(2):
+        with pytest.raises(LLMTimeout):
+            client.chat([], model='m')
+    with pytest.raises(LLMUnavailable):
+        client.chat([], model='m')
+    assert client.stats()['latency']['rejected']['count'] == 1
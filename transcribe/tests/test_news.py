@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+from django.test import override_settings
+
+from transcribe import feedcache, news
+from transcribe.stubs import rss_server
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    delays = []
+    monkeypatch.setattr(news, 'backoff_delay', lambda attempt: delays.append(attempt) or 0.01)
+    return delays
+
+
+def test_stops_early_once_enough_articles_arrived():
+    started = {}
+    release = threading.Event()
+
+    def fetch(query, url, timeout):
+        started[query] = True
+        if query == 'slow':
+            release.wait(timeout)
+            return [{'title': 'late'}]
+        return [{'title': f'{query} {i}'} for i in range(3)]
+
+    began = time.monotonic()
+    articles, rounds, timed_out = news.fetch_articles(['a', 'slow', 'b'], enough=6, query_timeout=5, fetch=fetch)
+    release.set()
+    assert time.monotonic() - began < 2
+    assert rounds == 1
+    assert not timed_out
+    # Priority order of the queries, not completion order.
+    assert [a['title'] for a in articles] == ['a 0', 'a 1', 'a 2', 'b 0', 'b 1', 'b 2']
+
+
+def test_retries_only_empty_queries_with_backoff(no_backoff):
+    calls = []
+
+    def fetch(query, url, timeout):
+        calls.append(query)
+        if query == 'late' and calls.count('late') == 3:
+            return [{'title': 'found'}]
+        return []
+
+    articles, rounds, timed_out = news.fetch_articles(['late', 'never'], max_rounds=3, fetch=fetch)
+    assert [a['title'] for a in articles] == ['found']
+    assert rounds == 3
+    assert not timed_out
+    assert no_backoff == [0, 1]
+    assert calls.count('never') == 3
+
+
+def test_deadline_bounds_every_round(no_backoff):
+    def fetch(query, url, timeout):
+        time.sleep(timeout)
+        return []
+
+    began = time.monotonic()
+    articles, _, timed_out = news.fetch_articles(['q'], query_timeout=0.3, deadline=0.5, max_rounds=5, fetch=fetch)
+    assert articles == []
+    assert timed_out
+    assert time.monotonic() - began < 1.5
+
+
+def test_timeout_in_an_earlier_round_is_not_reported(no_backoff):
+    calls = []
+
+    def fetch(query, url, timeout):
+        calls.append(query)
+        if len(calls) == 1:
+            time.sleep(timeout + 0.1)
+            return []
+        return [{'title': 'found'}]
+
+    articles, rounds, timed_out = news.fetch_articles(['q'], query_timeout=0.2, deadline=5, max_rounds=3, fetch=fetch)
+    assert [a['title'] for a in articles] == ['found']
+    assert rounds == 2
+    assert not timed_out
+
+def test_backoff_delay_is_capped_full_jitter():
+    for attempt in range(10):
+        delay = news.backoff_delay(attempt, base=0.25, cap=2.0)
+        assert 0 <= delay <= min(2.0, 0.25 * 2 ** attempt)
+
+
+@pytest.fixture
+def rss_stub(monkeypatch):
+    server = rss_server(items=0).start()
+    monkeypatch.setattr(feedcache, '_cache', feedcache.FeedCache(ttl=300))
+    with override_settings(NEWS_RSS_URL=server.url + '/rss/search?q={query}'):
+        yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_empty_feed_retry_rounds_reach_the_network(rss_stub, no_backoff):
+    articles, rounds, _ = news.fetch_articles(['nothing here'], max_rounds=3, deadline=10)
+    assert articles == []
+    assert rounds == 3
+    assert rss_stub.requests == 3
+
+
+def test_non_empty_feed_is_served_from_cache(rss_stub, no_backoff):
+    rss_stub.items = 3
+    first, _, _ = news.fetch_articles(['moon'], enough=3, deadline=10)
+    second, _, _ = news.fetch_articles(['moon'], enough=3, deadline=10)
+    assert len(first) == len(second) == 3
+    assert rss_stub.requests == 1
@@ -0,0 +1,43 @@
+import os
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from transcribe.uploads import UploadStore
+
+
+def upload(content):
+    return SimpleUploadedFile('audio.mp3', content)
+
+
+def test_identical_uploads_share_one_object(tmp_path):
+    store = UploadStore(tmp_path, quota_bytes=1 << 20)
+    first, path = store.put(upload(b'same audio'))
+    second, _ = store.put(upload(b'same audio'))
+    assert first == second
+    assert store.stats()['deduplicated'] == 1
+    assert open(path, 'rb').read() == b'same audio'
+
+
+def test_unreleased_objects_survive_collect(tmp_path):
+    store = UploadStore(tmp_path, quota_bytes=4)
+    held, held_path = store.put(upload(b'a' * 8))
+    done, done_path = store.put(upload(b'b' * 8))
+    store.release(done)
+
+    store.collect()
+    assert os.path.exists(held_path)
+    assert not os.path.exists(done_path)
+
+    store.release(held)
+    store.collect()
+    assert not os.path.exists(held_path)
+
+
+def test_pinned_callback_protects_released_objects(tmp_path):
+    pinned = set()
+    store = UploadStore(tmp_path, quota_bytes=4, pinned=lambda: pinned)
+    digest, path = store.put(upload(b'queued job'))
+    pinned.add(digest)
+    store.release(digest)
+    store.collect()
+    assert os.path.exists(path)
@@ -0,0 +1,151 @@
+import re
+import zlib
+
+import numpy as np
+import pytest
+from django.test import override_settings
+
+from transcribe import verdict_cache
+from transcribe.verdict_cache import VerdictCache, claim_signature
+
+FACT = {'prediction': 'Fact', 'is_true': True}
+NEWS = {'prediction': 'News', 'is_true': False}
+
+
+def fake_embed(text):
+    """Hashed bag of words that, like a real sentence embedder, barely notices negations and numbers."""
+    vector = np.zeros(64, dtype=np.float32)
+    for word in re.findall(r"[a-z]+", text.lower()):
+        if word not in ('not', 'isn', 't'):
+            vector[zlib.crc32(word.encode()) % 64] += 1
+    return vector / np.linalg.norm(vector)
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(verdict_cache, 'time', clock)
+    return clock
+
+
+def store(cache, text, verdict=FACT):
+    cache.store(fake_embed(text), text, verdict)
+
+
+def lookup(cache, text):
+    return cache.lookup(fake_embed(text), text)
+
+
+def test_claim_signature_keeps_negations_numbers_and_months():
+    assert claim_signature("The Moon isn't made of cheese") == {'not': 1}
+    assert claim_signature("1,000 people died in March 1912") == {'1000': 1, 'march': 1, '1912': 1}
+    assert claim_signature("The Eiffel Tower is in Paris") == {}
+
+
+def test_near_duplicate_hits():
+    cache = VerdictCache()
+    store(cache, "The Eiffel Tower is in Paris.")
+    verdict, age, similarity = lookup(cache, "the eiffel tower is in paris")
+    assert verdict == FACT
+    assert similarity >= cache.threshold
+
+
+def test_negation_misses_in_both_directions():
+    cache = VerdictCache()
+    store(cache, "The Great Wall is visible from space")
+    assert fake_embed("The Great Wall is not visible from space") @ fake_embed(
+        "The Great Wall is visible from space") >= cache.threshold
+    assert lookup(cache, "The Great Wall is not visible from space") is None
+
+    cache = VerdictCache()
+    store(cache, "The Great Wall is not visible from space")
+    assert lookup(cache, "The Great Wall is visible from space") is None
+    assert cache.stats()['guarded'] == 1
+
+
+def test_different_number_misses():
+    cache = VerdictCache()
+    store(cache, "Water boils at 100 degrees at sea level")
+    assert lookup(cache, "Water boils at 90 degrees at sea level") is None
+    assert lookup(cache, "Water boils at 100 degrees at sea level") is not None
+
+
+def test_guard_falls_through_to_the_matching_candidate():
+    cache = VerdictCache()
+    store(cache, "The Great Wall is visible from space", FACT)
+    store(cache, "The Great Wall is not visible from space", NEWS)
+    verdict, _, _ = lookup(cache, "The Great Wall isn't visible from space")
+    assert verdict == NEWS
+
+
+def test_news_verdicts_expire_before_fact_verdicts(clock):
+    cache = VerdictCache(ttl=100, news_ttl=10)
+    store(cache, "The Eiffel Tower is in Paris", FACT)
+    store(cache, "Parliament passed the budget today", NEWS)
+    clock.now += 11
+    assert lookup(cache, "Parliament passed the budget today") is None
+    assert lookup(cache, "The Eiffel Tower is in Paris") is not None
+    clock.now += 90
+    assert lookup(cache, "The Eiffel Tower is in Paris") is None
+    assert len(cache) == 0
+
+
+def test_expired_slots_are_reused_before_evicting(clock):
+    cache = VerdictCache(max_entries=2, ttl=100, news_ttl=10)
+    store(cache, "Parliament passed the budget today", NEWS)
+    store(cache, "The Eiffel Tower is in Paris", FACT)
+    clock.now += 11
+    store(cache, "The Moon orbits the Earth", FACT)
+    assert cache.stats()['evictions'] == 0
+    assert lookup(cache, "The Eiffel Tower is in Paris") is not None
+
+
+def test_snapshot_restores_live_entries_with_their_guard(tmp_path, clock):
+    cache = VerdictCache(ttl=100, news_ttl=10)
+    store(cache, "The Great Wall is visible from space", FACT)
+    store(cache, "Parliament passed the budget today", NEWS)
+    clock.now += 11
+    assert cache.snapshot(tmp_path / 'verdicts.npz') == 1
+
+    restored = VerdictCache()
+    assert restored.restore(tmp_path / 'verdicts.npz') == 1
+    assert lookup(restored, "The Great Wall is visible from space")[0] == FACT
+    assert lookup(restored, "The Great Wall is not visible from space") is None
+    assert lookup(restored, "Parliament passed the budget today") is None
+
+
+def test_save_snapshot_writes_the_process_cache(tmp_path, monkeypatch):
+    cache = VerdictCache()
+    store(cache, "The Eiffel Tower is in Paris")
+    monkeypatch.setattr(verdict_cache, '_cache', cache)
+    path = tmp_path / 'verdicts.npz'
+    with override_settings(VERDICT_CACHE_SNAPSHOT=str(path)):
+        verdict_cache._save_snapshot()
+    assert VerdictCache().restore(path) == 1
+
+
+def test_process_cache_restores_its_snapshot(tmp_path, monkeypatch):
+    path = tmp_path / 'verdicts.npz'
+    saved = VerdictCache()
+    store(saved, "The Eiffel Tower is in Paris")
+    saved.snapshot(path)
+
+    registered = []
+    monkeypatch.setattr(verdict_cache, 'embed_many', lambda texts: np.stack([fake_embed(t) for t in texts]))
+    monkeypatch.setattr(verdict_cache, '_cache', None)
+    monkeypatch.setattr(verdict_cache, '_cache_failed', False)
+    monkeypatch.setattr(verdict_cache.atexit, 'register', registered.append)
+    with override_settings(VERDICT_CACHE_ENABLED=True, VERDICT_CACHE_SNAPSHOT=str(path)):
+        cache = verdict_cache.get_verdict_cache()
+    assert len(cache) == 1
+    assert registered == [verdict_cache._save_snapshot]
+    text = "The Eiffel Tower is in Paris"
+    assert cache.lookup(verdict_cache.embed(text), text)[0] == FACT
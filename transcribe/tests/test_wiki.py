@@ -0,0 +1,86 @@
+import pytest
+from django.test import override_settings
+
+from transcribe import wiki
+from transcribe.stubs import wiki_server
+
+
+@pytest.fixture
+def wiki_stub(tmp_path, monkeypatch):
+    server = wiki_server().start()
+    monkeypatch.setattr(wiki, '_client', None)
+    with override_settings(WIKI_API_URL=server.url + '/w/api.php', WIKI_CACHE_PATH=str(tmp_path / 'wiki.sqlite3')):
+        yield server
+    server.shutdown()
+    server.server_close()
+
+
+def entities(*names):
+    return [{'text': name} for name in names]
+
+
+def test_entities_are_resolved_in_one_batched_call(wiki_stub):
+    summary = wiki.get_wikipedia_summary('claim', entities('moon', 'apollo program'))
+    assert summary == ("moon: Moon is the subject of a stub encyclopedia article.\n\n"
+                       "apollo program: Apollo Program is the subject of a stub encyclopedia article.")
+    assert wiki_stub.requests == 1
+
+
+def test_titles_are_chunked_per_api_limit(wiki_stub):
+    titles = [f'topic {i}' for i in range(wiki.TITLES_PER_CALL + 1)]
+    found = wiki.get_wikipedia_client().summaries(titles)
+    assert list(found) == titles
+    assert all(found.values())
+    assert wiki_stub.requests == 2
+
+
+def test_disambiguation_pages_are_skipped(wiki_stub):
+    found = wiki.get_wikipedia_client().summaries(['mercury (disambiguation)', 'venus'])
+    assert found['mercury (disambiguation)'] is None
+    assert found['venus']
+
+
+def test_search_fallback_without_entities(wiki_stub):
+    summary = wiki.get_wikipedia_summary('moon landing', entities=[])
+    assert summary == "Moon Landing is the subject of a stub encyclopedia article."
+    assert wiki_stub.requests == 1
+
+
+def test_missing_pages_fall_back_to_search(wiki_stub):
+    wiki_stub.empty_rate = 1.0
+    assert wiki.get_wikipedia_summary('claim', entities('nowhere')) == wiki.NO_SUMMARY
+    assert wiki_stub.requests == 2  # titles, then generator=search
+
+
+def test_repeated_lookups_are_served_from_the_cache(wiki_stub):
+    wiki.get_wikipedia_summary('claim', entities('moon'))
+    wiki.get_wikipedia_summary('claim', entities('Moon'))  # same title after normalization
+    wiki.get_wikipedia_summary('moon landing')
+    wiki.get_wikipedia_summary('moon landing')
+    assert wiki_stub.requests == 2
+    assert wiki.get_wikipedia_client().stats() == {'hits': 2, 'negative_hits': 0, 'misses': 2, 'api_calls': 2}
+
+
+def test_cache_entries_expire_after_their_ttl(tmp_path):
+    cache = wiki.SummaryCache(tmp_path / 'wiki.sqlite3', ttl=100, negative_ttl=10)
+    cache.put_many({'moon': ('Moon', 'A satellite.'), 'nowhere': ('Nowhere', None)})
+    assert set(cache.get_many(['moon', 'nowhere'])) == {'moon', 'nowhere'}
+
+    with cache._connect() as conn:
+        conn.execute("UPDATE summaries SET fetched_at = fetched_at - 50")
+    assert cache.get_many(['moon', 'nowhere']) == {'moon': ('Moon', 'A satellite.')}
+
+    with cache._connect() as conn:
+        conn.execute("UPDATE summaries SET fetched_at = fetched_at - 50")
+    assert cache.get_many(['moon', 'nowhere']) == {}
+
+
+def test_api_errors_are_returned_as_the_summary(wiki_stub):
+    wiki_stub.fail_rate = 1.0
+    summary = wiki.get_wikipedia_summary('claim', entities('moon'))
+    assert '503' in summary
+
+
+def test_timeouts_are_reported(wiki_stub):
+    wiki_stub.latency = 1.0
+    assert wiki.get_wikipedia_summary('claim', entities('moon'), timeout=0.2) == wiki.TIMED_OUT
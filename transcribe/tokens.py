@@ -0,0 +1,18 @@
+"""Cheap token counts for prompt budgeting.
+
+Groq does not expose LLaMA's tokenizer and loading it just to count would
+cost more than the estimate is worth. ``estimate_tokens`` approximates a BPE
+tokenizer: every word or punctuation mark is one token, and long words add
+one more per six characters (English prose comes out at ~1.3 tokens/word,
+close to what LLaMA reports).
+"""
+import re
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """Approximate LLaMA token count of ``text``."""
+    if not text:
+        return 0
+    return sum(1 + len(piece) // 6 for piece in _TOKEN_RE.findall(text))
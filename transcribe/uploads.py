@@ -0,0 +1,214 @@
+"""Content-addressed store for /detect/ uploads.
+
+Uploads used to be saved under their client filename, so two different files
+called ``audio.mp3`` overwrote each other and nothing was ever deleted. Now
+each upload is hashed (SHA-256) in the same pass that copies it to disk and
+is stored as ``objects/<h[:2]>/<h>``. An identical upload maps to the same
+object, and its transcript is looked up by ``(hash, WHISPER_MODEL_SIZE)`` in
+the ``Transcript`` table, so it comes back without running Whisper again.
+
+The store keeps under ``UPLOAD_STORE_QUOTA_MB``: once it grows past the quota,
+a background thread deletes the least recently used objects until it is back
+under 90% of it. Objects still referenced by queued or running jobs, or
+returned by ``put`` and not yet released by the caller, are never deleted.
+Half-written temp files older than ``UPLOAD_TMP_MAX_AGE_S`` are removed too.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LOW_WATER = 0.9  # collect down to this fraction of the quota
+
+
+class UploadStore:
+    def __init__(self, root, quota_bytes, tmp_max_age=3600.0, pinned=None):
+        self.root = str(root)
+        self.quota_bytes = quota_bytes
+        self.tmp_max_age = tmp_max_age
+        self.pinned = pinned or (lambda: set())
+        self.objects_dir = os.path.join(self.root, 'objects')
+        self.tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._collecting = False
+        self._usage = None  # bytes, computed on first collect
+        self._in_flight = Counter()  # digests returned by put() and not yet released
+        self._stats = {'stored': 0, 'deduplicated': 0, 'collected': 0, 'bytes_collected': 0}
+
+    def path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def put(self, uploaded_file):
+        """Copy a Django ``UploadedFile`` into the store; returns ``(digest, path)``.
+
+        The object is pinned against ``collect`` until the caller passes
+        ``digest`` to ``release``.
+        """
+        sha = hashlib.sha256()
+        size = 0
+        digest = None
+        fd, tmp = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in uploaded_file.chunks():
+                    sha.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            digest = sha.hexdigest()
+            path = self.path(digest)
+            with self._lock:
+                # Pinned before the existence check: collect() removes objects under the same lock.
+                self._in_flight[digest] += 1
+            if os.path.exists(path):
+                os.remove(tmp)
+                os.utime(path)  # most recently used again
+                self._count('deduplicated')
+                return digest, path
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            if digest is not None:
+                self.release(digest)
+            raise
+        self._count('stored')
+        with self._lock:
+            if self._usage is not None:
+                self._usage += size
+            over = self._usage is None or self._usage > self.quota_bytes
+        if over:
+            self.collect_in_background()
+        return digest, path
+
+    def release(self, digest):
+        """Let ``collect`` delete ``digest`` again once the caller no longer reads its object."""
+        with self._lock:
+            self._in_flight[digest] -= 1
+            if self._in_flight[digest] <= 0:
+                del self._in_flight[digest]
+
+    def touch(self, digest):
+        try:
+            os.utime(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+    def collect_in_background(self):
+        with self._lock:
+            if self._collecting:
+                return
+            self._collecting = True
+        threading.Thread(target=self.collect, name="upload-gc", daemon=True).start()
+
+    def collect(self):
+        """Delete stale temp files, then LRU objects while over quota. Returns bytes freed."""
+        with self._lock:
+            self._collecting = True
+        try:
+            now = time.time()
+            for entry in os.scandir(self.tmp_dir):
+                try:
+                    if now - entry.stat().st_mtime > self.tmp_max_age:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+            objects = []
+            for shard in os.scandir(self.objects_dir):
+                if shard.is_dir():
+                    for entry in os.scandir(shard.path):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        objects.append((stat.st_mtime, stat.st_size, entry.name, entry.path))
+            usage = sum(size for _, size, _, _ in objects)
+            freed = removed = 0
+            if usage > self.quota_bytes:
+                pinned = self.pinned()
+                target = LOW_WATER * self.quota_bytes
+                for _, size, digest, path in sorted(objects):
+                    if usage - freed <= target:
+                        break
+                    if digest in pinned:
+                        continue
+                    with self._lock:
+                        if digest in self._in_flight:
+                            continue
+                        try:
+                            os.remove(path)
+                        except FileNotFoundError:
+                            continue
+                    freed += size
+                    removed += 1
+                logger.info("[UploadStore] removed %d objects (%d bytes) to stay under %d bytes",
+                            removed, freed, self.quota_bytes)
+            with self._lock:
+                self._usage = usage - freed
+                self._stats['collected'] += removed
+                self._stats['bytes_collected'] += freed
+            return freed
+        finally:
+            with self._lock:
+                self._collecting = False
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['bytes'] = self._usage
+        snapshot['quota_bytes'] = self.quota_bytes
+        return snapshot
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def _active_hashes():
+    """Objects that queued or running jobs still need."""
+    from .models import AudioJob
+    return set(AudioJob.objects.filter(status__in=(AudioJob.QUEUED, AudioJob.RUNNING))
+               .exclude(content_hash='').values_list('content_hash', flat=True))
+
+
+def cached_transcript(digest):
+    """``(language, text)`` of an earlier transcription of the same content, or None."""
+    from .models import Transcript
+    hit = Transcript.objects.filter(content_hash=digest, model_size=settings.WHISPER_MODEL_SIZE).first()
+    return (hit.language, hit.text) if hit is not None else None
+
+
+def store_transcript(digest, language, text):
+    from .models import Transcript
+    Transcript.objects.update_or_create(
+        content_hash=digest, model_size=settings.WHISPER_MODEL_SIZE,
+        defaults={'language': language, 'text': text},
+    )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_upload_store():
+    """Process-wide store configured from settings."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UploadStore(
+                settings.UPLOAD_STORE_DIR,
+                settings.UPLOAD_STORE_QUOTA_MB * 1024 * 1024,
+                tmp_max_age=settings.UPLOAD_TMP_MAX_AGE_S,
+                pinned=_active_hashes,
+            )
+    return _store
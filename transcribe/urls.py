@@ -9,5 +9,14 @@ urlpatterns = [
     path('detect/', views.transcription_view, name="detect"),
     # Alias route for templates referencing 'transcription'
     path('transcription/', views.transcription_view, name="transcription"),
-    path('classify-text/', views.classify_text, name="classify_text")
+    path('jobs/<uuid:job_id>/', views.job_status, name="job_status"),
+    path('classify-text/', views.classify_text, name="classify_text"),
+    path('classify-batch/', views.classify_batch, name="classify_batch"),
+    path('classify-stats/', views.classifier_stats, name="classifier_stats"),
+    path('metrics', views.metrics_view, name="metrics"),
+    path('ner-stats/', views.ner_stats, name="ner_stats"),
+    path('feed-cache-stats/', views.feed_cache_stats, name="feed_cache_stats"),
+    path('verdict-cache-stats/', views.verdict_cache_stats, name="verdict_cache_stats"),
+    path('llm-stats/', views.llm_stats, name="llm_stats"),
+    path('upload-stats/', views.upload_stats, name="upload_stats"),
 ]
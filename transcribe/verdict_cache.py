@@ -0,0 +1,244 @@
+"""Semantic cache of fact-check verdicts.
+
+Claims are embedded with a SentenceTransformer (``VERDICT_CACHE_MODEL``,
+loaded through the registry as ``'embedder'``) and stored with their verdict
+in a fixed-size NumPy matrix of unit vectors. A lookup is one matrix-vector
+product: the best cosine similarity at or above ``VERDICT_CACHE_THRESHOLD``
+among unexpired rows is a hit, so a claim verified a minute ago, or a light
+rewording of it, skips BERT, RSS, Wikipedia and Groq altogether.
+
+Similarity alone is not enough: with all-MiniLM-L6-v2 a claim and its
+negation, or the same claim with another number, year or month, routinely
+score above 0.92, and reusing the verdict would return the opposite answer.
+So a candidate is only a hit if its ``claim_signature`` (negation words,
+numbers, months) matches the new claim's; otherwise the next most similar
+candidate above the threshold is tried.
+
+Fact verdicts live for ``VERDICT_CACHE_TTL_S`` and News verdicts, which go
+stale as the news moves on, for ``VERDICT_CACHE_NEWS_TTL_S``. When the matrix
+is full, expired rows are reused first, then the least recently used one.
+``snapshot``/``restore`` persist the cache to an ``.npz`` file so a restart
+does not start cold.
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+NEGATIONS = frozenset((
+    'not', 'no', 'never', 'none', 'nobody', 'nothing', 'neither', 'nor', 'nowhere', 'without', 'cannot',
+))
+MONTHS = frozenset((
+    'january', 'february', 'march', 'april', 'june', 'july', 'august', 'september', 'october',
+    'november', 'december', 'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec',
+))
+NUMBER_WORDS = frozenset((
+    'zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten', 'eleven', 'twelve',
+    'twenty', 'thirty', 'forty', 'fifty', 'hundred', 'thousand', 'million', 'billion', 'trillion', 'half',
+    'first', 'second', 'third', 'percent',
+))
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)*|[a-z]+(?:'[a-z]+)?")
+
+
+def claim_signature(text):
+    """Words that flip or change a claim without moving its embedding much: negations, numbers, months."""
+    signature = Counter()
+    for token in _TOKEN.findall(text.lower().replace('\u2019', "'")):
+        if token[0].isdigit():
+            signature[token.replace(',', '')] += 1
+        elif token in NEGATIONS or token.endswith("n't"):
+            signature['not'] += 1
+        elif token in MONTHS or token in NUMBER_WORDS:
+            signature[token] += 1
+    return signature
+
+
+class VerdictCache:
+    def __init__(self, max_entries=2048, threshold=0.92, ttl=7 * 24 * 3600, news_ttl=3600):
+        self.max_entries = max(1, int(max_entries))
+        self.threshold = threshold
+        self.ttl = ttl
+        self.news_ttl = news_ttl
+        self._lock = threading.Lock()
+        self._vectors = None  # allocated on first store, once the dimension is known
+        self._created = np.zeros(self.max_entries)
+        self._used = np.zeros(self.max_entries)
+        self._expires = np.zeros(self.max_entries)  # 0 marks an empty slot
+        self._texts = [None] * self.max_entries
+        self._signatures = [None] * self.max_entries
+        self._verdicts = [None] * self.max_entries
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'guarded': 0}
+
+    def __len__(self):
+        return int(np.count_nonzero(self._expires > time.time()))
+
+    def lookup(self, vector, text=None):
+        """Return ``(verdict, age_s, similarity)`` for the closest live claim, or None.
+
+        With ``text``, candidates whose ``claim_signature`` differs are skipped.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if self._vectors is None:
+                self._stats['misses'] += 1
+                return None
+            now = time.time()
+            scores = self._vectors @ vector
+            scores[self._expires <= now] = -np.inf
+            candidates = np.flatnonzero(scores >= self.threshold)
+            candidates = candidates[np.argsort(-scores[candidates])]
+            if text is not None:
+                signature = claim_signature(text)
+                matching = [i for i in candidates if self._signatures[i] == signature]
+                if len(matching) < len(candidates):
+                    self._stats['guarded'] += 1
+                candidates = matching
+            if not len(candidates):
+                self._stats['misses'] += 1
+                return None
+            best = int(candidates[0])
+            similarity = float(scores[best])
+            self._used[best] = now
+            self._stats['hits'] += 1
+            return dict(self._verdicts[best]), now - self._created[best], similarity
+
+    def store(self, vector, text, verdict):
+        """Remember ``verdict`` for the claim embedded as ``vector``."""
+        vector = np.asarray(vector, dtype=np.float32)
+        ttl = self.news_ttl if verdict.get('prediction') == 'News' else self.ttl
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            now = time.time()
+            slot = self._free_slot(now)
+            self._vectors[slot] = vector
+            self._created[slot] = now
+            self._used[slot] = now
+            self._expires[slot] = now + ttl
+            self._texts[slot] = text
+            self._signatures[slot] = claim_signature(text)
+            self._verdicts[slot] = dict(verdict)
+            self._stats['stores'] += 1
+
+    def _free_slot(self, now):
+        expired = np.flatnonzero(self._expires <= now)
+        if expired.size:
+            return int(expired[0])
+        self._stats['evictions'] += 1
+        return int(np.argmin(self._used))
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot['entries'] = len(self)
+        lookups = snapshot['hits'] + snapshot['misses']
+        snapshot['hit_rate'] = snapshot['hits'] / lookups if lookups else 0.0
+        return snapshot
+
+    def snapshot(self, path):
+        """Atomically write every live entry to ``path`` (.npz)."""
+        with self._lock:
+            if self._vectors is None:
+                return 0
+            live = np.flatnonzero(self._expires > time.time())
+            arrays = {
+                'vectors': self._vectors[live],
+                'created': self._created[live],
+                'used': self._used[live],
+                'expires': self._expires[live],
+                'records': np.array(json.dumps(
+                    [{'text': self._texts[i], 'verdict': self._verdicts[i]} for i in live]
+                )),
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.npz')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+        return len(live)
+
+    def restore(self, path):
+        """Load unexpired entries from a snapshot; returns how many were loaded."""
+        with np.load(path) as data:
+            vectors, created, used, expires = data['vectors'], data['created'], data['used'], data['expires']
+            records = json.loads(str(data['records']))
+        keep = np.flatnonzero(expires > time.time())
+        keep = keep[np.argsort(-used[keep])][:self.max_entries]  # most recently used first
+        with self._lock:
+            if len(keep) and (self._vectors is None or self._vectors.shape[1] != vectors.shape[1]):
+                self._vectors = np.zeros((self.max_entries, vectors.shape[1]), dtype=np.float32)
+            for slot, index in enumerate(keep):
+                self._vectors[slot] = vectors[index]
+                self._created[slot] = created[index]
+                self._used[slot] = used[index]
+                self._expires[slot] = expires[index]
+                self._texts[slot] = records[index]['text']
+                self._signatures[slot] = claim_signature(records[index]['text'])
+                self._verdicts[slot] = records[index]['verdict']
+        return len(keep)
+
+
+def embed_many(texts):
+    """Unit-length embeddings (one row per text) from the registry's SentenceTransformer."""
+    from .registry import registry
+    return registry.get('embedder').encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
+
+
+def embed(text):
+    """Unit-length embedding of a single ``text``."""
+    return embed_many([text])[0]
+
+
+_cache = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def _save_snapshot():
+    if _cache is not None and settings.VERDICT_CACHE_SNAPSHOT:
+        try:
+            count = _cache.snapshot(settings.VERDICT_CACHE_SNAPSHOT)
+            logger.info("[VerdictCache] saved %d verdicts to %s", count, settings.VERDICT_CACHE_SNAPSHOT)
+        except Exception as e:
+            logger.error("[VerdictCache] snapshot failed: %s", e)
+
+
+def get_verdict_cache():
+    """Process-wide cache, or None if disabled or the embedding model is unavailable."""
+    global _cache, _cache_failed
+    if not settings.VERDICT_CACHE_ENABLED or _cache_failed:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                embed("warmup")
+            except Exception as e:
+                logger.error("[VerdictCache] embedding model unavailable, cache disabled: %s", e)
+                _cache_failed = True
+                return None
+            _cache = VerdictCache(
+                max_entries=settings.VERDICT_CACHE_SIZE,
+                threshold=settings.VERDICT_CACHE_THRESHOLD,
+                ttl=settings.VERDICT_CACHE_TTL_S,
+                news_ttl=settings.VERDICT_CACHE_NEWS_TTL_S,
+            )
+            path = settings.VERDICT_CACHE_SNAPSHOT
+            if path and os.path.exists(path):
+                try:
+                    logger.info("[VerdictCache] restored %d verdicts from %s", _cache.restore(path), path)
+                except Exception as e:
+                    logger.error("[VerdictCache] could not restore %s: %s", path, e)
+            if path:
+                atexit.register(_save_snapshot)
+    return _cache
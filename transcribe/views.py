@@ -1,60 +1,70 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.urls import reverse
 import speech_recognition as sr
 import json
-from pydub import AudioSegment
 from django.views.decorators.csrf import csrf_exempt
 import os
 import traceback
 from django.contrib import messages
 from django.conf import settings
-from django.core.files.storage import FileSystemStorage
-from transformers import BertTokenizer, BertForSequenceClassification
 from .forms import ContactForm
-import torch
-import requests
-import re
-import feedparser
-from sentence_transformers import SentenceTransformer
-import urllib.parse
-import spacy
-from spacy import displacy
-import wikipedia
+from .batching import MicroBatcher
+from .deadline import Deadline
+from .llm import LLMTimeout, LLMUnavailable, get_llm_client
+from .metrics import metrics, stage
+from .prompting import build_news_context, claim_for_prompt, prompt_tokens
+from .registry import registry
+from .rerank import rerank_articles
+from .whisper_service import get_whisper_service
+from .audio import decode_file, detect_language, log_mel, transcribe_mel
+from .feedcache import get_feed_cache
+from .uploads import cached_transcript, get_upload_store, store_transcript
+from . import jobs
+from .models import AudioJob, Transcript
+from .ner import get_ner_service
+from .news import fetch_articles
+from .verdict_cache import embed, get_verdict_cache
+from .wiki import TIMED_OUT as WIKI_TIMED_OUT, get_wikipedia_summary
 from dotenv import load_dotenv
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
 
 """Transcription pipeline helpers.
-- We lazy-load Whisper to avoid platform import issues and reduce startup time.
+- Models (BERT, spaCy, Whisper) come from the shared registry and load on first
+  use, so importing this module (e.g. for manage.py commands) stays cheap.
 - We support returning either JSON (AJAX) or HTML (form POST) responses.
 """
 
 recognizer = sr.Recognizer()
-_whisper_model = None
 
-def _get_whisper_model():
-    """Load and cache Whisper model on first use. Returns None if unavailable."""
-    global _whisper_model
-    if _whisper_model is not None:
-        return _whisper_model
-    try:
-        import whisper
-        _whisper_model = whisper.load_model("small")
-        return _whisper_model
-    except Exception as e:
-        # Do not crash server if Whisper isn't available
-        print(f"[Whisper] Failed to load: {e}")
-        return None
+_bert_batcher = None
+_bert_batcher_lock = threading.Lock()
+
 
-model = BertForSequenceClassification.from_pretrained('./trained_model')
-tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
+def _classify_batch(texts):
+    """Run one classifier forward pass over a batch of claims.
 
-# Load spaCy model for NER (Named Entity Recognition)
-# Attempt to load spaCy model; fallback to a blank English model if unavailable.
-try:
-    nlp = spacy.load("en_core_web_sm")
-except Exception:
-    # Fallback prevents server startup failure; NER will be limited until the model is installed.
-    nlp = spacy.blank("en")
+    The backend (eager/quantized/traced) is chosen in settings. Returns one
+    ``{'label', 'logits'}`` dict per input, in order.
+    """
+    return registry.get('classifier').predict(texts)
+
+
+def _get_bert_batcher():
+    """Create the shared micro-batcher in front of the BERT model on first use."""
+    global _bert_batcher
+    with _bert_batcher_lock:
+        if _bert_batcher is None:
+            _bert_batcher = MicroBatcher(
+                _classify_batch,
+                max_batch=settings.CLASSIFIER_MAX_BATCH,
+                wait_ms=settings.CLASSIFIER_BATCH_WAIT_MS,
+                name="bert",
+            )
+    return _bert_batcher
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -96,28 +106,44 @@ def transcription_view(request):
         uploaded_file = request.FILES.get("audio_file")
         user_text = request.POST.get("text_input", "").strip()
 
-        if uploaded_file:
-            logger.debug("[transcription_view] saving upload filename=%s", uploaded_file.name)
-            # Ensure media directory exists
-            os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
-
-            file_name = uploaded_file.name
-            temp_input_path = os.path.join(settings.MEDIA_ROOT, file_name)
-            with open(temp_input_path, "wb") as f:
-                for chunk in uploaded_file.chunks():
-                    f.write(chunk)
+        if uploaded_file and settings.JOBS_ENABLED and _wants_json(request):
+            # Queue it and answer at once; the client polls /jobs/<id>/ or subscribes on ws/jobs/<id>/.
+            job = jobs.enqueue(uploaded_file)
+            logger.info("[transcription_view] job %s (%s) for %s", job.pk, job.status, uploaded_file.name)
+            return JsonResponse(_job_payload(job), status=200 if job.status == AudioJob.DONE else 202)
 
+        if uploaded_file:
+            # Stored by content hash; a file transcribed before is answered from the cache.
+            store = get_upload_store()
+            with stage('upload_store'):
+                digest, path = store.put(uploaded_file)
             try:
-                converted_path = convert_to_wav(temp_input_path)
-            except Exception as e:
-                traceback.print_exc()
-                error = f"Conversion failed: {str(e)}"
-                logger.error("[transcription_view] convert_to_wav failed: %s", error)
-                return _transcription_response(request, error=error)
+                cached = cached_transcript(digest)
+                if cached is not None:
+                    logger.info("[transcription_view] transcript cache hit for %s", digest[:12])
+                    return _transcription_response(request, transcription=cached[1])
+
+                logger.debug("[transcription_view] decoding upload filename=%s", uploaded_file.name)
+                # One ffmpeg decode straight into memory.
+                try:
+                    with stage('decode'):
+                        samples = decode_file(path)
+                except Exception as e:
+                    traceback.print_exc()
+                    error = f"Conversion failed: {str(e)}"
+                    logger.error("[transcription_view] decode failed: %s", error)
+                    return _transcription_response(request, error=error)
+            finally:
+                store.release(digest)  # decoded into memory; the object may be collected now
+
+            # The log-mel is computed once and shared by language detection and transcription.
+            service = get_whisper_service()
+            with stage('log_mel'):
+                mel = log_mel(samples, service.n_mels) if service is not None else None
 
             try:
-                lang_code = detect_language_whisper(converted_path)
-                print("Language code passed:", lang_code)
+                with stage('language'):
+                    lang_code = detect_language_whisper(mel)
             except Exception as e:
                 traceback.print_exc()
                 error = f"Language detection failed: {str(e)}"
@@ -125,62 +151,55 @@ def transcription_view(request):
                 return _transcription_response(request, error=error)
 
             try:
-                transcription = transcribe_with_whisper(converted_path)
+                with stage('whisper'):
+                    transcription = transcribe_with_whisper(
+                        samples, mel, language=None if lang_code == "unknown" else lang_code
+                    )
             except Exception as e:
                 traceback.print_exc()
                 error = f"Transcription failed: {str(e)}"
                 logger.error("[transcription_view] transcribe failed: %s", error)
                 return _transcription_response(request, error=error)
 
+            store_transcript(digest, lang_code, transcription)
             return _transcription_response(request, transcription=transcription)
 
         logger.warning("[transcription_view] no input provided")
         return _transcription_response(request, error="No input provided")
 
-    print("GET request: rendering template.")
     return render(request, "transcription.html")
 
-def convert_to_wav(input_path):
-    """Converts any audio/video file to a proper PCM WAV format next to input path."""
-    base, _ = os.path.splitext(input_path)
-    output_path = base + ".wav"
-    audio = AudioSegment.from_file(input_path)
-    audio = audio.set_frame_rate(16000).set_channels(1).set_sample_width(2)  # 16-bit mono
-    audio.export(output_path, format="wav")
-    return output_path
-
-def detect_language_whisper(audio_path):
-    """Detects language using Whisper. Returns 'unknown' if model not available."""
-    wm = _get_whisper_model()
-    if wm is None:
+def detect_language_whisper(mel):
+    """Detects language from a precomputed log-mel. Returns 'unknown' if model not available."""
+    service = get_whisper_service()
+    if service is None or mel is None:
         return "unknown"
-    import whisper
-    audio = whisper.load_audio(audio_path)
-    audio = whisper.pad_or_trim(audio)
-    mel = whisper.log_mel_spectrogram(audio).to(wm.device)
-    _, probs = wm.detect_language(mel)
-    lang_code = max(probs, key=probs.get)
-    return lang_code  # Return the Whisper detected language code
-
-def transcribe_with_whisper(audio_path):
-    """Transcribe audio using Whisper. Raises RuntimeError if model unavailable."""
-    wm = _get_whisper_model()
-    if wm is None:
+    return service.run(detect_language, mel, timeout=settings.WHISPER_TIMEOUT_S)  # Return the Whisper detected language code
+
+def transcribe_with_whisper(samples, mel=None, language=None):
+    """Transcribe float32 samples using Whisper. Raises RuntimeError if model unavailable."""
+    service = get_whisper_service()
+    if service is None:
         raise RuntimeError("Whisper model is unavailable on this platform.")
-    result = wm.transcribe(audio_path)
+    if mel is None:
+        result = service.transcribe(samples, timeout=settings.WHISPER_TIMEOUT_S, language=language)
+    else:
+        result = service.run(transcribe_mel, samples, mel, timeout=settings.WHISPER_TIMEOUT_S, language=language)
     return result.get("text", "")
 
-def _transcription_response(request, transcription=None, error=None):
-    """Return JSON for AJAX or render HTML for form post/normal requests."""
+def _wants_json(request):
+    """Whether the request wants JSON (AJAX/fetch requests)."""
     accept = request.headers.get("accept", "")
     content_type = request.headers.get("content-type", "")
-    # Check if request wants JSON (AJAX/fetch requests)
-    wants_json = (
+    return (
         "application/json" in accept or 
         request.headers.get("x-requested-with") == "XMLHttpRequest" or
         "multipart/form-data" in content_type  # File uploads via fetch should get JSON
     )
-    if wants_json:
+
+def _transcription_response(request, transcription=None, error=None):
+    """Return JSON for AJAX or render HTML for form post/normal requests."""
+    if _wants_json(request):
         if error:
             return JsonResponse({"error": error}, status=400)
         return JsonResponse({"status": "success", "transcription": transcription})
@@ -192,9 +211,336 @@ def _transcription_response(request, transcription=None, error=None):
         context["error"] = error
     return render(request, "transcription.html", context)
 
+
+def verify_claim(text, label=None, deadline=None):
+    """Verify one claim, answering from the semantic verdict cache when possible.
+
+    ``label`` is the BERT Fact/News prediction; it is computed through the
+    micro-batcher when not supplied. ``deadline`` (default: a fresh
+    ``REQUEST_DEADLINE_S`` budget) bounds every stage. Returns
+    ``(result_dict, http_status)``; the result's ``deadline`` entry lists the
+    stages that were cut short, and cached answers carry ``cached``,
+    ``cache_age_s`` and ``cache_similarity``.
+    """
+    deadline = deadline or Deadline.from_request()
+    result, status = _verify_cached(text, label, deadline)
+    result['deadline'] = deadline.report()
+    return result, status
+
+
+def _verify_cached(text, label, deadline):
+    cache = get_verdict_cache()
+    if cache is None:
+        return _run_verification(text, label, deadline)
+    with stage('verdict_cache'):
+        vector = embed(text)
+        hit = cache.lookup(vector, text)
+    if hit is not None:
+        verdict, age, similarity = hit
+        logger.info("[classify_text] verdict cache hit (similarity=%.3f, age=%.0fs)", similarity, age)
+        verdict.update(cached=True, cache_age_s=round(age, 1), cache_similarity=round(similarity, 3))
+        return verdict, 200
+    result, status = _run_verification(text, label, deadline)
+    # Only settled verdicts are reused; errors, "don't know" and cut-short answers are retried next time.
+    if status == 200 and result.get('is_true') is not None and not deadline.cut:
+        cache.store(vector, text, result)
+    return result, status
+
+
+def _out_of_time(prediction, deadline, reason, context=None):
+    """Verdict returned when the deadline leaves no time (or none was left) for Groq."""
+    deadline.cut_short('llm', reason)
+    result = {
+        'prediction': prediction,
+        'is_true': None,
+        'confidence': 0,
+        'explanation': "I don't know. Verification ran out of time before the model could answer.",
+    }
+    if context is not None:
+        result['context'] = context
+    return result, 200
+
+
+def _run_verification(text, label, deadline):
+    """The full pipeline: BERT label, then Groq directly (Fact) or with news context (News)."""
+    if label is None:
+        future = _get_bert_batcher().submit(text)
+        try:
+            with stage('bert'):
+                label = future.result(timeout=deadline.retrieval_budget())['label']
+        except FutureTimeoutError:
+            future.cancel()
+            # No label in time: take the Fact route, which goes straight to the LLM without retrieval.
+            deadline.cut_short('bert', "no label in time, verified as Fact")
+            label = 'Fact'
+
+    # Extract entities from the input text using spaCy for better clarity
+    with stage('spacy'):
+        entities = extract_entities(text)
+
+    # Prepare Groq client and log message
+    groq_key = os.getenv('GROQ_API_KEY')
+    if not groq_key:
+        logger.error("[classify_text] GROQ_API_KEY is not set in environment")
+        return {'error': 'Server is not configured with Groq API key.'}, 500
+    try:
+        client = get_llm_client()  # shared, keep-alive client (see llm.py)
+    except ImportError as ie:
+        logger.exception("[classify_text] Groq SDK import failed: %s", ie)
+        return {'error': 'Groq SDK not installed on the server.'}, 500
+    groq_model = "llama-3.1-8b-instant"
+    logger.info("[classify_text] message received; predicted_label_pre=%s", label)
+    # If Fact: Directly use LLaMA for fact verification
+    if label == "Fact":
+        payload = {
+            "model": "llama-3.1-8b-instant",
+            "messages": [
+                {
+                    "role": "system",
+                    "content": (
+                        "You are an expert fact checker with access to your training data and knowledge base. "
+                        "Respond ONLY in this strict JSON format:\n"
+                        "{\n"
+                        "  \"is_true\": true or false or null,\n"
+                        "  \"confidence\": number between 0 and 100,\n"
+                        "  \"explanation\": \"Your explanation here.\"\n"
+                        "}\n\n"
+                        "INSTRUCTIONS:\n"
+                        "1. First, try to verify the statement using your own training data and knowledge base.\n"
+                        "2. If you have sufficient information from your training data, provide a confident assessment (true/false) with appropriate confidence score.\n"
+                        "3. If you cannot determine the accuracy with certainty even after checking your knowledge base, set:\n"
+                        "   - \"is_true\": null\n"
+                        "   - \"confidence\": 100\n"
+                        "   - \"explanation\": \"I don't know. [Explain why you cannot determine this]\"\n"
+                        "4. NEVER return undefined values. Always use true, false, or null for is_true.\n"
+                        "5. Be honest about uncertainty - it's better to say 'I don't know' than to guess.\n"
+                        "Do not include any additional text, emojis, or commentary outside the JSON."
+                    )
+                },
+                {
+                    "role": "user",
+                    "content": f"Check the accuracy of the following statement: {claim_for_prompt(text)}\n\n"
+
+                }
+            ]
+        }
+
+        fact_context = {'prompt_tokens': prompt_tokens(payload["messages"])}
+        logger.debug("[classify_text] calling Groq for Fact model=%s prompt_tokens=%d", groq_model, fact_context['prompt_tokens'])
+        llm_timeout = deadline.budget(settings.GROQ_TIMEOUT_S)
+        if llm_timeout < settings.DEADLINE_LLM_MIN_S:
+            return _out_of_time('Fact', deadline, f"{llm_timeout:.1f}s left", fact_context)
+        try:
+            with stage('groq'):
+                content = client.chat(payload["messages"], model=groq_model, temperature=0.2, timeout=llm_timeout)
+            try:
+                fact_data = json.loads(content)
+                explanation = fact_data.get('explanation', 'No explanation provided.')
+                is_true = fact_data.get('is_true')
+                confidence = fact_data.get('confidence', 0)
+
+                # Ensure is_true is never undefined - convert to None if missing
+                if is_true not in [True, False, None]:
+                    is_true = None
+                    if confidence == 0:
+                        confidence = 100
+                    if explanation == 'No explanation provided.':
+                        explanation = "I don't know. Unable to verify this statement with available information."
+
+                return {
+                    'prediction': 'Fact',
+                    'is_true': is_true,
+                    'confidence': confidence,
+                    'explanation': explanation,
+                    'context': fact_context,
+                }, 200
+            except Exception as e:
+                logger.exception("[classify_text] parse error for Fact response: %s", e)
+                return {
+                    'prediction': 'Fact',
+                    'is_true': None,
+                    'confidence': 100,
+                    'explanation': f"I don't know. Failed to parse the fact-checking response: {str(e)}",
+                }, 200
+        except LLMTimeout:
+            return _out_of_time('Fact', deadline, f"no answer within {llm_timeout:.1f}s", fact_context)
+        except LLMUnavailable as e:
+            logger.error("[classify_text] Groq skipped for Fact: %s", e)
+            return {'error': 'Fact-checking model is temporarily unavailable. Please try again shortly.'}, 503
+        except Exception as e:
+            logger.exception("[classify_text] Groq call failed for Fact: %s", e)
+            return {'error': 'Failed to verify fact via Groq model.'}, 500
+
+    else:
+        # NEWS CASE — Fetch articles based on named entities; all queries run
+        # concurrently and retry with backoff under one deadline (see news.py)
+        # Try different search strategies
+        search_queries = []
+
+        # Strategy 1: Use named entities
+        if entities:
+            for entity in entities:
+                search_queries.append(entity['text'])
+
+        # Strategy 2: Use full text
+        search_queries.append(text)
+
+        # Strategy 3: Extract key words (if no entities found)
+        if not entities:
+            words = text.split()
+            # Use first 3-5 meaningful words
+            key_words = [w for w in words if len(w) > 3][:5]
+            if key_words:
+                search_queries.append(' '.join(key_words))
+
+        logger.info(f"[classify_text] Search strategies: {search_queries}")
+
+        # Wikipedia background for the extracted entities (only News uses it)
+        wiki_budget = deadline.retrieval_budget(settings.WIKI_TIMEOUT_S)
+        if wiki_budget < settings.DEADLINE_STAGE_MIN_S:
+            deadline.cut_short('wikipedia', f"skipped, {wiki_budget:.1f}s left")
+            wikipedia_summary = ''
+        else:
+            with stage('wikipedia'):
+                wikipedia_summary = get_wikipedia_summary(text, entities, timeout=wiki_budget)
+            if wikipedia_summary == WIKI_TIMED_OUT:
+                deadline.cut_short('wikipedia', f"timed out after {wiki_budget:.1f}s")
+
+        news_budget = deadline.retrieval_budget(settings.NEWS_DEADLINE_S)
+        if news_budget < settings.DEADLINE_STAGE_MIN_S:
+            deadline.cut_short('news', f"skipped, {news_budget:.1f}s left")
+            articles, retry_count, news_cut = [], 0, True
+        else:
+            with stage('rss'):
+                articles, retry_count, news_cut = fetch_articles(search_queries, deadline=news_budget)
+            if news_cut:
+                deadline.cut_short('news', f"{len(articles)} articles within {news_budget:.1f}s")
+
+        # "Nothing found" only when the search really ran to completion; when it was
+        # cut short, the model answers from whatever context and knowledge it has.
+        if not articles and not news_cut:
+            logger.warning(f"[classify_text] No articles found after {retry_count} rounds")
+            logger.warning(f"[classify_text] Tried queries: {search_queries}")
+            return {
+                "prediction": "News",
+                "message": "No relevant information found. Please try again later or rephrase your query.",
+                'entities': entities,
+                'retries_attempted': retry_count,
+                'debug_queries': search_queries  # For debugging
+            }, 200
+
+        # Keep the most relevant articles, one per story (see rerank.py)
+        if deadline.retrieval_budget() > 0:
+            with stage('rerank'):
+                selected_articles, rerank_report = rerank_articles(text, articles)
+        else:
+            deadline.cut_short('rerank', "skipped, keeping retrieval order")
+            selected_articles = articles[:settings.RERANK_TOP_K]
+            rerank_report = {'candidates': len(articles), 'kept': len(selected_articles)}
+        logger.info(f"[classify_text] Selected {len(selected_articles)} articles for analysis")
+
+        # 🧠 Now send the selected articles to LLaMA for checking, within the prompt token budget
+        system_prompt = (
+            "You are an expert fact checker with access to both provided sources and your own training data. "
+            "Analyze the information and provide your confident assessment. "
+            "Respond ONLY in this strict JSON format:\n"
+            "{\n"
+            "  \"is_true\": true or false or null,\n"
+            "  \"confidence\": number between 0 and 100,\n"
+            "  \"explanation\": \"Your explanation here. Be confident in your judgment. Provide the reasoning for your assessment.\"\n"
+            "}\n\n"
+            "INSTRUCTIONS:\n"
+            "1. First, analyze the provided articles and Wikipedia summary.\n"
+            "2. If the provided data is insufficient, use your own training data and knowledge base to verify.\n"
+            "3. If you have enough information (from articles, Wikipedia, or your knowledge), provide a confident answer (true/false) with appropriate confidence score.\n"
+            "4. If you cannot determine the accuracy even after checking all sources including your knowledge base, set:\n"
+            "   - \"is_true\": null\n"
+            "   - \"confidence\": 100\n"
+            "   - \"explanation\": \"I don't know. [Explain what information is missing or why you cannot verify this]\"\n"
+            "5. NEVER return undefined values. Always use true, false, or null for is_true.\n"
+            "6. Be honest about uncertainty - saying 'I don't know' is better than providing unreliable information.\n"
+            "7. Do not mention 'articles' or 'Wikipedia' in your explanation - present your findings as your own assessment.\n"
+            "Do not include any additional text, emojis, or commentary outside the JSON."
+        )
+        user_template = (
+            "Evaluate the accuracy of the following statement:\n\n"
+            "Statement: {statement}\n\n"
+            "Here are some related articles:\n{articles}\n\n"
+            "Here is some relevant background information:\n{background}\n\n"
+            "Based on all available information (including your own knowledge base if needed), "
+            "provide your assessment. Make your own conclusion based on all sources. "
+            "Provide a confident result or clearly state if you cannot determine the accuracy."
+        )
+        statement = claim_for_prompt(text)
+        reserved = prompt_tokens([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_template.format(statement=statement, articles='', background='')},
+        ])
+        with stage('prompt'):
+            context = build_news_context(selected_articles, wikipedia_summary, reserved)
+        payload = {
+            "model": "llama-3.1-8b-instant",
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {
+                    "role": "user",
+                    "content": user_template.format(
+                        statement=statement, articles=context.articles, background=context.background
+                    ),
+                },
+            ]
+        }
+        rerank_report.update(context.report, prompt_tokens=prompt_tokens(payload["messages"]))
+        logger.info("[classify_text] News prompt: %s", rerank_report)
+
+        logger.debug("[classify_text] calling Groq for News; articles=%d model=%s", len(selected_articles), groq_model)
+        llm_timeout = deadline.budget(settings.GROQ_TIMEOUT_S)
+        if llm_timeout < settings.DEADLINE_LLM_MIN_S:
+            return _out_of_time('News', deadline, f"{llm_timeout:.1f}s left", rerank_report)
+        try:
+            with stage('groq'):
+                content = client.chat(payload["messages"], model=groq_model, temperature=0.2, timeout=llm_timeout)
+            try:
+                fact_data = json.loads(content)
+                explanation = fact_data.get('explanation', 'No explanation provided.')
+                is_true = fact_data.get('is_true')
+                confidence = fact_data.get('confidence', 0)
+
+                # Ensure is_true is never undefined - convert to None if missing
+                if is_true not in [True, False, None]:
+                    is_true = None
+                    if confidence == 0:
+                        confidence = 100
+                    if explanation == 'No explanation provided.':
+                        explanation = "I don't know. Unable to verify this statement with available information."
+
+                return {
+                    'prediction': 'News',
+                    'is_true': is_true,
+                    'confidence': confidence,
+                    'explanation': explanation,
+                    'context': rerank_report,
+                }, 200
+            except Exception as e:
+                logger.exception("[classify_text] parse error for News response: %s", e)
+                return {
+                    'prediction': 'News',
+                    'is_true': None,
+                    'confidence': 100,
+                    'explanation': f"I don't know. Failed to parse the fact-checking response: {str(e)}",
+                }, 200
+        except LLMTimeout:
+            return _out_of_time('News', deadline, f"no answer within {llm_timeout:.1f}s", rerank_report)
+        except LLMUnavailable as e:
+            logger.error("[classify_text] Groq skipped for News: %s", e)
+            return {'error': 'Fact-checking model is temporarily unavailable. Please try again shortly.'}, 503
+        except Exception as e:
+            logger.exception("[classify_text] Groq call failed for News: %s", e)
+            return {'error': 'Failed to verify news via Groq model.'}, 500
+
+
 @csrf_exempt
 def classify_text(request):
-    print("REACHED HERE")
     if request.method == 'POST':
         try:
             # Log request metadata for debugging
@@ -209,259 +555,9 @@ def classify_text(request):
                 return JsonResponse({'error': 'Text is required'}, status=400)
 
             # BERT Classification (Determine whether the text is a Fact or News)
-            inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True)
-            outputs = model(**inputs)
-            prediction = torch.argmax(outputs.logits, dim=-1)
-            label = "Fact" if prediction.item() == 0 else "News"
-
-            # Extract entities from the input text using spaCy for better clarity
-            entities = extract_entities(text)
-
-            # Fetch Wikipedia summary based on the main query or top entity
-            wikipedia_summary = get_wikipedia_summary(text)  # Fetch Wikipedia summary based on query
-
-            # Prepare Groq client and log message
-            groq_key = os.getenv('GROQ_API_KEY')
-            if not groq_key:
-                logger.error("[classify_text] GROQ_API_KEY is not set in environment")
-                return JsonResponse({'error': 'Server is not configured with Groq API key.'}, status=500)
-            try:
-                from groq import Groq
-            except Exception as ie:
-                logger.exception("[classify_text] Groq SDK import failed: %s", ie)
-                return JsonResponse({'error': 'Groq SDK not installed on the server.'}, status=500)
-            client = Groq(api_key=groq_key)
-            groq_model = "llama-3.1-8b-instant"
-            logger.info("[classify_text] message received; predicted_label_pre=%s", label)
-            # If Fact: Directly use LLaMA for fact verification
-            if label == "Fact":
-                payload = {
-                    "model": "llama-3.1-8b-instant",
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": (
-                                "You are an expert fact checker with access to your training data and knowledge base. "
-                                "Respond ONLY in this strict JSON format:\n"
-                                "{\n"
-                                "  \"is_true\": true or false or null,\n"
-                                "  \"confidence\": number between 0 and 100,\n"
-                                "  \"explanation\": \"Your explanation here.\"\n"
-                                "}\n\n"
-                                "INSTRUCTIONS:\n"
-                                "1. First, try to verify the statement using your own training data and knowledge base.\n"
-                                "2. If you have sufficient information from your training data, provide a confident assessment (true/false) with appropriate confidence score.\n"
-                                "3. If you cannot determine the accuracy with certainty even after checking your knowledge base, set:\n"
-                                "   - \"is_true\": null\n"
-                                "   - \"confidence\": 100\n"
-                                "   - \"explanation\": \"I don't know. [Explain why you cannot determine this]\"\n"
-                                "4. NEVER return undefined values. Always use true, false, or null for is_true.\n"
-                                "5. Be honest about uncertainty - it's better to say 'I don't know' than to guess.\n"
-                                "Do not include any additional text, emojis, or commentary outside the JSON."
-                            )
-                        },
-                        {
-                            "role": "user",
-                            "content": f"Check the accuracy of the following statement: {text}\n\n"
-                                       
-                        }
-                    ]
-                }
-
-                logger.debug("[classify_text] calling Groq for Fact model=%s", groq_model)
-                try:
-                    response = client.chat.completions.create(
-                        model=groq_model,
-                        messages=payload["messages"],
-                        temperature=0.2,
-                    )
-                    content = response.choices[0].message.content
-                    try:
-                        fact_data = json.loads(content)
-                        explanation = fact_data.get('explanation', 'No explanation provided.')
-                        is_true = fact_data.get('is_true')
-                        confidence = fact_data.get('confidence', 0)
-                        
-                        # Ensure is_true is never undefined - convert to None if missing
-                        if is_true not in [True, False, None]:
-                            is_true = None
-                            if confidence == 0:
-                                confidence = 100
-                            if explanation == 'No explanation provided.':
-                                explanation = "I don't know. Unable to verify this statement with available information."
-
-                        return JsonResponse({
-                            'prediction': 'Fact',
-                            'is_true': is_true,
-                            'confidence': confidence,
-                            'explanation': explanation,
-                        })
-                    except Exception as e:
-                        logger.exception("[classify_text] parse error for Fact response: %s", e)
-                        return JsonResponse({
-                            'prediction': 'Fact',
-                            'is_true': None,
-                            'confidence': 100,
-                            'explanation': f"I don't know. Failed to parse the fact-checking response: {str(e)}",
-                        })
-                except Exception as e:
-                    logger.exception("[classify_text] Groq call failed for Fact: %s", e)
-                    return JsonResponse({'error': 'Failed to verify fact via Groq model.'}, status=500)
-
-            else:
-                # NEWS CASE — Fetch articles based on named entities with retry mechanism
-                articles = []
-                max_retries = 3
-                retry_count = 0
-                
-                # Try different search strategies
-                search_queries = []
-                
-                # Strategy 1: Use named entities
-                if entities:
-                    for entity in entities:
-                        search_queries.append(entity['text'])
-                
-                # Strategy 2: Use full text
-                search_queries.append(text)
-                
-                # Strategy 3: Extract key words (if no entities found)
-                if not entities:
-                    words = text.split()
-                    # Use first 3-5 meaningful words
-                    key_words = [w for w in words if len(w) > 3][:5]
-                    if key_words:
-                        search_queries.append(' '.join(key_words))
-                
-                logger.info(f"[classify_text] Search strategies: {search_queries}")
-                
-                while retry_count < max_retries and not articles:
-                    retry_count += 1
-                    logger.info(f"[classify_text] Fetching news articles - Attempt {retry_count}/{max_retries}")
-                    
-                    # Try each search query
-                    for query in search_queries:
-                        if articles:
-                            break  # Stop if we found articles
-                        
-                        # Try Google News RSS
-                        rss_feed_url = f'https://news.google.com/rss/search?q={urllib.parse.quote(query)}&hl=en&gl=US&ceid=US:en'
-                        logger.info(f"[classify_text] Trying query: '{query}' with URL: {rss_feed_url}")
-                        articles += get_relevant_articles(query, rss_feed_url)
-                        
-                        if articles:
-                            logger.info(f"[classify_text] Found {len(articles)} articles for query: '{query}'")
-                    
-                    # If still no articles and not the last retry, wait before retrying
-                    if not articles and retry_count < max_retries:
-                        import time
-                        logger.info(f"[classify_text] No articles found, waiting before retry...")
-                        time.sleep(2)  # Wait 2 seconds before retry
-
-                if not articles:
-                    logger.warning(f"[classify_text] No articles found after {max_retries} retries")
-                    logger.warning(f"[classify_text] Tried queries: {search_queries}")
-                    return JsonResponse({
-                        "prediction": "News",
-                        "message": "No relevant information found. Please try again later or rephrase your query.",
-                        'entities': entities,
-                        'retries_attempted': retry_count,
-                        'debug_queries': search_queries  # For debugging
-                    })
-
-                # Select the top 5 relevant articles (or any limit you want)
-                selected_articles = articles[:10]
-                logger.info(f"[classify_text] Selected {len(selected_articles)} articles for analysis")
-
-                # 🧠 Now send the selected articles to LLaMA for checking
-                article_details = "\n".join(
-                    [f"Title: {clean_html(article.get('title', 'No title'))}\nSummary: {clean_html(article.get('summary', 'No summary'))}" for article in selected_articles]
-                )
-                logger.debug(f"[classify_text] Article details length: {len(article_details)} chars")
-                print("[DEBUG] Article details:")
-                print(article_details[:500] + "..." if len(article_details) > 500 else article_details)
-                payload = {
-                    "model": "llama-3.1-8b-instant",
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": (
-                                "You are an expert fact checker with access to both provided sources and your own training data. "
-                                "Analyze the information and provide your confident assessment. "
-                                "Respond ONLY in this strict JSON format:\n"
-                                "{\n"
-                                "  \"is_true\": true or false or null,\n"
-                                "  \"confidence\": number between 0 and 100,\n"
-                                "  \"explanation\": \"Your explanation here. Be confident in your judgment. Provide the reasoning for your assessment.\"\n"
-                                "}\n\n"
-                                "INSTRUCTIONS:\n"
-                                "1. First, analyze the provided articles and Wikipedia summary.\n"
-                                "2. If the provided data is insufficient, use your own training data and knowledge base to verify.\n"
-                                "3. If you have enough information (from articles, Wikipedia, or your knowledge), provide a confident answer (true/false) with appropriate confidence score.\n"
-                                "4. If you cannot determine the accuracy even after checking all sources including your knowledge base, set:\n"
-                                "   - \"is_true\": null\n"
-                                "   - \"confidence\": 100\n"
-                                "   - \"explanation\": \"I don't know. [Explain what information is missing or why you cannot verify this]\"\n"
-                                "5. NEVER return undefined values. Always use true, false, or null for is_true.\n"
-                                "6. Be honest about uncertainty - saying 'I don't know' is better than providing unreliable information.\n"
-                                "7. Do not mention 'articles' or 'Wikipedia' in your explanation - present your findings as your own assessment.\n"
-                                "Do not include any additional text, emojis, or commentary outside the JSON."
-                            )
-                        },
-                        {
-                            "role": "user",
-                            "content": (
-                                f"Evaluate the accuracy of the following statement:\n\n"
-                                f"Statement: {text}\n\n"
-                                f"Here are some related articles:\n{article_details}\n\n"
-                                f"Here is some relevant background information:\n{wikipedia_summary}\n\n"
-                                "Based on all available information (including your own knowledge base if needed), "
-                                "provide your assessment. Make your own conclusion based on all sources. "
-                                "Provide a confident result or clearly state if you cannot determine the accuracy."
-                            )
-                        }
-                    ]
-                }
-
-                logger.debug("[classify_text] calling Groq for News; articles=%d model=%s", len(selected_articles), groq_model)
-                try:
-                    response = client.chat.completions.create(
-                        model=groq_model,
-                        messages=payload["messages"],
-                        temperature=0.2,
-                    )
-                    content = response.choices[0].message.content
-                    try:
-                        fact_data = json.loads(content)
-                        explanation = fact_data.get('explanation', 'No explanation provided.')
-                        is_true = fact_data.get('is_true')
-                        confidence = fact_data.get('confidence', 0)
-                        
-                        # Ensure is_true is never undefined - convert to None if missing
-                        if is_true not in [True, False, None]:
-                            is_true = None
-                            if confidence == 0:
-                                confidence = 100
-                            if explanation == 'No explanation provided.':
-                                explanation = "I don't know. Unable to verify this statement with available information."
-
-                        return JsonResponse({
-                            'prediction': 'News',
-                            'is_true': is_true,
-                            'confidence': confidence,
-                            'explanation': explanation,
-                        })
-                    except Exception as e:
-                        logger.exception("[classify_text] parse error for News response: %s", e)
-                        return JsonResponse({
-                            'prediction': 'News',
-                            'is_true': None,
-                            'confidence': 100,
-                            'explanation': f"I don't know. Failed to parse the fact-checking response: {str(e)}",
-                        })
-                except Exception as e:
-                    logger.exception("[classify_text] Groq call failed for News: %s", e)
-                    return JsonResponse({'error': 'Failed to verify news via Groq model.'}, status=500)
+            # Concurrent requests share one padded forward pass via the micro-batcher.
+            result, status = verify_claim(text, deadline=Deadline.from_request(request))
+            return JsonResponse(result, status=status)
 
         except Exception as e:
             traceback.print_exc()
@@ -470,72 +566,186 @@ def classify_text(request):
     return HttpResponseBadRequest("Only POST method is allowed.")
 
 
-def get_relevant_articles(query, rss_feed_url, timeout=10):
-    """Fetch and filter articles based on query with timeout and error handling."""
+def _parse_claims(request):
+    """Read claims from a JSON array or NDJSON body.
+
+    Each element/line may be a plain string or an object with a ``message``
+    key, mirroring the single-claim ``/classify-text/`` body.
+    """
+    body = request.body.decode('utf-8').strip()
+    content_type = request.headers.get('content-type', '')
+    if body.startswith('[') and 'ndjson' not in content_type:
+        items = json.loads(body)
+    else:
+        items = [json.loads(line) for line in body.splitlines() if line.strip()]
+    claims = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get('message', '')
+        if not isinstance(item, str):
+            raise ValueError("Each claim must be a string or an object with a 'message' field.")
+        claims.append(item.strip())
+    return claims
+
+
+def _batch_deadline_reached(index):
+    return index, {'error': 'Batch deadline reached before this claim was verified', 'pending': True}, 504
+
+
+def _verify_indexed(index, text, label_future, batch_expires):
+    """Wait for one claim's batched BERT label, then run the rest of its pipeline.
+
+    The claim's budget is ``REQUEST_DEADLINE_S``, cut to what is left of the batch's.
+    """
+    if not text:
+        return index, {'error': 'Text is required'}, 400
+    seconds = min(settings.REQUEST_DEADLINE_S, batch_expires - time.monotonic())
+    if seconds < settings.DEADLINE_LLM_MIN_S:
+        label_future.cancel()
+        return _batch_deadline_reached(index)
+    deadline = Deadline(seconds)
     try:
-        # Add headers to mimic a browser request
-        import socket
-        socket.setdefaulttimeout(timeout)
-        
-        # Parse the feed with feedparser
-        feed = feedparser.parse(rss_feed_url, agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-        
-        relevant_articles = []
-        
-        # Check if feed was successfully parsed
-        if hasattr(feed, 'bozo_exception'):
-            logger.warning(f"[get_relevant_articles] Feed parse warning for '{query}': {feed.bozo_exception}")
-        
-        if 'entries' in feed and feed.entries:
-            logger.info(f"[get_relevant_articles] Found {len(feed.entries)} entries for query '{query}'")
-            for e in feed.entries[:5]:
-                # Ensure we have at least a title
-                if hasattr(e, 'title') and e.title:
-                    relevant_articles.append(e)
-                    logger.debug(f"[get_relevant_articles] Added article: {e.title[:50]}...")
-        else:
-            logger.warning(f"[get_relevant_articles] No entries found in feed for query '{query}'")
-            # Log feed status for debugging
-            if hasattr(feed, 'status'):
-                logger.warning(f"[get_relevant_articles] Feed status: {feed.status}")
-        
-        logger.info(f"[get_relevant_articles] query='{query}' rss_entries={len(getattr(feed, 'entries', []))} returned={len(relevant_articles)}")
-        return relevant_articles
-        
+        label = label_future.result(timeout=deadline.retrieval_budget())['label']
+    except FutureTimeoutError:
+        label_future.cancel()
+        return _batch_deadline_reached(index)
     except Exception as e:
-        logger.error(f"[get_relevant_articles] Error fetching articles for query '{query}': {str(e)}")
-        logger.exception(e)
-        return []
+        logger.exception("[classify_batch] claim %d failed: %s", index, e)
+        return index, {'error': str(e)}, 500
+    try:
+        result, status = verify_claim(text, label=label, deadline=deadline)
+    except Exception as e:
+        logger.exception("[classify_batch] claim %d failed: %s", index, e)
+        result, status = {'error': str(e)}, 500
+    return index, result, status
+
+
+def _stream_batch_verdicts(claims):
+    """Yield one NDJSON line per claim, in completion order.
+
+    The whole batch shares ``CLASSIFY_BATCH_DEADLINE_S`` (below gunicorn's
+    --timeout, which would kill the worker mid-stream). Claims still pending
+    when it runs out are reported with status 504 and ``"pending": true``.
+    """
+    batch_expires = time.monotonic() + settings.CLASSIFY_BATCH_DEADLINE_S
+    batcher = _get_bert_batcher()
+    # Submitting every claim up front lets the micro-batcher fill whole batches.
+    label_futures = [batcher.submit(text) if text else None for text in claims]
+    get_ner_service().prefetch(claims)  # entities in a few nlp.pipe batches, not one call per claim
+    pool = ThreadPoolExecutor(
+        max_workers=settings.CLASSIFY_BATCH_CONCURRENCY,
+        thread_name_prefix="classify-batch",
+    )
+    try:
+        futures = {
+            pool.submit(_verify_indexed, index, text, label_future, batch_expires): index
+            for index, (text, label_future) in enumerate(zip(claims, label_futures))
+        }
+        pending = set(futures.values())
+        try:
+            for future in as_completed(futures, timeout=max(0.0, batch_expires - time.monotonic())):
+                index, result, status = future.result()
+                pending.discard(index)
+                yield json.dumps({'index': index, 'status': status, **result}) + "\n"
+        except FutureTimeoutError:
+            logger.warning("[classify_batch] deadline reached with %d of %d claims pending", len(pending), len(claims))
+            for future in futures:
+                future.cancel()
+            for index in sorted(pending):
+                index, result, status = _batch_deadline_reached(index)
+                yield json.dumps({'index': index, 'status': status, **result}) + "\n"
+    finally:
+        # Client went away or we finished: do not start claims nobody will read.
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
-def clean_html(raw_html):
-    """Remove HTML tags from summary text."""
-    clean_text = re.sub('<.*?>', '', raw_html)
-    return clean_text.strip()
+@csrf_exempt
+def classify_batch(request):
+    """Verify many claims in one request and stream verdicts back as NDJSON."""
+    if request.method != 'POST':
+        return HttpResponseBadRequest("Only POST method is allowed.")
+    try:
+        claims = _parse_claims(request)
+    except (ValueError, UnicodeDecodeError) as e:
+        return JsonResponse({'error': f'Invalid request body: {e}'}, status=400)
+    if not claims:
+        return JsonResponse({'error': 'At least one claim is required'}, status=400)
+    if len(claims) > settings.CLASSIFY_BATCH_MAX_CLAIMS:
+        return JsonResponse(
+            {'error': f'At most {settings.CLASSIFY_BATCH_MAX_CLAIMS} claims per request'},
+            status=400,
+        )
+    logger.info("[classify_batch] streaming verdicts for %d claims", len(claims))
+    response = StreamingHttpResponse(_stream_batch_verdicts(claims), content_type='application/x-ndjson')
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _job_payload(job):
+    payload = job.as_dict()
+    payload['status_url'] = reverse('job_status', args=[job.pk])
+    payload['ws_url'] = f"/ws/jobs/{job.pk}/"
+    return payload
 
-def extract_entities(text):
-    """Extract named entities from the given text using spaCy."""
-    doc = nlp(text)
-    entities = []
-    for ent in doc.ents:
-        entities.append({'text': ent.text, 'label': ent.label_})
-    return entities
-
-def get_wikipedia_summary(query):
-    """Fetch a relevant Wikipedia summary based on the query."""
+
+@csrf_exempt
+def job_status(request, job_id):
+    """GET a /detect/ job's status and progress (and transcription once done); DELETE cancels it."""
+    if request.method == 'DELETE':
+        job = jobs.cancel(job_id)
+    elif request.method == 'GET':
+        job = AudioJob.objects.filter(pk=job_id).first()
+        jobs.ensure_workers()  # after a restart, the first poll restarts processing
+    else:
+        return HttpResponseBadRequest("Only GET and DELETE are allowed.")
+    if job is None:
+        return JsonResponse({'error': 'Unknown job'}, status=404)
+    return JsonResponse(_job_payload(job))
+
+
+def upload_stats(request):
+    """Upload store usage and garbage collection, plus the number of cached transcripts."""
+    stats = get_upload_store().stats()
+    stats['transcripts'] = Transcript.objects.count()
+    return JsonResponse({'uploads': stats})
+
+
+def classifier_stats(request):
+    """Expose the micro-batcher's throughput/latency counters as JSON."""
+    if _bert_batcher is None:
+        return JsonResponse({'bert': None})
+    return JsonResponse({'bert': _bert_batcher.stats.snapshot()})
+
+
+def metrics_view(request):
+    """Prometheus text exposition of this process's stage timings, request counters and gauges."""
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def ner_stats(request):
+    """NER cache hits/misses and nlp.pipe batch sizes."""
+    return JsonResponse({'ner': get_ner_service().stats()})
+
+
+def feed_cache_stats(request):
+    """Expose the RSS feed cache's hit/miss and bytes-saved counters as JSON."""
+    return JsonResponse({'feed_cache': get_feed_cache().stats()})
+
+
+def llm_stats(request):
+    """Expose the Groq client's circuit state, hedges and latency histograms as JSON."""
     try:
-        # Search for the page related to the query
-        page = wikipedia.page(query)
-        summary = page.summary  # This is a short summary of the page
-        return summary
-    except wikipedia.exceptions.DisambiguationError as e:
-        # If there are multiple possibilities, take the first one
-        return wikipedia.page(e.options[0]).summary
-    except wikipedia.exceptions.HTTPTimeoutError:
-        return "Wikipedia request timed out."
-    except wikipedia.exceptions.RedirectError:
-        return "Redirect error occurred while fetching Wikipedia page."
-    except wikipedia.exceptions.PageError:
-        return "No Wikipedia page found for the query."
-    except Exception as e:
-        return str(e)
\ No newline at end of file
+        return JsonResponse({'llm': get_llm_client().stats()})
+    except ImportError:
+        return JsonResponse({'llm': None})
+
+
+def verdict_cache_stats(request):
+    """Expose the semantic verdict cache's hit rate and size as JSON."""
+    cache = get_verdict_cache()
+    return JsonResponse({'verdict_cache': cache.stats() if cache is not None else None})
+
+
+def extract_entities(text):
+    """Extract named entities from the given text using spaCy (batched and cached, see ner.py)."""
+    return get_ner_service().extract(text)
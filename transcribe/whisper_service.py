@@ -0,0 +1,122 @@
+"""One Whisper service shared by the upload view and the websocket consumer.
+
+The service owns ``WHISPER_INSTANCES`` copies of the ``WHISPER_MODEL_SIZE``
+model, each driven by its own worker thread. Whisper installs per-call hooks
+on the model while decoding, so an instance is never used by two jobs at
+once. Jobs from both entry points share one bounded queue; when it is full,
+``submit`` raises ``WhisperQueueFull`` instead of letting work pile up.
+
+Worker threads start on first use in each process. Threads do not survive
+``fork``, so a service preloaded in the gunicorn master would otherwise hand
+every worker a queue nobody reads.
+"""
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class WhisperQueueFull(RuntimeError):
+    """Raised when the transcription queue is at capacity."""
+
+
+class WhisperService:
+    def __init__(self, models, queue_size=16):
+        if not models:
+            raise ValueError("WhisperService needs at least one model instance")
+        self.models = list(models)
+        self.queue_size = max(1, int(queue_size))
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._workers = []
+
+    def _ensure_workers(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked from a process that already used the service: its queue and
+                # threads stayed behind in the parent.
+                self._queue = queue.Queue(maxsize=self.queue_size)
+            self._workers = []
+            for index, model in enumerate(self.models):
+                worker = threading.Thread(
+                    target=self._run, args=(self._queue, model), name=f"whisper-{index}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            self._pid = os.getpid()
+
+    @property
+    def device(self):
+        return self.models[0].device
+
+    @property
+    def n_mels(self):
+        return self.models[0].dims.n_mels
+
+    @property
+    def pending(self):
+        """Jobs waiting for a free model instance."""
+        return self._queue.qsize()
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule ``fn(model, *args, **kwargs)`` and return a Future for its result."""
+        self._ensure_workers()
+        future = Future()
+        try:
+            self._queue.put_nowait((future, fn, args, kwargs))
+        except queue.Full:
+            raise WhisperQueueFull(
+                f"Transcription queue is full ({self._queue.maxsize} jobs); try again shortly."
+            ) from None
+        return future
+
+    def run(self, fn, *args, timeout=None, **kwargs):
+        """Blocking convenience wrapper around ``submit``; raises TimeoutError after ``timeout`` seconds."""
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()  # still queued: don't spend a model on a caller that gave up
+            raise
+
+    def transcribe(self, audio, timeout=None, **options):
+        """Transcribe a path or float32 array; returns Whisper's result dict."""
+        return self.run(transcribe_audio, audio, timeout=timeout, **options)
+
+    def _run(self, jobs, model):
+        while True:
+            future, fn, args, kwargs = jobs.get()
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(fn(model, *args, **kwargs))
+                except Exception as e:
+                    logger.exception("[WhisperService] job failed: %s", e)
+                    future.set_exception(e)
+            finally:
+                jobs.task_done()
+
+
+def transcribe_audio(model, audio, **options):
+    """Job function for a plain ``model.transcribe`` (named, so it can also run on the model server)."""
+    return model.transcribe(audio, **options)
+
+
+def get_whisper_service():
+    """Return the process-wide service from the model registry, or None if unavailable."""
+    from .registry import registry
+    try:
+        return registry.get('whisper')
+    except Exception as e:
+        # Do not crash the server if Whisper isn't available
+        logger.error("[WhisperService] failed to load: %s", e)
+        return None
@@ -0,0 +1,207 @@
+"""Wikipedia background for the News branch of verify_claim.
+
+Instead of passing the whole claim to ``wikipedia.page()`` (a search round
+trip, a full page fetch and, on disambiguation, another one), summaries are
+looked up by the entities spaCy found. All uncached titles are resolved in one
+MediaWiki ``action=query`` call returning the intro extracts; redirects and
+title normalization are followed by the API itself and disambiguation pages
+are skipped. Without entities, a single ``generator=search`` call finds and
+extracts the best match for the claim.
+
+Results live in a SQLite cache (``WIKI_CACHE_PATH``) shared by all workers:
+summaries for ``WIKI_CACHE_TTL_S``, pages that do not exist (negative
+entries) for ``WIKI_NEGATIVE_TTL_S``. Point ``WIKI_API_URL`` at
+``manage.py stub_wiki`` to run without the network.
+"""
+import logging
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'TruthTell/1.0 (fact-checking research; https://github.com/Sanjay-nithin/MythSnare)'
+TITLES_PER_CALL = 20  # the extracts module returns at most 20 intros per request
+NO_SUMMARY = "No Wikipedia page found for the query."
+TIMED_OUT = "Wikipedia request timed out."
+
+
+def _key(title):
+    return ' '.join(title.split()).casefold()
+
+
+class SummaryCache:
+    """SQLite table of title -> summary; a NULL summary records a missing page."""
+
+    def __init__(self, path, ttl, negative_ttl):
+        self.path = str(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " key TEXT PRIMARY KEY, title TEXT, summary TEXT, fetched_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        """Fresh entries among ``keys`` as ``{key: (title, summary_or_None)}``."""
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ','.join('?' * len(keys))
+        rows = self._connect().execute(
+            f"SELECT key, title, summary, fetched_at FROM summaries WHERE key IN ({placeholders})", list(keys)
+        ).fetchall()
+        fresh = {}
+        for key, title, summary, fetched_at in rows:
+            ttl = self.ttl if summary is not None else self.negative_ttl
+            if now - fetched_at < ttl:
+                fresh[key] = (title, summary)
+        return fresh
+
+    def put_many(self, entries):
+        """Store ``{key: (title, summary_or_None)}``."""
+        if not entries:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO summaries (key, title, summary, fetched_at) VALUES (?, ?, ?, ?)",
+                [(key, title, summary, now) for key, (title, summary) in entries.items()],
+            )
+
+
+class WikipediaClient:
+    def __init__(self, api_url, cache, timeout=5.0):
+        self.api_url = api_url
+        self.cache = cache
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_maxsize=8))
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=8))
+        self.session.headers['User-Agent'] = USER_AGENT
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'negative_hits': 0, 'misses': 0, 'api_calls': 0}
+
+    def _query(self, timeout=None, **params):
+        params.update({
+            'action': 'query', 'format': 'json', 'formatversion': 2, 'redirects': 1,
+            'prop': 'extracts|pageprops', 'exintro': 1, 'explaintext': 1, 'ppprop': 'disambiguation',
+        })
+        self._count('api_calls')
+        response = self.session.get(self.api_url, params=params, timeout=min(timeout or self.timeout, self.timeout))
+        response.raise_for_status()
+        return response.json().get('query', {})
+
+    @staticmethod
+    def _extracts(query):
+        """``{page title: extract or None}`` for the pages in a query result."""
+        pages = {}
+        for page in query.get('pages', []):
+            usable = not page.get('missing') and 'disambiguation' not in page.get('pageprops', {})
+            pages[page.get('title')] = (page.get('extract') or None) if usable else None
+        return pages
+
+    def summaries(self, titles, timeout=None):
+        """``{title: summary or None}`` for ``titles``, one API call per 20 uncached titles."""
+        keys = {}
+        for title in titles:
+            keys.setdefault(_key(title), title)
+        cached = self.cache.get_many(list(keys))
+        for _, summary in cached.values():
+            self._count('hits' if summary is not None else 'negative_hits')
+        result = {keys[key]: summary for key, (_, summary) in cached.items()}
+
+        missing = [key for key in keys if key not in cached]
+        for start in range(0, len(missing), TITLES_PER_CALL):
+            chunk = missing[start:start + TITLES_PER_CALL]
+            for _ in chunk:
+                self._count('misses')
+            query = self._query(timeout, titles='|'.join(keys[key] for key in chunk))
+            # Follow the API's normalization/redirect chain back to what we asked for.
+            resolved = {}
+            for step in query.get('normalized', []) + query.get('redirects', []):
+                resolved[step['from']] = step['to']
+            pages = self._extracts(query)
+            fetched = {}
+            for key in chunk:
+                title = keys[key]
+                seen = set()
+                while title in resolved and title not in seen:
+                    seen.add(title)
+                    title = resolved[title]
+                summary = pages.get(title)
+                fetched[key] = (title, summary)
+                result[keys[key]] = summary
+            self.cache.put_many(fetched)
+        return result
+
+    def search_summary(self, text, timeout=None):
+        """Intro of the best search match for ``text`` (one call, cached), or None."""
+        key = 'search:' + _key(text)
+        cached = self.cache.get_many([key])
+        if key in cached:
+            self._count('hits' if cached[key][1] is not None else 'negative_hits')
+            return cached[key][1]
+        self._count('misses')
+        pages = self._extracts(self._query(timeout, generator='search', gsrsearch=text, gsrlimit=1))
+        title, summary = next(iter(pages.items()), (None, None))
+        self.cache.put_many({key: (title, summary)})
+        return summary
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_wikipedia_client():
+    """Process-wide client configured from settings."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            cache = SummaryCache(settings.WIKI_CACHE_PATH, settings.WIKI_CACHE_TTL_S, settings.WIKI_NEGATIVE_TTL_S)
+            _client = WikipediaClient(settings.WIKI_API_URL, cache, timeout=settings.WIKI_TIMEOUT_S)
+    return _client
+
+
+def get_wikipedia_summary(text, entities=None, timeout=None):
+    """Background text for a claim from the summaries of its entities.
+
+    Falls back to a search on the claim itself when no entity has a page.
+    ``timeout`` caps each API call below ``WIKI_TIMEOUT_S``. Never raises:
+    errors are logged and reported as the summary text, as the previous
+    ``wikipedia.page()`` helper did.
+    """
+    client = get_wikipedia_client()
+    titles = [entity['text'] for entity in (entities or [])][:settings.WIKI_MAX_ENTITIES]
+    try:
+        found = [(title, summary) for title, summary in client.summaries(titles, timeout).items() if summary]
+        if found:
+            return "\n\n".join(f"{title}: {summary}" for title, summary in found)
+        return client.search_summary(text, timeout) or NO_SUMMARY
+    except requests.Timeout:
+        return TIMED_OUT
+    except Exception as e:
+        logger.error("[get_wikipedia_summary] lookup failed: %s", e)
+        return str(e)
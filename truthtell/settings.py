@@ -26,6 +26,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'transcribe.metrics.MetricsMiddleware',  # first, so it times everything below
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # ✅ Add WhiteNoise here
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -102,4 +103,146 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Model loading: 'lazy' loads each model on first use; 'preload' loads them all
+# in the gunicorn master (run with --preload) so forked workers share the weights.
+MODEL_LOADING = os.environ.get('MODEL_LOADING', 'lazy')
+SPACY_MODEL = os.environ.get('SPACY_MODEL', 'en_core_web_sm')
+# NER service: load only the components NER needs, batch concurrent texts through
+# nlp.pipe, and cache entities by normalized text
+SPACY_NER_ONLY = os.environ.get('SPACY_NER_ONLY', 'True') == 'True'
+NER_CACHE_SIZE = int(os.environ.get('NER_CACHE_SIZE', '4096'))
+NER_MAX_BATCH = int(os.environ.get('NER_MAX_BATCH', '64'))
+NER_BATCH_WAIT_MS = float(os.environ.get('NER_BATCH_WAIT_MS', '3'))
+# Model server: with a socket path set, the classifier, spaCy and Whisper live in
+# one `manage.py model_server` process and web workers call it (empty = in-process)
+MODEL_SERVER_SOCKET = os.environ.get('MODEL_SERVER_SOCKET', '')
+MODEL_SERVER_POOL_SIZE = int(os.environ.get('MODEL_SERVER_POOL_SIZE', '8'))
+MODEL_SERVER_TIMEOUT_S = float(os.environ.get('MODEL_SERVER_TIMEOUT_S', '300'))
+MODEL_SERVER_THREADS = int(os.environ.get('MODEL_SERVER_THREADS', '0'))
+WHISPER_DOWNLOAD_ROOT = os.environ.get(
+    'WHISPER_DOWNLOAD_ROOT',
+    os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'whisper'),
+)
+
+# Shared Whisper service used by both /detect/ and the live-transcribe websocket
+WHISPER_MODEL_SIZE = os.environ.get('WHISPER_MODEL_SIZE', 'small')
+WHISPER_INSTANCES = int(os.environ.get('WHISPER_INSTANCES', '1'))
+WHISPER_QUEUE_SIZE = int(os.environ.get('WHISPER_QUEUE_SIZE', '16'))
+# Longest a caller waits for one Whisper job (queueing included); below gunicorn's --timeout 120
+WHISPER_TIMEOUT_S = float(os.environ.get('WHISPER_TIMEOUT_S', '90'))
+
+# ws/live-transcribe/: transcribe utterances while the user speaks (per-socket opt-out: ?streaming=0)
+LIVE_TRANSCRIBE_STREAMING = os.environ.get('LIVE_TRANSCRIBE_STREAMING', 'True') == 'True'
+LIVE_VAD_SILENCE_MS = int(os.environ.get('LIVE_VAD_SILENCE_MS', '600'))
+LIVE_VAD_MAX_SEGMENT_S = float(os.environ.get('LIVE_VAD_MAX_SEGMENT_S', '15'))
+# Executor for blocking websocket work; beyond WORKERS + QUEUE jobs clients get a 'busy' message
+LIVE_EXECUTOR_WORKERS = int(os.environ.get('LIVE_EXECUTOR_WORKERS', '4'))
+LIVE_EXECUTOR_QUEUE = int(os.environ.get('LIVE_EXECUTOR_QUEUE', '16'))
+
+# Background /detect/ jobs: uploads are queued in the database and transcribed by
+# JOBS_WORKERS threads per process (or `manage.py run_jobs`), at most JOBS_MAX_RUNNING
+# at once across all processes; failed attempts are retried with exponential backoff
+JOBS_ENABLED = os.environ.get('JOBS_ENABLED', 'True') == 'True'
+JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', '1'))
+JOBS_MAX_RUNNING = int(os.environ.get('JOBS_MAX_RUNNING', '2'))
+JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', '3'))
+JOBS_RETRY_BACKOFF_S = float(os.environ.get('JOBS_RETRY_BACKOFF_S', '5'))
+JOBS_LEASE_S = float(os.environ.get('JOBS_LEASE_S', '60'))
+# Longest a job may spend decoding, or waiting for language detection (which can queue behind other Whisper work)
+JOBS_STAGE_TIMEOUT_S = float(os.environ.get('JOBS_STAGE_TIMEOUT_S', '600'))
+JOBS_POLL_S = float(os.environ.get('JOBS_POLL_S', '1'))
+JOBS_RETENTION_S = float(os.environ.get('JOBS_RETENTION_S', str(24 * 3600)))
+JOBS_CLEANUP_INTERVAL_S = float(os.environ.get('JOBS_CLEANUP_INTERVAL_S', '300'))
+
+# Uploads are stored by SHA-256 (identical files are kept once and their transcript
+# reused); least recently used ones are deleted in the background beyond the quota
+UPLOAD_STORE_DIR = os.environ.get('UPLOAD_STORE_DIR', os.path.join(MEDIA_ROOT, 'uploads'))
+UPLOAD_STORE_QUOTA_MB = int(os.environ.get('UPLOAD_STORE_QUOTA_MB', '2048'))
+UPLOAD_TMP_MAX_AGE_S = float(os.environ.get('UPLOAD_TMP_MAX_AGE_S', '3600'))
+
+# BERT Fact/News classifier
+# Backend: 'eager' (FP32), 'quantized' (dynamic int8) or 'traced' (TorchScript per length bucket)
+CLASSIFIER_BACKEND = os.environ.get('CLASSIFIER_BACKEND', 'eager')
+# Model directory: trained_model/ (BERT-base) or a compact student written by distill.py
+CLASSIFIER_MODEL_DIR = os.environ.get('CLASSIFIER_MODEL_DIR', str(BASE_DIR / 'trained_model'))
+CLASSIFIER_SEQ_BUCKETS = [int(b) for b in os.environ.get('CLASSIFIER_SEQ_BUCKETS', '16,32,64,128,256,512').split(',')]
+CLASSIFIER_MAX_BATCH = int(os.environ.get('CLASSIFIER_MAX_BATCH', '32'))
+CLASSIFIER_BATCH_WAIT_MS = float(os.environ.get('CLASSIFIER_BATCH_WAIT_MS', '5'))
+
+# Bulk /classify-batch/ endpoint
+CLASSIFY_BATCH_MAX_CLAIMS = int(os.environ.get('CLASSIFY_BATCH_MAX_CLAIMS', '500'))
+CLASSIFY_BATCH_CONCURRENCY = int(os.environ.get('CLASSIFY_BATCH_CONCURRENCY', '8'))
+# Budget for a whole batch; unfinished claims are reported as pending (keep it under gunicorn's 120 s)
+CLASSIFY_BATCH_DEADLINE_S = float(os.environ.get('CLASSIFY_BATCH_DEADLINE_S', '100'))
+
+# News retrieval: RSS search URL template ('{query}' is URL-quoted), per-query timeout,
+# overall deadline across retry rounds, and how many articles are enough to stop early
+NEWS_RSS_URL = os.environ.get('NEWS_RSS_URL', 'https://news.google.com/rss/search?q={query}&hl=en&gl=US&ceid=US:en')
+NEWS_QUERY_TIMEOUT_S = float(os.environ.get('NEWS_QUERY_TIMEOUT_S', '4'))
+NEWS_DEADLINE_S = float(os.environ.get('NEWS_DEADLINE_S', '10'))
+NEWS_MAX_ROUNDS = int(os.environ.get('NEWS_MAX_ROUNDS', '3'))
+NEWS_ENOUGH_ARTICLES = int(os.environ.get('NEWS_ENOUGH_ARTICLES', '20'))
+NEWS_ARTICLES_PER_QUERY = int(os.environ.get('NEWS_ARTICLES_PER_QUERY', '10'))
+NEWS_FETCH_WORKERS = int(os.environ.get('NEWS_FETCH_WORKERS', '8'))
+
+# End-to-end deadline for one claim: REQUEST_DEADLINE_S by default, or the client's
+# X-Request-Deadline-Ms header up to REQUEST_DEADLINE_MAX_S (keep it under gunicorn's 120 s).
+# Retrieval leaves DEADLINE_LLM_RESERVE_S for Groq; a stage with less than
+# DEADLINE_STAGE_MIN_S (Groq: DEADLINE_LLM_MIN_S) left is skipped
+REQUEST_DEADLINE_S = float(os.environ.get('REQUEST_DEADLINE_S', '25'))
+REQUEST_DEADLINE_MAX_S = float(os.environ.get('REQUEST_DEADLINE_MAX_S', '100'))
+DEADLINE_LLM_RESERVE_S = float(os.environ.get('DEADLINE_LLM_RESERVE_S', '5'))
+DEADLINE_LLM_MIN_S = float(os.environ.get('DEADLINE_LLM_MIN_S', '1'))
+DEADLINE_STAGE_MIN_S = float(os.environ.get('DEADLINE_STAGE_MIN_S', '0.25'))
+
+# RSS feed cache: in-memory LRU with TTL, revalidated by conditional GET once stale;
+# FEED_CACHE_DIR (empty = off) adds an on-disk tier that survives restarts
+FEED_CACHE_SIZE = int(os.environ.get('FEED_CACHE_SIZE', '256'))
+FEED_CACHE_TTL_S = float(os.environ.get('FEED_CACHE_TTL_S', '300'))
+FEED_CACHE_DIR = os.environ.get('FEED_CACHE_DIR', '')
+
+# Wikipedia background: entity summaries from the MediaWiki API, cached in SQLite
+# (missing pages are cached too, for the shorter WIKI_NEGATIVE_TTL_S)
+WIKI_API_URL = os.environ.get('WIKI_API_URL', 'https://en.wikipedia.org/w/api.php')
+WIKI_CACHE_PATH = os.environ.get('WIKI_CACHE_PATH', str(BASE_DIR / 'wiki_cache.sqlite3'))
+WIKI_CACHE_TTL_S = float(os.environ.get('WIKI_CACHE_TTL_S', str(7 * 24 * 3600)))
+WIKI_NEGATIVE_TTL_S = float(os.environ.get('WIKI_NEGATIVE_TTL_S', str(24 * 3600)))
+WIKI_TIMEOUT_S = float(os.environ.get('WIKI_TIMEOUT_S', '5'))
+WIKI_MAX_ENTITIES = int(os.environ.get('WIKI_MAX_ENTITIES', '5'))
+
+# Semantic verdict cache: reuse the verdict of a near-identical earlier claim
+# (cosine similarity >= THRESHOLD and the same negations/numbers/months, see
+# verdict_cache.claim_signature); News verdicts expire sooner than Fact ones
+VERDICT_CACHE_ENABLED = os.environ.get('VERDICT_CACHE_ENABLED', 'True') == 'True'
+VERDICT_CACHE_MODEL = os.environ.get('VERDICT_CACHE_MODEL', 'all-MiniLM-L6-v2')
+VERDICT_CACHE_THRESHOLD = float(os.environ.get('VERDICT_CACHE_THRESHOLD', '0.92'))
+VERDICT_CACHE_SIZE = int(os.environ.get('VERDICT_CACHE_SIZE', '2048'))
+VERDICT_CACHE_TTL_S = float(os.environ.get('VERDICT_CACHE_TTL_S', str(7 * 24 * 3600)))
+VERDICT_CACHE_NEWS_TTL_S = float(os.environ.get('VERDICT_CACHE_NEWS_TTL_S', '3600'))
+VERDICT_CACHE_SNAPSHOT = os.environ.get('VERDICT_CACHE_SNAPSHOT', '')
+
+# Retrieved articles are reranked against the claim with the same embedder; headlines
+# at or above DUPLICATE_THRESHOLD similarity to a kept one are dropped
+RERANK_TOP_K = int(os.environ.get('RERANK_TOP_K', '5'))
+RERANK_DUPLICATE_THRESHOLD = float(os.environ.get('RERANK_DUPLICATE_THRESHOLD', '0.85'))
+
+# Groq prompt budget (estimated tokens): hard cap on the whole prompt, the claim itself,
+# all article evidence, each single article, and Wikipedia background
+PROMPT_MAX_TOKENS = int(os.environ.get('PROMPT_MAX_TOKENS', '1800'))
+PROMPT_CLAIM_TOKENS = int(os.environ.get('PROMPT_CLAIM_TOKENS', '300'))
+PROMPT_ARTICLE_TOKENS = int(os.environ.get('PROMPT_ARTICLE_TOKENS', '700'))
+PROMPT_ARTICLE_MAX_TOKENS = int(os.environ.get('PROMPT_ARTICLE_MAX_TOKENS', '180'))
+PROMPT_BACKGROUND_TOKENS = int(os.environ.get('PROMPT_BACKGROUND_TOKENS', '400'))
+
+# Shared Groq client: keep-alive pool, per-call timeout, optional hedged request past
+# the observed p95, and a circuit breaker that fails fast while Groq is unhealthy
+GROQ_BASE_URL = os.environ.get('GROQ_BASE_URL', '')
+GROQ_TIMEOUT_S = float(os.environ.get('GROQ_TIMEOUT_S', '20'))
+GROQ_MAX_RETRIES = int(os.environ.get('GROQ_MAX_RETRIES', '1'))
+GROQ_MAX_CONNECTIONS = int(os.environ.get('GROQ_MAX_CONNECTIONS', '8'))
+GROQ_HEDGE = os.environ.get('GROQ_HEDGE', 'False') == 'True'
+GROQ_HEDGE_MIN_S = float(os.environ.get('GROQ_HEDGE_MIN_S', '1.0'))
+GROQ_BREAKER_FAILURES = int(os.environ.get('GROQ_BREAKER_FAILURES', '5'))
+GROQ_BREAKER_COOLDOWN_S = float(os.environ.get('GROQ_BREAKER_COOLDOWN_S', '30'))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
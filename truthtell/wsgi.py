@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'truthtell.settings')
 
 application = get_wsgi_application()
+
+# With MODEL_LOADING=preload and `gunicorn --preload`, this runs once in the
+# master so every forked worker shares the model weights copy-on-write.
+from django.conf import settings  # noqa: E402
+
+if settings.MODEL_LOADING == 'preload':
+    from transcribe.registry import registry  # noqa: E402
+
+    registry.preload()